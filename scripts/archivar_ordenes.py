@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Archiva las OCs COMPLETA/CANCELADA sin cambios hace más de N meses (por defecto ARCHIVO_MESES)
+en orden_compra_archivo / item_orden_compra_archivo, en lotes con su propia transacción.
+
+    python scripts/archivar_ordenes.py [--schemas co,ec] [--meses 12] [--lote 500]
+"""
+import argparse
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from src.config import settings  # noqa: E402
+from src.infrastructure.infrastructure import session_for_schema  # noqa: E402
+from src.services.archivo import ArchivoService, corte_por_meses  # noqa: E402
+
+
+def archivar_schema(schema: str, meses: int, lote: int) -> int:
+    corte = corte_por_meses(meses)
+    total = 0
+    while True:
+        with session_for_schema(schema) as session:
+            movidas = ArchivoService(session).archivar_lote(corte, lote)
+        total += movidas
+        if movidas < lote:
+            return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schemas", default=",".join(settings.KNOWN_SCHEMAS))
+    parser.add_argument("--meses", type=int, default=settings.ARCHIVO_MESES)
+    parser.add_argument("--lote", type=int, default=settings.ARCHIVO_LOTE)
+    args = parser.parse_args()
+
+    for schema in filter(None, (s.strip() for s in args.schemas.split(","))):
+        print(f"{schema}: {archivar_schema(schema, args.meses, args.lote)} OCs archivadas")
+
+
+if __name__ == "__main__":
+    main()
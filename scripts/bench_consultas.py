@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Coste por llamada de OrdenCompraService.listar (una página de 1 OC por proveedor y estado, vía índice)
+sobre SQLite en memoria sembrada, para separar la construcción/compilación de la sentencia del resto:
+
+  - Query:      Query construida en cada petición, como antes (compilación cacheada, pero la cache key
+                se recalcula recorriendo la sentencia nueva)
+  - sin cache:  select() del servicio, construido una vez, compilado en cada ejecución (compiled_cache=None)
+  - select:     select() del servicio, construido una vez (cache key memorizada, compilación cacheada)
+
+    python scripts/bench_consultas.py [--repeticiones 2000]
+"""
+import argparse
+import pathlib
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from src.domain import models  # noqa: E402
+from src.domain.models import OrdenCompra  # noqa: E402
+from tests.planes import sembrar  # noqa: E402
+from src.services.orden_compra import OrdenCompraService  # noqa: E402
+
+
+def _listar_query(db, proveedor_id, estado, q, limit, offset):
+    qy = db.query(OrdenCompra).filter(OrdenCompra.proveedor_id == proveedor_id, OrdenCompra.estado == estado)
+    return qy.order_by(OrdenCompra.creado_en.desc()).offset(offset).limit(limit).all()
+
+
+def _medir(fn, repeticiones):
+    fn()  # calentamiento (compila y llena el cache)
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        fn()
+    us = (time.perf_counter() - t0) * 1e6 / repeticiones
+    # asignaciones aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    fn()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return us, pico
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    event.listen(engine, "connect", lambda c, _: c.execute("ATTACH DATABASE ':memory:' AS co"))
+    with engine.connect().execution_options(schema_translate_map={None: "co"}) as conn:
+        models.Base.metadata.create_all(conn)
+        with Session(bind=conn, info={"schema": "co"}) as db:
+            muestra = sembrar(db, "co", proveedores=200, ocs=2000)
+            filtros = (muestra["proveedor_id"], "COMPLETA", None, 1, 0)
+            svc = OrdenCompraService(db)
+            sin_cache = Session(bind=conn.execution_options(compiled_cache=None), info={"schema": "co"})
+            casos = (
+                ("Query", lambda: _listar_query(db, *filtros)),
+                ("sin cache", lambda: OrdenCompraService(sin_cache).listar(*filtros)),
+                ("select", lambda: svc.listar(*filtros)),
+            )
+            print(f"OrdenCompraService.listar, {args.repeticiones} repeticiones")
+            print(f"{'variante':<12}{'us/llamada':>12}{'pico KiB':>10}")
+            for nombre, fn in casos:
+                db.expunge_all()
+                sin_cache.expunge_all()
+                us, pico = _medir(fn, args.repeticiones)
+                print(f"{nombre:<12}{us:>12.1f}{pico / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Coste por llamada de las lecturas calientes por el ORM y por src/services/lecturas.py, hasta el schema de
+respuesta validado (lo que hace FastAPI con response_model), sobre SQLite en memoria sembrada:
+
+  - obtener_oc:               OC con sus items (db.get + relación vs. dos select de Core)
+  - proveedores_por_producto: página de proveedores con términos (sólo Core: la ruta ya no tiene
+                              variante ORM)
+
+La sesión se vacía antes de cada llamada, como en una petición real (sesión nueva por request).
+
+    python scripts/bench_lecturas.py [--repeticiones 2000] [--limit 50]
+"""
+import argparse
+import pathlib
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine, event, func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from src.config import settings  # noqa: E402
+from src.domain import models, schemas  # noqa: E402
+from src.domain.models import ItemOrdenCompra, ProductoProveedor  # noqa: E402
+from tests.planes import sembrar  # noqa: E402
+from src.services import lecturas  # noqa: E402
+from src.services.orden_compra import OrdenCompraService  # noqa: E402
+
+_PAGINA = TypeAdapter(list[schemas.ProveedorParaProductoOut])
+
+
+def _medir(db, fn, repeticiones):
+    def llamada():
+        db.expunge_all()
+        return fn()
+
+    llamada()  # calentamiento (compila y llena el cache)
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        llamada()
+    us = (time.perf_counter() - t0) * 1e6 / repeticiones
+    # asignaciones aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    llamada()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return us, pico
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    settings.LECTURAS_DIRECTAS = frozenset()  # la ruta por el ORM
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    event.listen(engine, "connect", lambda c, _: c.execute("ATTACH DATABASE ':memory:' AS co"))
+    with engine.connect().execution_options(schema_translate_map={None: "co"}) as conn:
+        models.Base.metadata.create_all(conn)
+        with Session(bind=conn, info={"schema": "co"}) as db:
+            sembrar(db, "co", proveedores=2000, productos_por_proveedor=20, ocs=2000, items_por_oc=10)
+            oc_id = db.scalars(select(ItemOrdenCompra.oc_id).limit(1)).one()
+            # el producto con más proveedores, para que la página salga llena
+            producto_id = db.scalars(
+                select(ProductoProveedor.producto_id).group_by(ProductoProveedor.producto_id)
+                .order_by(func.count().desc()).limit(1)
+            ).one()
+            pagina = (producto_id, None, None, args.limit, 0)
+            casos = (
+                ("obtener_oc", "ORM",  # FastAPI valida el response_model desde atributos
+                 lambda: schemas.OrdenCompraOut.model_validate(OrdenCompraService(db).obtener(oc_id), from_attributes=True)),
+                ("obtener_oc", "Core",
+                 lambda: schemas.OrdenCompraOut.model_validate(lecturas.orden_compra(db, oc_id))),
+                ("proveedores_por_producto", "Core",
+                 lambda: _PAGINA.validate_python(lecturas.proveedores_por_producto(db, *pagina))),
+            )
+            filas = len(lecturas.proveedores_por_producto(db, *pagina))
+            print(f"{args.repeticiones} repeticiones; página de {filas} proveedores")
+            print(f"{'ruta':<26}{'variante':<10}{'us/llamada':>12}{'pico KiB':>10}")
+            for ruta, variante, fn in casos:
+                us, pico = _medir(db, fn, args.repeticiones)
+                print(f"{ruta:<26}{variante:<10}{us:>12.1f}{pico / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark de GET /v1/ordenes-compra (200 OCs con items): tamaño del payload y CPU por respuesta
+sin comprimir, con gzip y con brotli. La BD se sustituye por un servicio en memoria.
+
+    python scripts/bench_listados.py [--ocs 200] [--items 20] [--repeticiones 30]
+"""
+import argparse
+import logging
+import pathlib
+import sys
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.app import app  # noqa: E402
+from src.dependencies import get_read_session  # noqa: E402
+
+
+def _ocs(n_ocs: int, n_items: int):
+    ocs = []
+    for i in range(n_ocs):
+        oc_id = uuid.uuid4()
+        items = [
+            SimpleNamespace(
+                id=uuid.uuid4(), oc_id=oc_id, producto_id=uuid.uuid4(), cantidad=5 + j,
+                precio_unitario=Decimal("1234.5000"), impuesto_pct=Decimal("19.00"),
+                descuento_pct=Decimal("2.50"), sku_proveedor=f"SKU-{i:04d}-{j:03d}",
+            )
+            for j in range(n_items)
+        ]
+        ocs.append(SimpleNamespace(
+            id=oc_id, codigo=f"OC-2025-{i:06d}", proveedor_id=uuid.uuid4(), pedido_ref=None,
+            estado="ABIERTA", subtotal=Decimal("123456.7800"), impuesto_total=Decimal("23456.7800"),
+            total=Decimal("146913.5600"), moneda="COP", notas="Reposición semanal",
+            actualizado_en=datetime(2025, 1, 1), items=items,
+        ))
+    return ocs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ocs", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--repeticiones", type=int, default=30)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    ocs = _ocs(args.ocs, args.items)
+    app.dependency_overrides[get_read_session] = lambda: MagicMock()
+    url = f"/v1/ordenes-compra?limit={min(args.ocs, 200)}"
+
+    print(f"GET {url}  ({args.ocs} OCs x {args.items} items, {args.repeticiones} repeticiones)")
+    print(f"{'encoding':<10}{'bytes':>12}{'ratio':>8}{'cpu ms/resp':>14}{'wall ms/resp':>14}")
+    with patch("src.routes.ordenes_compra.OrdenCompraService.listar", return_value=ocs), TestClient(app) as client:
+        base = None
+        for encoding in ("identity", "gzip", "br"):
+            headers = {"Accept-Encoding": encoding}
+            r = client.get(url, headers=headers)  # calentamiento
+            size = int(r.headers.get("content-length", len(r.content)))
+            base = base or size
+            cpu0, wall0 = time.process_time(), time.perf_counter()
+            for _ in range(args.repeticiones):
+                client.get(url, headers=headers)
+            cpu = (time.process_time() - cpu0) * 1000 / args.repeticiones
+            wall = (time.perf_counter() - wall0) * 1000 / args.repeticiones
+            print(f"{r.headers.get('content-encoding', 'identity'):<10}{size:>12}{base / size:>8.1f}{cpu:>14.2f}{wall:>14.2f}")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
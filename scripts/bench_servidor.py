@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Rendimiento del servidor de producción (gunicorn + workers uvicorn, src/servidor.py) con distinto
+número de workers: levanta el servidor para cada valor, lo carga durante `--duracion` segundos
+desde procesos cliente aparte (httpx, conexiones persistentes) y reporta peticiones/s y latencias.
+Al final de cada ronda envía SIGTERM y mide cuánto tarda el apagado ordenado.
+
+    python scripts/bench_servidor.py [--workers 1,4] [--ruta /health] [--duracion 10] [--concurrencia 64]
+
+Sin Postgres sólo responden las rutas que no usan la BD (/health); con DB_HOST apuntando a una BD
+sembrada (ver tests/planes.py) sirve cualquier ruta, p. ej. --ruta "/v1/proveedores?limit=50".
+Los trabajos en segundo plano y los webhooks se desactivan para no competir por CPU.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import pathlib
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+from src.servidor import cpus_disponibles  # noqa: E402
+
+
+def _cliente(url: str, conexiones: int, hasta: float, cola: multiprocessing.Queue) -> None:
+    import httpx
+
+    async def bucle(client, latencias, errores):
+        while time.monotonic() < hasta:
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(url)
+                if r.status_code >= 500:
+                    errores[0] += 1
+                    continue
+            except httpx.HTTPError:
+                errores[0] += 1
+                continue
+            latencias.append(time.perf_counter() - t0)
+
+    async def main():
+        latencias, errores = [], [0]
+        limites = httpx.Limits(max_connections=conexiones, max_keepalive_connections=conexiones)
+        async with httpx.AsyncClient(limits=limites, timeout=10) as client:
+            await asyncio.gather(*(bucle(client, latencias, errores) for _ in range(conexiones)))
+        cola.put((latencias, errores[0]))
+
+    asyncio.run(main())
+
+
+def _esperar_listo(base: str, proc: subprocess.Popen, timeout_s: float = 30) -> None:
+    import httpx
+
+    limite = time.monotonic() + timeout_s
+    while time.monotonic() < limite:
+        if proc.poll() is not None:
+            raise RuntimeError(f"el servidor terminó al arrancar (código {proc.returncode})")
+        try:
+            if httpx.get(f"{base}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("el servidor no respondió a /health")
+
+
+def _ronda(workers: int, args) -> dict:
+    base = f"http://127.0.0.1:{args.puerto}"
+    env = {
+        **os.environ,
+        "PORT": str(args.puerto),
+        "WEB_WORKERS": str(workers),
+        "TRABAJOS_HABILITADOS": "false",
+        "WEBHOOKS_HABILITADOS": "false",
+        "ADMISION_HABILITADA": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "python:src.servidor", "src.app:app"],
+        cwd=RAIZ, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _esperar_listo(base, proc)
+        cola = multiprocessing.Queue()
+        hasta = time.monotonic() + args.duracion
+        por_cliente = max(1, args.concurrencia // args.clientes)
+        clientes = [
+            multiprocessing.Process(target=_cliente, args=(base + args.ruta, por_cliente, hasta, cola))
+            for _ in range(args.clientes)
+        ]
+        for c in clientes:
+            c.start()
+        resultados = [cola.get() for _ in clientes]
+        for c in clientes:
+            c.join()
+    finally:
+        t0 = time.perf_counter()
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+        apagado = time.perf_counter() - t0
+
+    latencias = sorted(lat for lats, _ in resultados for lat in lats)
+    if not latencias:
+        raise RuntimeError(f"ninguna respuesta correcta de {args.ruta}")
+    cuantiles = statistics.quantiles(latencias, n=100)
+    return {
+        "rps": len(latencias) / args.duracion,
+        "p50_ms": cuantiles[49] * 1000,
+        "p99_ms": cuantiles[98] * 1000,
+        "errores": sum(e for _, e in resultados),
+        "apagado_s": apagado,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=f"1,{cpus_disponibles()}", help="lista de workers a comparar")
+    parser.add_argument("--ruta", default="/health")
+    parser.add_argument("--duracion", type=float, default=10)
+    parser.add_argument("--concurrencia", type=int, default=64, help="conexiones simultáneas en total")
+    parser.add_argument("--clientes", type=int, default=2, help="procesos generadores de carga")
+    parser.add_argument("--puerto", type=int, default=8099)
+    args = parser.parse_args()
+
+    valores = list(dict.fromkeys(int(w) for w in args.workers.split(",")))
+    print(f"{args.ruta}: {args.duracion:.0f} s por ronda, {args.concurrencia} conexiones; {cpus_disponibles()} CPUs")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errores':>9}{'apagado s':>11}")
+    for w in valores:
+        r = _ronda(w, args)
+        print(f"{w:>8}{r['rps']:>10.0f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['errores']:>9}{r['apagado_s']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
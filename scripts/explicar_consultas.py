@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Imprime el EXPLAIN de cada consulta de las rutas de listado (tests/planes.py) sobre
+un schema temporal sembrado con datos sintéticos, y marca las que recorren tablas grandes.
+El schema se borra al terminar.
+
+    python scripts/explicar_consultas.py [--schema planes_tmp] [--proveedores 20000] [--ocs 50000]
+"""
+import argparse
+import logging
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from src.domain import models  # noqa: E402
+from src.infrastructure.infrastructure import engine  # noqa: E402
+from tests.planes import CONSULTAS_RUTAS, TABLAS_GRANDES, planes_de_rutas, sembrar  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schema", default="planes_tmp")
+    parser.add_argument("--proveedores", type=int, default=20000)
+    parser.add_argument("--productos-por-proveedor", type=int, default=10)
+    parser.add_argument("--ocs", type=int, default=50000)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with engine.connect() as conn:
+        conn.execute(text(f'CREATE SCHEMA "{args.schema}"'))
+        conn.commit()
+    regresiones = 0
+    try:
+        with engine.connect().execution_options(schema_translate_map={None: args.schema}) as conn:
+            models.Base.metadata.create_all(conn)
+            conn.commit()
+            with Session(bind=conn, info={"schema": args.schema}, expire_on_commit=False) as session:
+                muestra = sembrar(session, args.schema, args.proveedores, args.productos_por_proveedor, args.ocs)
+                planes = planes_de_rutas(session, muestra)
+        for consulta in CONSULTAS_RUTAS:
+            print(f"== {consulta.nombre}: GET {consulta.ruta}")
+            # las cargas de items por OC se repiten: basta un plan por SQL distinto
+            for plan in {p.sql: p for p in planes[consulta.nombre]}.values():
+                recorridas = plan.secuenciales & set(TABLAS_GRANDES)
+                regresiones += bool(recorridas)
+                marca = f"  !! recorre {', '.join(sorted(recorridas))}" if recorridas else ""
+                print(f"   índices: {', '.join(sorted(plan.indices)) or '-'}{marca}")
+    finally:
+        with engine.connect() as conn:
+            conn.execute(text(f'DROP SCHEMA IF EXISTS "{args.schema}" CASCADE'))
+            conn.commit()
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
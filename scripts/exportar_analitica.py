@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Exportación incremental de proveedor / orden_compra / item_orden_compra / orden_compra_eliminada
+a analítica (Parquet en GCS + load job a BigQuery; sin GCS_BUCKET/BQ_DATASET escribe en EXPORT_DIR). Pensado para
+ejecutarse periódicamente (Cloud Scheduler / Cloud Run job).
+
+    python scripts/exportar_analitica.py [--schemas co,ec]
+"""
+import argparse
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from src.config import settings  # noqa: E402
+from src.services.exportacion import exportador_configurado  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schemas", default=",".join(settings.KNOWN_SCHEMAS))
+    args = parser.parse_args()
+
+    exportador = exportador_configurado()
+    for schema in filter(None, (s.strip() for s in args.schemas.split(","))):
+        for tabla, n in exportador.exportar(schema).items():
+            print(f"{schema}.{tabla}: {n} filas exportadas")
+
+
+if __name__ == "__main__":
+    main()
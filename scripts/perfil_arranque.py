@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Perfil de arranque: tiempo de `import src.app` (python -X importtime) agregado por paquete
+y los módulos más costosos, más el tiempo de entrar al lifespan.
+
+    python scripts/perfil_arranque.py [--top 20]
+"""
+import argparse
+import pathlib
+import subprocess
+import sys
+from collections import defaultdict
+
+RAIZ = pathlib.Path(__file__).resolve().parents[1]
+
+_LIFESPAN = """
+import asyncio, time
+t0 = time.perf_counter()
+from src.app import app, lifespan
+t1 = time.perf_counter()
+async def main():
+    async with lifespan(app):
+        t2 = time.perf_counter()
+    print(f"import src.app: {(t1 - t0) * 1000:.1f} ms")
+    print(f"lifespan hasta servir: {(t2 - t1) * 1000:.1f} ms")
+asyncio.run(main())
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.app"],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    modulos = []
+    for linea in proc.stderr.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        if not propio.strip().isdigit():  # cabecera
+            continue
+        modulos.append((nombre.strip(), int(propio), int(acumulado)))
+
+    por_paquete = defaultdict(int)
+    for nombre, propio, _ in modulos:
+        por_paquete[nombre.split(".")[0]] += propio
+    total = sum(propio for _, propio, _ in modulos)
+
+    print(f"Total imports: {total / 1000:.1f} ms ({len(modulos)} módulos)\n")
+    print("Por paquete (tiempo propio):")
+    for paquete, us in sorted(por_paquete.items(), key=lambda x: -x[1])[: args.top]:
+        print(f"  {paquete:<30}{us / 1000:>10.1f} ms")
+    print("\nMódulos más costosos (acumulado):")
+    for nombre, _, acumulado in sorted(modulos, key=lambda m: -m[2])[: args.top]:
+        print(f"  {nombre:<50}{acumulado / 1000:>10.1f} ms")
+
+    cargados = subprocess.run(
+        [sys.executable, "-c", "import sys, src.app; print(' '.join(m for m in ('redis', 'google.cloud') if m in sys.modules))"],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    print(f"\nClientes opcionales importados al arrancar: {cargados or 'ninguno'}")
+
+    print()
+    subprocess.run([sys.executable, "-c", _LIFESPAN], cwd=RAIZ, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Reconstruye pendiente_producto (cantidad en OCs ABIERTA/ENVIADA/PARCIAL por producto) desde las
+órdenes. Necesario una vez al desplegar el resumen, antes de dar tráfico a la versión nueva (las
+OCs abiertas que ya existían no están en el resumen); después lo mantiene OrdenCompraService.
+Se puede volver a correr con tráfico (reparación): bloquea las escrituras del resumen mientras
+lo reconstruye.
+
+    python scripts/recalcular_pendientes.py [--schemas co,ec]
+"""
+import argparse
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from src.config import settings  # noqa: E402
+from src.infrastructure.infrastructure import session_for_schema  # noqa: E402
+from src.services.orden_compra import OrdenCompraService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schemas", default=",".join(settings.KNOWN_SCHEMAS))
+    args = parser.parse_args()
+
+    for schema in filter(None, (s.strip() for s in args.schemas.split(","))):
+        with session_for_schema(schema) as session:
+            OrdenCompraService(session).recalcular_pendientes()
+        print(f"{schema}: pendiente_producto recalculado")
+
+
+if __name__ == "__main__":
+    main()
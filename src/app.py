@@ -3,49 +3,90 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
-import logging, sys
 
-from .domain import models
-from sqlalchemy import inspect
-from src.infrastructure.infrastructure import engine
 from .config import settings
+from .infrastructure.esquemas import estado_esquemas
+from .infrastructure.infrastructure import cerrar_conexiones
+from .infrastructure.logs import configurar_logging
+from .middleware.admision import AdmisionMiddleware
+from .middleware.compresion import CompresionMiddleware
+from .middleware.contexto_log import ContextoLogMiddleware
+from .middleware.latencia import LatenciaMiddleware
+from .respuestas import JSONRapida
 from .routes.health import router as health_router
 from .routes.proveedores import router as proveedor_router
 from .routes.ordenes_compra import router as oc_router
+from .routes.trabajos import router as trabajos_router
+from .routes.tasas_cambio import router as tasas_router
+from .routes.notificaciones import router as notificaciones_router
+from .services.notificaciones import despachador_notificaciones
+from .services.trabajos import ejecutor_trabajos
 
 
 
 log = logging.getLogger(__name__)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
+configurar_logging(
+    nivel=settings.LOG_LEVEL,
+    formato=settings.LOG_FORMATO,
+    muestreo=settings.LOG_MUESTREO,
+    cola_max=settings.LOG_COLA_MAX,
+    proyecto_gcp=settings.GCP_PROJECT,
+    servicio=settings.SERVICE_NAME,
 )
 
-KNOWN_SCHEMAS = ["co","ec","mx","pe"]  # o desde ENV
+KNOWN_SCHEMAS = settings.KNOWN_SCHEMAS
 
 @asynccontextmanager
 async def lifespan(app):
-    for schema in KNOWN_SCHEMAS:
-        try:
-            eng = engine.execution_options(schema_translate_map={None: schema})
-            models.Base.metadata.create_all(bind=eng)
-            inspector = inspect(eng)
-            tables = inspector.get_table_names(schema=schema)
-            log.info(f"✅ {len(tables)} tablas creadas/verificadas en schema '{schema}': {tables}")
-        except Exception as e:
-            log.error(f"❌ Error creando tablas en schema {schema}: {e}")
+    # la verificación de tablas (DDL) no bloquea el arranque: /ready responde 503 hasta completarla
+    if settings.SCHEMA_INIT_BACKGROUND:
+        estado_esquemas.iniciar_en_segundo_plano()
+    else:
+        estado_esquemas.ejecutar()
+    if settings.WEB_FONDO and settings.TRABAJOS_HABILITADOS:
+        # retoma los trabajos interrumpidos en cuanto las tablas de cada schema estén verificadas
+        ejecutor_trabajos.iniciar(KNOWN_SCHEMAS, listo=lambda schema: schema not in estado_esquemas.pendientes)
+    if settings.WEB_FONDO and settings.WEBHOOKS_HABILITADOS:
+        despachador_notificaciones.iniciar(KNOWN_SCHEMAS, listo=lambda schema: schema not in estado_esquemas.pendientes)
     yield
+    await despachador_notificaciones.detener()
+    ejecutor_trabajos.detener()
+    estado_esquemas.detener()
+    # el servidor ya esperó las peticiones en curso: sus transacciones terminaron y las conexiones están libres
+    cerrar_conexiones()
     log.info("🛑 Finalizando aplicación ms-compras")
 
 app = FastAPI(
     title=settings.SERVICE_NAME,
     version=settings.VERSION,
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Default(...) conserva la serialización directa de FastAPI (pydantic -> bytes) en las rutas
+    # con response_model; JSONRapida (orjson) cubre el resto y las versiones de FastAPI sin ese camino
+    default_response_class=Default(JSONRapida),
 )
 
+if settings.ADMISION_HABILITADA:
+    app.add_middleware(
+        AdmisionMiddleware,
+        rps=settings.RATE_LIMIT_RPS,
+        burst=settings.RATE_LIMIT_BURST,
+        max_concurrencia=settings.TENANT_MAX_CONCURRENCIA,
+        espera_pool_max_ms=settings.POOL_ESPERA_MAX_MS,
+    )
+
+app.add_middleware(LatenciaMiddleware)
+
+app.add_middleware(
+    CompresionMiddleware,
+    minimo_bytes=settings.COMPRESION_MIN_BYTES,
+    nivel_gzip=settings.COMPRESION_NIVEL_GZIP,
+    calidad_brotli=settings.COMPRESION_CALIDAD_BROTLI,
+)
+
+# por fuera de la admisión: sus 429/503 (y los preflight) también llevan las cabeceras CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -54,6 +95,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# el más externo: el contexto de logging cubre también los rechazos de admisión
+app.add_middleware(ContextoLogMiddleware)
+
 app.include_router(health_router)
 app.include_router(proveedor_router)
 app.include_router(oc_router)
+app.include_router(trabajos_router)
+app.include_router(tasas_router)
+app.include_router(notificaciones_router)
@@ -7,6 +7,10 @@ class Settings:
     SERVICE_NAME = os.getenv("SERVICE_NAME", "ms-compras")
     VERSION = os.getenv("VERSION", "0.1.0")
     REGION = os.getenv("REGION", "us-central1")
+    GCP_PROJECT = os.getenv("GCP_PROJECT", "")
+    PUBSUB_TOPIC = os.getenv("PUBSUB_TOPIC", "")
+    BQ_DATASET = os.getenv("BQ_DATASET", "")
+    GCS_BUCKET = os.getenv("GCS_BUCKET", "")
 
     DB_USER = os.getenv("DB_USER", "postgres")
     DB_PASSWORD = os.getenv("DB_PASS", "postgres")
@@ -16,12 +20,122 @@ class Settings:
 
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT = os.getenv("REDIS_PORT", "6379")
+    REDIS_TIMEOUT_S = float(os.getenv("REDIS_TIMEOUT_S", "0.25"))
+    # tras un fallo de Redis, no se reintenta durante esta ventana (se usan los fallbacks locales)
+    REDIS_RETRY_S = float(os.getenv("REDIS_RETRY_S", "5"))
 
     SQLALCHEMY_DATABASE_URI = (
     f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
 
+    # conexiones a Postgres de toda la instancia: se reservan las de trabajos y webhooks y cada
+    # worker del servidor recibe una parte del resto (ver infrastructure.opciones_pool)
+    DB_POOL_TOTAL = int(os.getenv("DB_POOL_TOTAL", "10"))
+    DB_MAX_OVERFLOW_TOTAL = int(os.getenv("DB_MAX_OVERFLOW_TOTAL", "10"))
+    DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "30"))
+
+    # servidor de producción (gunicorn + workers uvicorn, src/servidor.py); 0 workers = uno por CPU disponible
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", "0"))
+    WEB_PRELOAD = os.getenv("WEB_PRELOAD", "true").lower() == "true"
+    # espera por las peticiones en curso tras SIGTERM (Cloud Run mata el contenedor a los 10 s)
+    WEB_GRACEFUL_TIMEOUT_S = float(os.getenv("WEB_GRACEFUL_TIMEOUT_S", "8"))
+    WEB_KEEPALIVE_S = float(os.getenv("WEB_KEEPALIVE_S", "5"))
+    # este proceso corre los trabajos y el despachador de webhooks; con gunicorn sólo uno de los
+    # workers (lo decide src/servidor.py al crearlos)
+    WEB_FONDO = True
+
+    # réplicas de lectura opcionales: "host[:puerto],host[:puerto]" (mismas credenciales y BD)
+    DB_REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+    SQLALCHEMY_REPLICA_URIS = [
+        f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{h if ':' in h else f'{h}:{DB_PORT}'}/{DB_NAME}"
+        for h in DB_REPLICA_HOSTS
+    ]
+    REPLICA_MAX_LAG_S = float(os.getenv("REPLICA_MAX_LAG_S", "5"))
+    REPLICA_LAG_CHECK_S = float(os.getenv("REPLICA_LAG_CHECK_S", "5"))
+    # tras una escritura, las lecturas del cliente van al primario durante esta ventana
+    REPLICA_STICKY_S = int(os.getenv("REPLICA_STICKY_S", "5"))
+    READ_AFTER_WRITE_COOKIE = os.getenv("READ_AFTER_WRITE_COOKIE", "compras_rw")
+    READ_AFTER_WRITE_HEADER = os.getenv("READ_AFTER_WRITE_HEADER", "X-Read-After-Write")
+    # sesiones de lectura en AUTOCOMMIT (sin BEGIN/COMMIT); false = transacción READ ONLY
+    LECTURAS_AUTOCOMMIT = os.getenv("LECTURAS_AUTOCOMMIT", "true").lower() == "true"
+
+    # logging estructurado (JSON a stdout desde un hilo aparte); muestreo: "DEBUG=0.01,INFO=0.1"
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMATO = os.getenv("LOG_FORMATO", "json")
+    LOG_MUESTREO = os.getenv("LOG_MUESTREO", "")
+    LOG_COLA_MAX = int(os.getenv("LOG_COLA_MAX", "10000"))
+
     DEFAULT_SCHEMA = os.getenv("DEFAULT_SCHEMA", "co")
+    KNOWN_SCHEMAS = [s.strip() for s in os.getenv("KNOWN_SCHEMAS", "co,ec,mx,pe").split(",") if s.strip()]
+    # verificación/creación de tablas en segundo plano: la instancia atiende mientras tanto (ver /ready)
+    SCHEMA_INIT_BACKGROUND = os.getenv("SCHEMA_INIT_BACKGROUND", "true").lower() == "true"
+    SCHEMA_INIT_RETRY_S = float(os.getenv("SCHEMA_INIT_RETRY_S", "10"))
+    # las sondas de /ready (BD, Redis, schemas) se cachean este tiempo
+    READINESS_CACHE_S = float(os.getenv("READINESS_CACHE_S", "5"))
     COUNTRY_HEADER = os.getenv("COUNTRY_HEADER", "X-Country")
+    # quién hace el cambio (lo fija el gateway); se guarda en la auditoría
+    ACTOR_HEADER = os.getenv("ACTOR_HEADER", "X-Usuario")
+
+    # compresión de respuestas (gzip/brotli negociado)
+    COMPRESION_MIN_BYTES = int(os.getenv("COMPRESION_MIN_BYTES", "1024"))
+    COMPRESION_NIVEL_GZIP = int(os.getenv("COMPRESION_NIVEL_GZIP", "6"))
+    COMPRESION_CALIDAD_BROTLI = int(os.getenv("COMPRESION_CALIDAD_BROTLI", "4"))
+
+    # control de admisión por tenant (rate limit, concurrencia, descarte por pool saturado)
+    ADMISION_HABILITADA = os.getenv("ADMISION_HABILITADA", "true").lower() == "true"
+    RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "50"))
+    RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "100"))
+    TENANT_MAX_CONCURRENCIA = int(os.getenv("TENANT_MAX_CONCURRENCIA", "32"))
+    POOL_ESPERA_MAX_MS = float(os.getenv("POOL_ESPERA_MAX_MS", "250"))
+
+    # snapshot en memoria del catálogo proveedor-producto (validación de OCs)
+    CATALOGO_CACHE_MAX_PROVEEDORES = int(os.getenv("CATALOGO_CACHE_MAX_PROVEEDORES", "2000"))
+    CATALOGO_CACHE_TTL_S = float(os.getenv("CATALOGO_CACHE_TTL_S", "300"))
+
+    # normalización de montos: moneda base y vigencia en memoria de la tabla de tasas de cambio
+    MONEDA_BASE = os.getenv("MONEDA_BASE", "USD").upper()
+    TASAS_CACHE_TTL_S = float(os.getenv("TASAS_CACHE_TTL_S", "300"))
+
+    # rutas de lectura servidas con Core, sin ORM (src/services/lecturas.py); vacío = todas por ORM
+    # (proveedores_por_producto va siempre por Core)
+    LECTURAS_DIRECTAS = frozenset(
+        s.strip() for s in os.getenv("LECTURAS_DIRECTAS", "obtener_oc,obtener_proveedor").split(",")
+        if s.strip()
+    )
+
+    # importación masiva de proveedores: filas validadas e insertadas por lote
+    IMPORTACION_LOTE = int(os.getenv("IMPORTACION_LOTE", "1000"))
+
+    # trabajos en segundo plano (recálculos por lotes con checkpoint; se reanudan al arrancar)
+    TRABAJOS_HABILITADOS = os.getenv("TRABAJOS_HABILITADOS", "true").lower() == "true"
+    TRABAJOS_WORKERS = int(os.getenv("TRABAJOS_WORKERS", "2"))
+    TRABAJOS_LOTE = int(os.getenv("TRABAJOS_LOTE", "200"))
+    TRABAJOS_LEASE_S = float(os.getenv("TRABAJOS_LEASE_S", "120"))
+    TRABAJOS_SONDEO_S = float(os.getenv("TRABAJOS_SONDEO_S", "10"))   # cada cuánto se buscan trabajos encolados
+
+    # notificaciones (webhooks) a proveedores: cola en BD despachada con asyncio (services/notificaciones.py)
+    WEBHOOKS_HABILITADOS = os.getenv("WEBHOOKS_HABILITADOS", "true").lower() == "true"
+    WEBHOOK_SECRETO = os.getenv("WEBHOOK_SECRETO", "")          # firma HMAC-SHA256 del cuerpo (vacío = sin firma)
+    WEBHOOK_TIMEOUT_S = float(os.getenv("WEBHOOK_TIMEOUT_S", "5"))
+    WEBHOOK_LOTE = int(os.getenv("WEBHOOK_LOTE", "100"))
+    WEBHOOK_EVENTOS_POR_ENVIO = int(os.getenv("WEBHOOK_EVENTOS_POR_ENVIO", "20"))
+    WEBHOOK_CONCURRENCIA = int(os.getenv("WEBHOOK_CONCURRENCIA", "20"))
+    WEBHOOK_CONCURRENCIA_PROVEEDOR = int(os.getenv("WEBHOOK_CONCURRENCIA_PROVEEDOR", "2"))
+    WEBHOOK_MAX_INTENTOS = int(os.getenv("WEBHOOK_MAX_INTENTOS", "8"))
+    WEBHOOK_BACKOFF_BASE_S = float(os.getenv("WEBHOOK_BACKOFF_BASE_S", "10"))
+    WEBHOOK_BACKOFF_MAX_S = float(os.getenv("WEBHOOK_BACKOFF_MAX_S", "3600"))
+    WEBHOOK_LEASE_S = float(os.getenv("WEBHOOK_LEASE_S", "60"))
+    WEBHOOK_INTERVALO_S = float(os.getenv("WEBHOOK_INTERVALO_S", "5"))
+    # al enviar se vuelve a exigir https hacia un host público; "false" sólo para receptores locales de prueba
+    WEBHOOK_SOLO_PUBLICOS = os.getenv("WEBHOOK_SOLO_PUBLICOS", "true").lower() == "true"
+
+    # exportación incremental a analítica (GCS + BigQuery; sin bucket/dataset, archivos en EXPORT_DIR)
+    EXPORT_DIR = os.getenv("EXPORT_DIR", "/tmp/ms-compras-export")
+    EXPORT_LOTE = int(os.getenv("EXPORT_LOTE", "5000"))
+    EXPORT_MARGEN_S = float(os.getenv("EXPORT_MARGEN_S", "300"))
+
+    # archivo de OCs COMPLETA/CANCELADA sin cambios hace más de ARCHIVO_MESES (scripts/archivar_ordenes.py)
+    ARCHIVO_MESES = int(os.getenv("ARCHIVO_MESES", "12"))
+    ARCHIVO_LOTE = int(os.getenv("ARCHIVO_LOTE", "500"))
 
 settings = Settings()
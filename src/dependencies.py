@@ -1,9 +1,44 @@
-from fastapi import Header
+import time
+from typing import Optional
+
+from fastapi import Header, Request, Response
 from src.config import settings
 from src.infrastructure.infrastructure import session_for_schema
 
 
-def get_session(X_Country: str | None = Header(default=None, alias=settings.COUNTRY_HEADER)):
-    schema = (X_Country or settings.DEFAULT_SCHEMA).strip().lower()
+def resolver_schema(x_country: Optional[str]) -> str:
+    """Schema (tenant) para el valor del header de país; DEFAULT_SCHEMA si no llega."""
+    return (x_country or settings.DEFAULT_SCHEMA).strip().lower()
+
+
+def _escritura_reciente(request: Request) -> bool:
+    """True si el cliente escribió hace menos de REPLICA_STICKY_S (cookie o header devuelto por el cliente)."""
+    marca = request.cookies.get(settings.READ_AFTER_WRITE_COOKIE) or request.headers.get(settings.READ_AFTER_WRITE_HEADER)
+    try:
+        return marca is not None and float(marca) > time.time()
+    except ValueError:
+        return False
+
+
+def get_session(response: Response, X_Country: str | None = Header(default=None, alias=settings.COUNTRY_HEADER)):
+    """Sesión de lectura-escritura sobre el primario."""
+    schema = resolver_schema(X_Country)
+    # read-your-writes: las lecturas de este cliente irán al primario durante la ventana
+    hasta = f"{time.time() + settings.REPLICA_STICKY_S:.3f}"
+    response.set_cookie(settings.READ_AFTER_WRITE_COOKIE, hasta, max_age=settings.REPLICA_STICKY_S, httponly=True)
+    response.headers[settings.READ_AFTER_WRITE_HEADER] = hasta
     with session_for_schema(schema) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+def get_read_session(request: Request, X_Country: str | None = Header(default=None, alias=settings.COUNTRY_HEADER)):
+    """Sesión de sólo lectura: réplica si hay una al día y el cliente no acaba de escribir; si no, primario."""
+    schema = resolver_schema(X_Country)
+    with session_for_schema(schema, read_only=not _escritura_reciente(request)) as session:
+        yield session
+
+
+def get_primary_read_session(X_Country: str | None = Header(default=None, alias=settings.COUNTRY_HEADER)):
+    """Sesión de sólo lectura sobre el primario, para datos que en una réplica llegarían atrasados."""
+    with session_for_schema(resolver_schema(X_Country), read_only=True, usar_replica=False) as session:
+        yield session
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy import Column, String, DateTime, Boolean, Numeric, Integer, ForeignKey, UniqueConstraint, Index, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Boolean, Numeric, Integer, BigInteger, ForeignKey, UniqueConstraint, Index, CheckConstraint, JSON, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from datetime import datetime
 import uuid
 
@@ -26,19 +26,30 @@ class Proveedor(Base):
     telefono = Column(String(64), nullable=True)
     email = Column(String(255), nullable=True)
     pagina_web = Column(String(255), nullable=True)
+    # si está definido, se le notifican las OCs enviadas (services/notificaciones.py)
+    webhook_url = Column(String(500), nullable=True)
 
     # estado
     activo = Column(Boolean, nullable=False, default=True)
+    eliminado_en = Column(DateTime, nullable=True)           # borrado lógico (NULL = vigente)
 
     # auditoría
     creado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
     actualizado_en = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    # relaciones
-    productos = relationship("ProductoProveedor", back_populates="proveedor", cascade="all, delete-orphan")
-    ordenes_compra = relationship("OrdenCompra", back_populates="proveedor", cascade="all, delete-orphan")
+    # relaciones: los borrados los resuelve la BD (ON DELETE CASCADE / RESTRICT), sin cargar los hijos
+    productos = relationship("ProductoProveedor", back_populates="proveedor", cascade="all, delete-orphan", passive_deletes=True)
+    ordenes_compra = relationship("OrdenCompra", back_populates="proveedor", cascade="save-update, merge", passive_deletes="all")
     __table_args__ = (
         UniqueConstraint("documento", "pais", name="uq_proveedor_documento_pais"),
+        # listar_proveedores: vigentes, por país y/o activos, ordenados por nombre
+        Index("ix_proveedor_nombre", "nombre",
+              postgresql_where=text("eliminado_en IS NULL"), sqlite_where=text("eliminado_en IS NULL")),
+        Index("ix_proveedor_pais_nombre", "pais", "nombre",
+              postgresql_where=text("eliminado_en IS NULL"), sqlite_where=text("eliminado_en IS NULL")),
+        Index("ix_proveedor_activos_nombre", "nombre",
+              postgresql_where=text("activo = true AND eliminado_en IS NULL"),
+              sqlite_where=text("activo = 1 AND eliminado_en IS NULL")),
     )
 
 
@@ -63,6 +74,13 @@ class ProductoProveedor(Base):
 
     __table_args__ = (
         UniqueConstraint("proveedor_id", "sku_proveedor", name="uq_cat_prov_sku"),
+        # listar_productos_de_proveedor(activo=true); sin filtro basta la PK (proveedor_id, producto_id)
+        Index("ix_cat_prov_activos", "proveedor_id", "producto_id",
+              postgresql_where=text("activo = true"), sqlite_where=text("activo = 1")),
+        # listar_proveedores_por_producto
+        Index("ix_cat_producto", "producto_id", "proveedor_id"),
+        Index("ix_cat_producto_activos", "producto_id", "proveedor_id",
+              postgresql_where=text("activo = true"), sqlite_where=text("activo = 1")),
     )
 
 class OrdenCompra(Base):
@@ -90,6 +108,10 @@ class OrdenCompra(Base):
     moneda = Column(String(3), nullable=True)   # opcional
     notas = Column(String(500), nullable=True)
 
+    # normalización a MONEDA_BASE con la tasa vigente al crear la orden (NULL si no había tasa)
+    tasa_cambio = Column(Numeric(20, 10), nullable=True)
+    total_base = Column(Numeric(18, 4), nullable=True)
+
     creado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
     actualizado_en = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -101,6 +123,9 @@ class OrdenCompra(Base):
             name="ck_oc_estado"
         ),
         Index("ix_oc_proveedor_estado", "proveedor_id", "estado"),
+        # OrdenCompraService.listar: por estado o sin filtro, ordenado por creado_en desc
+        Index("ix_oc_estado_creado", "estado", "creado_en"),
+        Index("ix_oc_creado", "creado_en"),
     )
 
 
@@ -126,4 +151,205 @@ class ItemOrdenCompra(Base):
     __table_args__ = (
         CheckConstraint("cantidad > 0", name="ck_item_oc_cantidad_pos"),
         Index("ix_item_oc_producto", "producto_id"),
+        # carga de los items de cada OC (relación OrdenCompra.items, borrado en cascada)
+        Index("ix_item_oc_oc", "oc_id"),
+    )
+
+
+# ---------------------------------------------------------------------
+# Resumen: cantidad en órdenes ABIERTA/ENVIADA/PARCIAL por producto.
+# Lo mantiene OrdenCompraService en cada cambio (consulta O(1) por producto).
+# ---------------------------------------------------------------------
+class PendienteProducto(Base):
+    __tablename__ = "pendiente_producto"
+
+    producto_id = Column(UUID(as_uuid=True), primary_key=True)
+    cantidad = Column(Integer, nullable=False, default=0)
+    actualizado_en = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+# ---------------------------------------------------------------------
+# Tasas de cambio a MONEDA_BASE con fecha de vigencia: rige la última
+# con vigente_desde <= fecha. Se consultan desde un cache en memoria.
+# ---------------------------------------------------------------------
+class TasaCambio(Base):
+    __tablename__ = "tasa_cambio"
+
+    moneda = Column(String(3), primary_key=True)
+    vigente_desde = Column(DateTime, primary_key=True)
+    tasa = Column(Numeric(20, 10), nullable=False)   # unidades de MONEDA_BASE por 1 unidad de `moneda`
+    creado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("tasa > 0", name="ck_tasa_cambio_pos"),
+    )
+
+
+# ---------------------------------------------------------------------
+# Archivo: OCs COMPLETA/CANCELADA antiguas (ver services/archivo.py).
+# Mismas columnas que las tablas vivas, sin sus índices de consulta.
+# ---------------------------------------------------------------------
+class OrdenCompraArchivo(Base):
+    __tablename__ = "orden_compra_archivo"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    codigo = Column(String(32), unique=True, nullable=False, index=True)
+    proveedor_id = Column(UUID(as_uuid=True), nullable=False)
+    pedido_ref = Column(UUID(as_uuid=True), nullable=True)
+    estado = Column(String(16), nullable=False)
+
+    subtotal = Column(Numeric(14, 4), nullable=True)
+    impuesto_total = Column(Numeric(14, 4), nullable=True)
+    total = Column(Numeric(14, 4), nullable=True)
+
+    moneda = Column(String(3), nullable=True)
+    notas = Column(String(500), nullable=True)
+
+    tasa_cambio = Column(Numeric(20, 10), nullable=True)
+    total_base = Column(Numeric(18, 4), nullable=True)
+
+    creado_en = Column(DateTime, nullable=False)
+    actualizado_en = Column(DateTime, nullable=False)
+    archivado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    items = relationship("ItemOrdenCompraArchivo", back_populates="orden_compra", cascade="all, delete-orphan")
+
+
+class ItemOrdenCompraArchivo(Base):
+    __tablename__ = "item_orden_compra_archivo"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    oc_id = Column(UUID(as_uuid=True), ForeignKey("orden_compra_archivo.id", ondelete="CASCADE"), nullable=False, index=True)
+    producto_id = Column(UUID(as_uuid=True), nullable=False)
+    sku_proveedor = Column(String(128), nullable=True)
+
+    cantidad = Column(Integer, nullable=False)
+    precio_unitario = Column(Numeric(14, 4), nullable=True)
+    impuesto_pct = Column(Numeric(5, 2), nullable=True)
+    descuento_pct = Column(Numeric(5, 2), nullable=True)
+
+    orden_compra = relationship("OrdenCompraArchivo", back_populates="items")
+
+
+# ---------------------------------------------------------------------
+# Bajas de OCs (OrdenCompraService.eliminar) para la exportación analítica:
+# aguas abajo se borran la OC y sus items. actualizado_en es el momento de la baja.
+# ---------------------------------------------------------------------
+class OrdenCompraEliminada(Base):
+    __tablename__ = "orden_compra_eliminada"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)      # id de la OC borrada
+    codigo = Column(String(32), nullable=False)
+    actualizado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# ---------------------------------------------------------------------
+# Marca de agua de la exportación analítica por tabla (services/exportacion.py):
+# último (actualizado_en, id) exportado.
+# ---------------------------------------------------------------------
+class MarcaExportacion(Base):
+    __tablename__ = "exportacion_marca"
+
+    tabla = Column(String(64), primary_key=True)
+    actualizado_hasta = Column(DateTime, nullable=False)
+    id_hasta = Column(UUID(as_uuid=True), nullable=False)
+    actualizado_en = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+# ---------------------------------------------------------------------
+# Trabajos en segundo plano (services/trabajos.py): estado y checkpoint
+# persistidos para poder reanudar tras un reinicio.
+# ---------------------------------------------------------------------
+class Trabajo(Base):
+    __tablename__ = "trabajo"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tipo = Column(String(64), nullable=False)
+    # PENDIENTE|EN_CURSO|COMPLETADO|CANCELADO|FALLIDO
+    estado = Column(String(16), nullable=False, default="PENDIENTE")
+    parametros = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=dict)
+
+    # progreso: `cursor` es el último id procesado (los lotes avanzan por id)
+    cursor = Column(String(64), nullable=True)
+    procesados = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)
+    error = Column(String(1000), nullable=True)
+
+    # lease: la instancia que lo ejecuta renueva `latido_en` en cada lote
+    tomado_por = Column(String(64), nullable=True)
+    latido_en = Column(DateTime, nullable=True)
+
+    creado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
+    actualizado_en = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    terminado_en = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        CheckConstraint(
+            "estado IN ('PENDIENTE','EN_CURSO','COMPLETADO','CANCELADO','FALLIDO')",
+            name="ck_trabajo_estado"
+        ),
+        Index("ix_trabajo_estado", "estado"),
+    )
+
+
+# ---------------------------------------------------------------------
+# Notificaciones a proveedores (services/notificaciones.py): cola de
+# webhooks pendientes y, aparte, las descartadas tras agotar reintentos.
+# ---------------------------------------------------------------------
+class Notificacion(Base):
+    __tablename__ = "notificacion"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    proveedor_id = Column(UUID(as_uuid=True), ForeignKey("proveedor.id", ondelete="CASCADE"), nullable=False)
+    evento = Column(String(64), nullable=False)              # oc.enviada
+    url = Column(String(500), nullable=False)                # webhook_url del proveedor al encolar
+    payload = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+
+    intentos = Column(Integer, nullable=False, default=0)
+    proximo_intento_en = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # lease: la instancia que la tomó la está entregando hasta esta hora
+    tomado_hasta = Column(DateTime, nullable=True)
+    ultimo_error = Column(String(1000), nullable=True)
+
+    creado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_notificacion_proximo", "proximo_intento_en"),
+    )
+
+
+class NotificacionFallida(Base):
+    __tablename__ = "notificacion_fallida"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    proveedor_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    evento = Column(String(64), nullable=False)
+    url = Column(String(500), nullable=False)
+    payload = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    intentos = Column(Integer, nullable=False)
+    ultimo_error = Column(String(1000), nullable=True)
+    creado_en = Column(DateTime, nullable=False)
+    fallida_en = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# ---------------------------------------------------------------------
+# Auditoría (infrastructure/auditoria.py): append-only, una fila por
+# entidad raíz (OC con sus items, proveedor con su catálogo) y transacción,
+# con el diff compacto de todo lo que cambió en ella.
+# ---------------------------------------------------------------------
+class Auditoria(Base):
+    __tablename__ = "auditoria"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    raiz = Column(String(16), nullable=False)                # orden_compra | proveedor
+    raiz_id = Column(UUID(as_uuid=True), nullable=False)
+    # [{"t": tabla, "id": id de la fila, "op": I|U|D, "c": {campo: valor} o {campo: [antes, después]}}]
+    cambios = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    actor = Column(String(128), nullable=True)               # header ACTOR_HEADER de la petición
+    request_id = Column(String(64), nullable=True)
+    creado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # historial de una entidad, del más reciente hacia atrás (keyset por id)
+        Index("ix_auditoria_raiz", "raiz", "raiz_id", "id"),
     )
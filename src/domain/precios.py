@@ -0,0 +1,14 @@
+from decimal import Decimal
+
+CIEN = Decimal("100")
+
+
+def dec(v, default="0") -> Decimal:
+    return Decimal(str(v if v is not None else default))
+
+
+def calc_linea(precio_unitario, cantidad, descuento_pct=None, impuesto_pct=None) -> tuple[Decimal, Decimal]:
+    """(neto, impuesto) de una línea: precio * cantidad, menos descuento, más impuesto sobre el neto."""
+    bruto = dec(precio_unitario) * dec(cantidad)
+    neto = bruto - bruto * dec(descuento_pct) / CIEN
+    return neto, neto * dec(impuesto_pct) / CIEN
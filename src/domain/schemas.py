@@ -1,8 +1,14 @@
-from pydantic import BaseModel, EmailStr, Field, HttpUrl, ConfigDict, conint, condecimal
-from typing import Optional, List
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, HttpUrl, ConfigDict, conint, condecimal, computed_field
+from datetime import datetime
+from decimal import Decimal
+from functools import cached_property
+from typing import Annotated, Any, Dict, Optional, List
 from uuid import UUID
 from enum import Enum
 
+from src.domain import webhooks
+from src.domain.precios import calc_linea
+
 class TipoDePersona(str, Enum):
     NATURAL = "NATURAL"
     JURIDICA = "JURIDICA"
@@ -13,6 +19,13 @@ class TipoDocumento(str, Enum):
     PASAPORTE = "PASAPORTE"
     CE = "CE"
 
+def _webhook_publico(url: HttpUrl) -> HttpUrl:
+    webhooks.validar_url(str(url))
+    return url
+
+# https hacia un host público (ver src/domain/webhooks.py)
+WebhookUrl = Annotated[HttpUrl, AfterValidator(_webhook_publico)]
+
 # --------- Proveedor DTOs ----------
 class ProveedorBase(BaseModel):
     nombre: str = Field(..., max_length=255)
@@ -27,7 +40,8 @@ class ProveedorBase(BaseModel):
     activo: Optional[bool] = True
 
 class ProveedorCreate(ProveedorBase):
-    pass
+    # no se expone en ProveedorOut: puede llevar un token del proveedor
+    webhook_url: Optional[WebhookUrl] = None
 
 class ProveedorUpdate(BaseModel):
     nombre: Optional[str] = Field(None, max_length=255)
@@ -39,6 +53,7 @@ class ProveedorUpdate(BaseModel):
     telefono: Optional[str] = Field(None, max_length=64)
     email: Optional[EmailStr] = None
     pagina_web: Optional[HttpUrl] = None
+    webhook_url: Optional[WebhookUrl] = None
     activo: Optional[bool] = None
 
 class ProveedorOut(ProveedorBase):
@@ -59,6 +74,29 @@ class ProductoProveedorOut(ProductoProveedorIn):
     proveedor_id: UUID
     model_config = ConfigDict(from_attributes=True)
 
+class SincronizacionCatalogoOut(BaseModel):
+    insertados: int
+    actualizados: int
+    desactivados: int
+    sin_cambios: int
+
+class PendienteProductoOut(BaseModel):
+    producto_id: UUID
+    cantidad: int
+
+class ResultadoImportacionFila(BaseModel):
+    fila: int
+    estado: str                      # creado | existente | duplicado | invalido
+    id: Optional[UUID] = None
+    errores: List[str] = []
+
+class ImportacionProveedoresOut(BaseModel):
+    creados: int
+    existentes: int
+    duplicados: int
+    invalidos: int
+    resultados: List[ResultadoImportacionFila]
+
 class TerminosCompraOut(BaseModel):
     sku_proveedor: Optional[str] = Field(None, max_length=128)
     precio: Optional[float] = None
@@ -86,10 +124,44 @@ class OrdenCompraCreate(BaseModel):
     codigo: Optional[str] = Field(None, max_length=32)  # si no envías, el servicio lo genera
     items: List[ItemOCIn]
 
+class ItemOCCambio(BaseModel):
+    """Cambio sobre un item existente: sólo los campos enviados (precio_unitario null = el del catálogo)."""
+    id: UUID
+    cantidad: Optional[conint(gt=0)] = None
+    precio_unitario: Optional[condecimal(max_digits=14, decimal_places=4)] = None
+    impuesto_pct:    Optional[condecimal(max_digits=5,  decimal_places=2)] = None
+    descuento_pct:   Optional[condecimal(max_digits=5,  decimal_places=2)] = None
+    sku_proveedor:   Optional[str] = Field(None, max_length=128)
+
+class OrdenCompraEnmienda(BaseModel):
+    agregar: List[ItemOCIn] = []
+    modificar: List[ItemOCCambio] = []
+    quitar: List[UUID] = []   # ids de items
+
 class ItemOCOut(ItemOCIn):
     id: UUID
     oc_id: UUID
 
+    # precio por línea calculado en el servidor (mismo cálculo que los totales de la OC)
+    @cached_property
+    def _linea(self) -> tuple[Decimal, Decimal]:
+        return calc_linea(self.precio_unitario, self.cantidad, self.descuento_pct, self.impuesto_pct)
+
+    @computed_field
+    @property
+    def subtotal(self) -> Decimal:
+        return self._linea[0]
+
+    @computed_field
+    @property
+    def impuesto(self) -> Decimal:
+        return self._linea[1]
+
+    @computed_field
+    @property
+    def total(self) -> Decimal:
+        return self.subtotal + self.impuesto
+
 class OrdenCompraOut(BaseModel):
     id: UUID
     codigo: str
@@ -100,5 +172,81 @@ class OrdenCompraOut(BaseModel):
     impuesto_total: Optional[condecimal(max_digits=14, decimal_places=4)] = None
     total: Optional[condecimal(max_digits=14, decimal_places=4)] = None
     moneda: Optional[str] = None
+    # total en MONEDA_BASE con la tasa vigente al crear la orden (None si no había tasa)
+    tasa_cambio: Optional[Decimal] = None
+    total_base: Optional[condecimal(max_digits=18, decimal_places=4)] = None
     notas: Optional[str] = None
     items: List[ItemOCOut] = []
+
+class ResumenEstadoOut(BaseModel):
+    estado: str
+    ordenes: int
+    total_base: Decimal
+    sin_tasa: int                  # órdenes sin total normalizado (no suman a total_base)
+
+class ResumenOrdenesOut(BaseModel):
+    moneda_base: str
+    por_estado: List[ResumenEstadoOut]
+
+# ----- Tasas de cambio -----
+class TasaCambioCreate(BaseModel):
+    moneda: str = Field(..., min_length=3, max_length=3)
+    tasa: condecimal(gt=0, max_digits=20, decimal_places=10)   # unidades de moneda base por 1 de `moneda`
+    vigente_desde: Optional[datetime] = None                   # por defecto, ahora
+
+class TasaCambioOut(BaseModel):
+    moneda: str
+    vigente_desde: datetime
+    tasa: Decimal
+    model_config = ConfigDict(from_attributes=True)
+
+# ----- Notificaciones a proveedores -----
+class NotificacionFallidaOut(BaseModel):
+    id: UUID
+    proveedor_id: UUID
+    evento: str
+    url: str
+    intentos: int
+    ultimo_error: Optional[str] = None
+    creado_en: datetime
+    fallida_en: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+# ----- Auditoría -----
+class AuditoriaOut(BaseModel):
+    id: int
+    raiz: str
+    raiz_id: UUID
+    # [{"t": tabla, "id": fila, "op": "I"|"U"|"D", "c": {campo: valor} o {campo: [antes, después]}}]
+    cambios: List[Dict[str, Any]]
+    actor: Optional[str] = None
+    request_id: Optional[str] = None
+    creado_en: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+# ----- Trabajos en segundo plano -----
+class TrabajoCreate(BaseModel):
+    tipo: str = Field(..., max_length=64)
+    parametros: Dict[str, Any] = {}
+
+class TrabajoOut(BaseModel):
+    id: UUID
+    tipo: str
+    estado: str
+    parametros: Dict[str, Any]
+    procesados: int
+    total: Optional[int] = None
+    error: Optional[str] = None
+    creado_en: datetime
+    actualizado_en: datetime
+    terminado_en: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def progreso(self) -> Optional[float]:
+        if self.estado == "COMPLETADO":
+            return 1.0
+        if not self.total:
+            return None
+        return round(min(self.procesados / self.total, 1.0), 4)
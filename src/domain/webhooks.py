@@ -0,0 +1,58 @@
+"""
+Destinos permitidos para los webhooks de proveedores: https hacia hosts públicos. La URL la
+registra el proveedor y la llama el servicio, así que sin esta regla serviría para alcanzar la
+red interna (metadata de la nube, BD, otros servicios). Se aplica al guardarla y al enviar,
+cuando el nombre puede resolver a otra dirección.
+"""
+import ipaddress
+import socket
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+_SUFIJOS_INTERNOS = (".localhost", ".local", ".internal")
+
+
+def _ip(valor: str) -> Optional[ipaddress.IPv4Address | ipaddress.IPv6Address]:
+    try:
+        ip = ipaddress.ip_address(valor.split("%")[0])  # sin el scope id de IPv6
+    except ValueError:
+        return None
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        return ip.ipv4_mapped
+    return ip
+
+
+def _interna(ip) -> bool:
+    # is_global excluye loopback, link-local, privadas, CGNAT, reservadas y no especificadas
+    return not ip.is_global or ip.is_multicast
+
+
+def motivo_rechazo(url: str, direcciones: Iterable[str] = ()) -> Optional[str]:
+    """Por qué `url` no sirve como webhook (None si sirve), dadas las IPs a las que resuelve su host."""
+    partes = urlsplit(url)
+    if partes.scheme != "https":
+        return "el webhook debe usar https"
+    host = (partes.hostname or "").rstrip(".").lower()
+    if not host:
+        return "el webhook no tiene host"
+    if host == "localhost" or host.endswith(_SUFIJOS_INTERNOS):
+        return f"el host {host} es interno"
+    ips = [ip for ip in map(_ip, (host, *direcciones)) if ip is not None]
+    if any(_interna(ip) for ip in ips):
+        return f"el host {host} apunta a una dirección interna"
+    return None
+
+
+def resolver(host: str) -> list[str]:
+    """IPs de `host`; vacío si no resuelve (la entrega fallará y se reintentará)."""
+    try:
+        return [info[4][0] for info in socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)]
+    except (OSError, UnicodeError):
+        return []
+
+
+def validar_url(url: str) -> str:
+    motivo = motivo_rechazo(url, resolver(urlsplit(url).hostname or ""))
+    if motivo:
+        raise ValueError(motivo)
+    return url
@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+from src.config import settings
+
+
+def _utc(ts: datetime) -> datetime:
+    # las columnas de auditoría se guardan como UTC naive (datetime.utcnow)
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def es_condicional(request: Request, lista: bool = False) -> bool:
+    # las listas no llevan Last-Modified: sólo If-None-Match puede validarlas
+    return "if-none-match" in request.headers or (not lista and "if-modified-since" in request.headers)
+
+
+class Validador:
+    """ETag / Last-Modified de una representación, calculados desde `actualizado_en`."""
+
+    def __init__(self, etag: str, ultima_modificacion: Optional[datetime]):
+        self.etag = etag
+        self.ultima_modificacion = ultima_modificacion
+
+    @classmethod
+    def de_recurso(cls, id, actualizado_en: Optional[datetime]) -> Optional["Validador"]:
+        if actualizado_en is None:
+            return None
+        return cls(cls._etag([(id, actualizado_en)]), actualizado_en)
+
+    @classmethod
+    def de_lista(cls, filas: Iterable[tuple]) -> "Validador":
+        """
+        `filas` son pares (id, actualizado_en) en el orden en que se devuelven. Sin Last-Modified:
+        la fecha más reciente de la página no cambia cuando una fila sale de ella (se borra o deja
+        de cumplir el filtro), así que If-Modified-Since daría un 304 falso; vale sólo el ETag.
+        """
+        return cls(cls._etag(filas), None)
+
+    @staticmethod
+    def _etag(filas: Iterable[tuple]) -> str:
+        h = hashlib.blake2b(settings.VERSION.encode(), digest_size=16)
+        for id_, actualizado_en in filas:
+            h.update(f"|{id_}@{actualizado_en.isoformat() if actualizado_en else ''}".encode())
+        return f'W/"{h.hexdigest()}"'
+
+    def coincide(self, request: Request) -> bool:
+        """True si el cliente ya tiene esta versión (If-None-Match manda sobre If-Modified-Since)."""
+        inm = request.headers.get("if-none-match")
+        if inm is not None:
+            etiquetas = {t.strip().removeprefix("W/") for t in inm.split(",")}
+            return "*" in etiquetas or self.etag.removeprefix("W/") in etiquetas
+        ims = request.headers.get("if-modified-since")
+        if ims is None or self.ultima_modificacion is None:
+            return False
+        try:
+            desde = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        # HTTP-date tiene resolución de segundos
+        return _utc(self.ultima_modificacion).replace(microsecond=0) <= _utc(desde)
+
+    def cabeceras(self) -> dict[str, str]:
+        h = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if self.ultima_modificacion is not None:
+            h["Last-Modified"] = format_datetime(_utc(self.ultima_modificacion), usegmt=True)
+        return h
+
+    def aplicar(self, response: Response) -> None:
+        response.headers.update(self.cabeceras())
+
+    def no_modificado(self) -> Response:
+        return Response(status_code=304, headers=self.cabeceras())
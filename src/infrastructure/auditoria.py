@@ -0,0 +1,141 @@
+"""
+Auditoría append-only de OrdenCompra, ItemOrdenCompra, Proveedor y ProductoProveedor.
+
+Los cambios que la sesión envía en cada flush se acumulan en `session.info` como diffs compactos
+(sólo las columnas que cambiaron) y se escriben al confirmar, en la misma transacción, con un
+único INSERT: una fila por entidad raíz (la OC con sus items, el proveedor con su catálogo).
+Un rollback los descarta. Las escrituras masivas que no pasan por el unit of work (p. ej. la
+sincronización del catálogo) los agregan con `registrar`.
+"""
+from __future__ import annotations
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Optional
+from uuid import UUID
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from src.domain.models import Auditoria, ItemOrdenCompra, OrdenCompra, ProductoProveedor, Proveedor
+from src.infrastructure.logs import contexto_log
+
+_CLAVE = "auditoria"
+# columnas que cambian solas en cada escritura: no aportan al historial
+_IGNORADAS = frozenset({"creado_en", "actualizado_en"})
+
+# columnas que no se guardan nunca en el historial (el historial se expone por API)
+EXCLUIDAS: dict[type, frozenset[str]] = {
+    Proveedor: frozenset({"webhook_url"}),  # puede llevar el token del proveedor
+}
+
+# modelo -> (raíz, id de la raíz, id de la fila)
+AUDITADAS: dict[type, tuple[str, Callable[[Any], UUID], Callable[[Any], Any]]] = {
+    OrdenCompra: ("orden_compra", lambda o: o.id, lambda o: o.id),
+    ItemOrdenCompra: ("orden_compra", lambda o: o.oc_id, lambda o: o.id),
+    Proveedor: ("proveedor", lambda o: o.id, lambda o: o.id),
+    ProductoProveedor: ("proveedor", lambda o: o.proveedor_id, lambda o: o.producto_id),
+}
+
+
+def _json(v):
+    if isinstance(v, Decimal):
+        return str(v)
+    if isinstance(v, UUID):
+        return str(v)
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    if isinstance(v, Enum):
+        return v.value
+    return v
+
+
+def registrar(session: Session, raiz: str, raiz_id: UUID, tabla: str, fila_id: Any, op: str,
+              cambios: dict[str, Any]) -> None:
+    """
+    Agrega un cambio al historial de la transacción en curso. `op` es I, U o D; `cambios` es
+    {campo: valor} en I/D y {campo: (antes, después)} en U (o {campo: después} si no se conoce el antes).
+    """
+    entrada = {"t": tabla, "id": _json(fila_id), "op": op}
+    if op == "U":
+        # [antes, después]; sólo [después] si el valor anterior no se conoce
+        entrada["c"] = {
+            c: [_json(v[0]), _json(v[1])] if isinstance(v, tuple) else [_json(v)]
+            for c, v in cambios.items()
+        }
+    else:
+        entrada["c"] = {c: _json(v) for c, v in cambios.items() if v is not None}
+    session.info.setdefault(_CLAVE, {}).setdefault((raiz, raiz_id), []).append(entrada)
+
+
+def _auditables(obj):
+    estado = inspect(obj)
+    excluidas = _IGNORADAS | EXCLUIDAS.get(type(obj), frozenset())
+    return estado, [a for a in estado.attrs if a.key in estado.mapper.columns and a.key not in excluidas]
+
+
+def _valores(obj) -> dict[str, Any]:
+    _, attrs = _auditables(obj)
+    return {a.key: a.value for a in attrs}
+
+
+def _diff(obj) -> dict[str, tuple[Any, Any]]:
+    _, attrs = _auditables(obj)
+    cambios = {}
+    for a in attrs:
+        historia = a.history
+        if not (historia.added or historia.deleted):
+            continue
+        despues = historia.added[0] if historia.added else None
+        if not historia.deleted:
+            # atributo expirado o no cargado al asignarlo: el valor anterior no se conoce (un None
+            # conocido sí viene en `deleted`), así que no se inventa
+            cambios[a.key] = despues
+        elif historia.deleted[0] != despues:
+            cambios[a.key] = (historia.deleted[0], despues)
+    return cambios
+
+
+def _capturar(session: Session, flush_context) -> None:
+    for objetos, op in ((session.new, "I"), (session.dirty, "U"), (session.deleted, "D")):
+        for obj in objetos:
+            auditada = AUDITADAS.get(type(obj))
+            if auditada is None:
+                continue
+            cambios = _diff(obj) if op == "U" else _valores(obj)
+            if op == "U" and not cambios:
+                continue
+            raiz, raiz_id, fila_id = auditada
+            registrar(session, raiz, raiz_id(obj), type(obj).__tablename__, fila_id(obj), op, cambios)
+
+
+def _escribir(session: Session) -> None:
+    session.flush()  # lo pendiente también entra al historial
+    pendientes = session.info.pop(_CLAVE, None)
+    if not pendientes:
+        return
+    contexto = contexto_log.get()
+    session.execute(insert(Auditoria), [
+        {"raiz": raiz, "raiz_id": raiz_id, "cambios": entradas, "actor": contexto.get("actor"),
+         "request_id": contexto.get("request_id"), "creado_en": datetime.utcnow()}
+        for (raiz, raiz_id), entradas in pendientes.items()
+    ])
+
+
+def _descartar(session: Session, transaccion) -> None:
+    if transaccion.parent is None:
+        session.info.pop(_CLAVE, None)
+
+
+def instalar(objetivo) -> None:
+    """Activa la auditoría en una sesión, un sessionmaker o la clase Session."""
+    event.listen(objetivo, "after_flush", _capturar)
+    event.listen(objetivo, "before_commit", _escribir)
+    event.listen(objetivo, "after_soft_rollback", _descartar)
+
+
+def historial(db: Session, raiz: str, raiz_id: UUID, antes_de: Optional[int] = None, limit: int = 50) -> list[Auditoria]:
+    """Historial de la entidad, del más reciente hacia atrás; la página siguiente va con `antes_de` = último id."""
+    stmt = select(Auditoria).where(Auditoria.raiz == raiz, Auditoria.raiz_id == raiz_id)
+    if antes_de is not None:
+        stmt = stmt.where(Auditoria.id < antes_de)
+    return list(db.scalars(stmt.order_by(Auditoria.id.desc()).limit(limit)))
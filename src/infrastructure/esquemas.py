@@ -0,0 +1,99 @@
+import logging
+import threading
+from typing import Optional
+
+from sqlalchemy import text
+
+from src.config import settings
+from src.infrastructure.infrastructure import engine
+
+log = logging.getLogger(__name__)
+
+
+# serializa la inicialización de cada schema entre workers e instancias (lock de sesión de PostgreSQL)
+_BLOQUEAR = text("SELECT pg_advisory_lock(hashtext(:clave))")
+_DESBLOQUEAR = text("SELECT pg_advisory_unlock(hashtext(:clave))")
+
+
+def crear_tablas(schema: str) -> None:
+    """
+    Crea (si faltan) el schema, las tablas y los índices del modelo, y aplica las migraciones pendientes.
+    En PostgreSQL lo hace bajo un advisory lock por schema: los workers e instancias que arrancan a la
+    vez esperan al primero y luego sólo verifican (sin carreras de create_all ni índices reconstruidos).
+    """
+    from src.infrastructure.migraciones import asegurar_indices
+
+    if engine.dialect.name != "postgresql":
+        _crear_tablas(schema)
+        return
+    clave = {"clave": f"{settings.SERVICE_NAME}:esquema:{schema}"}
+    # el lock vive en su propia conexión, fuera de las transacciones del DDL
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as bloqueo:
+        bloqueo.execute(_BLOQUEAR, clave)
+        try:
+            _crear_tablas(schema)
+            # índices nuevos sobre tablas existentes: CONCURRENTLY no admite transacción
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                asegurar_indices(conn, schema)
+        finally:
+            bloqueo.execute(_DESBLOQUEAR, clave)
+
+
+def _crear_tablas(schema: str) -> None:
+    from src.domain import models
+    from src.infrastructure.migraciones import aplicar_migraciones
+
+    eng = engine.execution_options(schema_translate_map={None: schema})
+    with eng.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+        models.Base.metadata.create_all(bind=conn)
+        aplicar_migraciones(conn, schema)
+
+
+class InicializacionEsquemas:
+    """
+    Verificación de tablas por schema. En segundo plano reintenta los schemas que fallen
+    cada `reintento_s` hasta completarlos; `listo` indica cuándo la instancia puede recibir tráfico.
+    """
+
+    def __init__(self, schemas: list[str], reintento_s: float):
+        self.schemas = list(schemas)
+        self.reintento_s = reintento_s
+        self.pendientes = set(self.schemas)
+        self.errores: dict[str, str] = {}
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def listo(self) -> bool:
+        return not self.pendientes
+
+    def ejecutar(self) -> None:
+        for schema in sorted(self.pendientes):
+            try:
+                crear_tablas(schema)
+                self.pendientes.discard(schema)
+                self.errores.pop(schema, None)
+                log.info("✅ tablas creadas/verificadas en schema '%s'", schema)
+            except Exception as e:
+                self.errores[schema] = str(e)
+                log.error("❌ Error creando tablas en schema %s: %s", schema, e)
+
+    def iniciar_en_segundo_plano(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="init-esquemas", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._parar.set()
+
+    def _bucle(self) -> None:
+        while self.pendientes and not self._parar.is_set():
+            self.ejecutar()
+            if self.pendientes:
+                self._parar.wait(self.reintento_s)
+
+
+estado_esquemas = InicializacionEsquemas(settings.KNOWN_SCHEMAS, settings.SCHEMA_INIT_RETRY_S)
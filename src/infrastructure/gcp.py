@@ -0,0 +1,42 @@
+"""
+Clientes de Google Cloud creados bajo demanda: las librerías se importan en el primer uso,
+no al arrancar la instancia (reduce el cold start en Cloud Run).
+"""
+import threading
+from typing import Any
+
+from src.config import settings
+
+_clientes: dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def _singleton(nombre: str, crear):
+    cliente = _clientes.get(nombre)
+    if cliente is None:
+        with _lock:
+            cliente = _clientes.get(nombre)
+            if cliente is None:
+                cliente = _clientes[nombre] = crear()
+    return cliente
+
+
+def get_pubsub_publisher():
+    def crear():
+        from google.cloud import pubsub_v1
+        return pubsub_v1.PublisherClient()
+    return _singleton("pubsub", crear)
+
+
+def get_bigquery():
+    def crear():
+        from google.cloud import bigquery
+        return bigquery.Client(project=settings.GCP_PROJECT or None)
+    return _singleton("bigquery", crear)
+
+
+def get_storage():
+    def crear():
+        from google.cloud import storage
+        return storage.Client(project=settings.GCP_PROJECT or None)
+    return _singleton("storage", crear)
@@ -1,12 +1,75 @@
+from __future__ import annotations
 from contextlib import contextmanager
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from functools import lru_cache
+from sqlalchemy import URL, Engine, Insert, create_engine, text
+from sqlalchemy.orm import sessionmaker, Session
 from src.config import settings
-from typing import Optional
-from redis import Redis
+from src.infrastructure import auditoria
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, TypeVar
+import itertools
+import logging
+import os
+import time
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+if TYPE_CHECKING:  # redis se importa al crear el cliente, no al arrancar
+    from redis import Redis
+    from redis.asyncio import Redis as AsyncRedis
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def reserva_fondo() -> int:
+    """Conexiones de los procesos de fondo: hilos de trabajos y su sondeo, y el despachador de webhooks."""
+    trabajos = settings.TRABAJOS_WORKERS + 1 if settings.TRABAJOS_HABILITADOS else 0
+    return trabajos + (1 if settings.WEBHOOKS_HABILITADOS else 0)
+
+
+def opciones_pool(procesos: int) -> dict[str, object]:
+    """
+    Pool de peticiones de cada proceso: el presupuesto de conexiones de la instancia
+    (DB_POOL_TOTAL, DB_MAX_OVERFLOW_TOTAL), menos lo reservado para los procesos de fondo,
+    repartido entre los `procesos` workers que lo comparten.
+    """
+    procesos = max(1, procesos)
+    return {
+        "pool_size": max(1, (settings.DB_POOL_TOTAL - reserva_fondo()) // procesos),
+        "max_overflow": max(0, settings.DB_MAX_OVERFLOW_TOTAL // procesos),
+        "pool_timeout": settings.DB_POOL_TIMEOUT_S,
+    }
+
+
+# WEB_WORKERS ya viene resuelto por src/servidor.py; fuera de gunicorn (uvicorn, scripts) es un solo proceso
+_POOL = opciones_pool(settings.WEB_WORKERS or 1)
+engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, **_POOL)
+replica_engines = [create_engine(uri, pool_pre_ping=True, **_POOL) for uri in settings.SQLALCHEMY_REPLICA_URIS]
+# trabajos y webhooks (un solo worker, ver WEB_FONDO): pool propio del tamaño reservado, sin desborde;
+# en los demás workers nunca abre conexiones
+engine_fondo = create_engine(
+    settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True,
+    pool_size=max(1, reserva_fondo()), max_overflow=0, pool_timeout=settings.DB_POOL_TIMEOUT_S,
+)
 _redis_client: Optional[Redis] = None
+_redis_async_client: Optional[AsyncRedis] = None
+_redis_caido_hasta = 0.0
+
+
+def _tras_fork() -> None:
+    # un worker creado por fork (gunicorn --preload) no reutiliza los sockets del proceso padre:
+    # pools nuevos (sin cerrar las conexiones heredadas, que siguen siendo del padre) y clientes Redis nuevos
+    global _redis_client, _redis_async_client
+    for eng in (engine, engine_fondo, *replica_engines):
+        eng.dispose(close=False)
+    _redis_client = _redis_async_client = None
+
+
+os.register_at_fork(after_in_child=_tras_fork)
+
+
+def cerrar_conexiones() -> None:
+    """Cierra las conexiones del pool al apagar, cuando ya terminaron las transacciones en curso."""
+    for eng in (engine, engine_fondo, *replica_engines):
+        eng.dispose()
 
 SessionLocal = sessionmaker(
     bind=engine,
@@ -14,14 +77,181 @@ SessionLocal = sessionmaker(
     autoflush=False,
     expire_on_commit=False,
 )
+# historial de cambios de OCs y proveedores, escrito en la misma transacción
+auditoria.instalar(SessionLocal)
+
+class EsperaPool:
+    """Media móvil del tiempo de espera por una conexión del pool, con decaimiento temporal."""
+
+    def __init__(self, semivida_s: float = 2.0):
+        self.semivida_s = semivida_s
+        self._valor = 0.0
+        self._t = time.monotonic()
+
+    def registrar(self, segundos: float) -> None:
+        self._valor = self.actual_s() * 0.8 + segundos * 0.2
+        self._t = time.monotonic()
+
+    def actual_s(self) -> float:
+        # sin muestras nuevas (p. ej. mientras se descarta carga) el valor decae solo
+        return self._valor * 0.5 ** ((time.monotonic() - self._t) / self.semivida_s)
+
+
+espera_pool = EsperaPool()
+
+
+# segundos de retraso de replay; 0 si la réplica ya aplicó todo lo recibido (aunque el primario esté ocioso)
+_SQL_LAG_REPLICA = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def _lag_replica(eng: Engine) -> float:
+    with eng.connect() as conn:
+        return float(conn.execute(_SQL_LAG_REPLICA).scalar() or 0)
+
+
+class SelectorReplica:
+    """
+    Reparte lecturas entre réplicas (round robin) descartando las que superan `max_lag_s`.
+    El lag de cada réplica se consulta como mucho cada `intervalo_s`; una réplica que no
+    responde cuenta como atrasada hasta la siguiente comprobación.
+    """
+
+    def __init__(self, engines: list[Engine], max_lag_s: float, intervalo_s: float,
+                 medir_lag: Callable[[Engine], float] = _lag_replica):
+        self.engines = engines
+        self.max_lag_s = max_lag_s
+        self.intervalo_s = intervalo_s
+        self.medir_lag = medir_lag
+        self._lags: dict[int, tuple[float, float]] = {}
+        self._siguiente = itertools.count()
+
+    def elegir(self) -> Optional[Engine]:
+        if not self.engines:
+            return None
+        inicio = next(self._siguiente)
+        for i in range(len(self.engines)):
+            eng = self.engines[(inicio + i) % len(self.engines)]
+            if self._lag(eng) <= self.max_lag_s:
+                return eng
+        return None
+
+    def _lag(self, eng: Engine) -> float:
+        ahora = time.monotonic()
+        medido = self._lags.get(id(eng))
+        if medido is None or ahora - medido[0] >= self.intervalo_s:
+            try:
+                lag = self.medir_lag(eng)
+            except Exception as e:
+                log.warning("Réplica %s no disponible: %s", eng.url.host, e)
+                lag = float("inf")
+            medido = self._lags[id(eng)] = (ahora, lag)
+        return medido[1]
+
+
+selector_replica = SelectorReplica(replica_engines, settings.REPLICA_MAX_LAG_S, settings.REPLICA_LAG_CHECK_S)
+
+
+_schemas_creados: set[tuple[URL, str]] = set()
+
+
+def motor_de_schema(eng: Engine, schema: str, lectura: bool = False) -> Engine:
+    """
+    `eng` con el schema del tenant ya fijado; comparte el pool de `eng`. Los de lectura van en
+    AUTOCOMMIT (sin BEGIN/COMMIT) o, con LECTURAS_AUTOCOMMIT=false, en una transacción READ ONLY
+    (un solo snapshot por petición).
+    """
+    modo = ("autocommit" if settings.LECTURAS_AUTOCOMMIT else "read_only") if lectura else "escritura"
+    return _motor(eng, schema, modo)
+
+
+@lru_cache(maxsize=None)
+def _motor(eng: Engine, schema: str, modo: str) -> Engine:
+    # construido una vez por (engine, schema, modo), no en cada petición
+    opciones = {"schema_translate_map": {None: schema}}
+    if modo == "autocommit":
+        opciones["isolation_level"] = "AUTOCOMMIT"
+    elif modo == "read_only":
+        opciones["postgresql_readonly"] = True
+    return eng.execution_options(**opciones)
+
+
+def _crear_schema(conn, schema: str) -> Optional[tuple[URL, str]]:
+    """
+    CREATE SCHEMA si aún no se hizo en este proceso (crear_tablas ya lo hace al arrancar para
+    KNOWN_SCHEMAS). Devuelve la clave a marcar como creada cuando la transacción se confirme.
+    """
+    clave = (conn.engine.url, schema)
+    if clave in _schemas_creados or conn.dialect.name != "postgresql":
+        return None
+    conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+    return clave
+
 
 @contextmanager
-def session_for_schema(schema: str):
-    with engine.connect().execution_options(schema_translate_map={None: schema}) as conn:
-        with conn.begin() as transaction:
-            conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
-            with SessionLocal(bind=conn) as session:
+def session_for_schema(schema: str, read_only: bool = False, fondo: bool = False, usar_replica: bool = True):
+    """
+    Sesión ligada a una conexión con el schema del tenant. Con `read_only` se usa una réplica
+    si hay alguna al día (si no, o sin `usar_replica`, el primario) y no se abre transacción de
+    escritura (ver `motor_de_schema`). Con `fondo`, la conexión sale del pool reservado a
+    trabajos y webhooks.
+    """
+    replica = selector_replica.elegir() if read_only and usar_replica else None
+    t0 = time.perf_counter()
+    conn = motor_de_schema(replica or (engine_fondo if fondo else engine), schema, read_only).connect()
+    if not fondo:  # la admisión mide la espera de las peticiones
+        espera_pool.registrar(time.perf_counter() - t0)
+    info = {"schema": schema, "replica": replica is not None}
+    with conn:
+        if read_only and settings.LECTURAS_AUTOCOMMIT:
+            # cada sentencia se confirma sola: ni BEGIN ni COMMIT
+            with SessionLocal(bind=conn, info=info) as session:
                 yield session
+        else:
+            with conn.begin():
+                creado = None if read_only else _crear_schema(conn, schema)
+                with SessionLocal(bind=conn, info=info) as session:
+                    if creado:
+                        al_confirmar(session, lambda: _schemas_creados.add(creado))
+                    yield session
+    # la transacción ya quedó confirmada
+    for fn in session.info.get("al_confirmar", ()):
+        fn()
+
+
+def session_fondo(schema: str):
+    """Sesión de los procesos de fondo (trabajos, webhooks): no compiten con las peticiones por el pool."""
+    return session_for_schema(schema, fondo=True)
+
+
+def al_confirmar(session: Session, fn: Callable[[], None]) -> None:
+    """
+    Ejecuta `fn` cuando la transacción de la petición quede confirmada (p. ej. invalidar caches).
+    Las sesiones que no vienen de `session_for_schema` lo ejecutan de inmediato.
+    """
+    info = getattr(session, "info", None)
+    if isinstance(info, dict) and "schema" in info:
+        info.setdefault("al_confirmar", []).append(fn)
+    else:
+        fn()
+
+
+def insert_con_conflictos(session: Session, tabla) -> Insert:
+    """`insert()` del dialecto de la sesión, con soporte de ON CONFLICT (PostgreSQL; SQLite en tests)."""
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(tabla)
+
+
+def schema_de(session: Session) -> str:
+    """Schema (tenant) con el que se abrió la sesión; DEFAULT_SCHEMA si no se conoce."""
+    info = getattr(session, "info", None)
+    schema = info.get("schema") if isinstance(info, dict) else None
+    return schema or settings.DEFAULT_SCHEMA
 
 
 def get_redis() -> Optional[Redis]:
@@ -30,5 +260,79 @@ def get_redis() -> Optional[Redis]:
     if not settings.REDIS_HOST or not settings.REDIS_PORT:
         return None
     if _redis_client is None:
-        _redis_client = Redis(host=settings.REDIS_HOST, port=int(settings.REDIS_PORT), decode_responses=True)
-    return _redis_client
\ No newline at end of file
+        from redis import Redis
+        from redis.backoff import NoBackoff
+        from redis.retry import Retry
+
+        _redis_client = Redis(
+            host=settings.REDIS_HOST,
+            port=int(settings.REDIS_PORT),
+            decode_responses=True,
+            socket_timeout=settings.REDIS_TIMEOUT_S,
+            socket_connect_timeout=settings.REDIS_TIMEOUT_S,
+            # sin reintentos: ante un fallo se usa el fallback local (ver redis_op)
+            retry=Retry(NoBackoff(), 0),
+        )
+    return _redis_client
+
+
+def _redis_disponible() -> bool:
+    return time.monotonic() >= _redis_caido_hasta
+
+
+def _marcar_redis_caido(e: Exception) -> None:
+    global _redis_caido_hasta
+    _redis_caido_hasta = time.monotonic() + settings.REDIS_RETRY_S
+    log.warning("Redis no disponible (%s); usando fallback local", e)
+
+
+def get_redis_async() -> Optional[AsyncRedis]:
+    """Singleton Redis asyncio (para middlewares). Devuelve None si no está configurado."""
+    global _redis_async_client
+    if not settings.REDIS_HOST or not settings.REDIS_PORT:
+        return None
+    if _redis_async_client is None:
+        from redis.asyncio import Redis as AsyncRedis
+        from redis.asyncio.retry import Retry as AsyncRetry
+        from redis.backoff import NoBackoff
+
+        _redis_async_client = AsyncRedis(
+            host=settings.REDIS_HOST,
+            port=int(settings.REDIS_PORT),
+            decode_responses=True,
+            socket_timeout=settings.REDIS_TIMEOUT_S,
+            socket_connect_timeout=settings.REDIS_TIMEOUT_S,
+            retry=AsyncRetry(NoBackoff(), 0),
+        )
+    return _redis_async_client
+
+
+async def redis_op_async(fn: Callable[[AsyncRedis], Awaitable[T]], default: T) -> T:
+    """Versión asyncio de `redis_op`; comparte la ventana de reintento."""
+    if not _redis_disponible():
+        return default
+    r = get_redis_async()
+    if r is None:
+        return default
+    try:
+        return await fn(r)
+    except Exception as e:
+        _marcar_redis_caido(e)
+        return default
+
+
+def redis_op(fn: Callable[[Redis], T], default: T) -> T:
+    """
+    Ejecuta `fn` contra Redis tolerando caídas: si Redis no está configurado o falla,
+    devuelve `default` y no vuelve a intentarlo durante REDIS_RETRY_S segundos.
+    """
+    if not _redis_disponible():
+        return default
+    r = get_redis()
+    if r is None:
+        return default
+    try:
+        return fn(r)
+    except Exception as e:
+        _marcar_redis_caido(e)
+        return default
@@ -0,0 +1,197 @@
+"""
+Logging estructurado: una línea JSON por registro (campos que entiende Cloud Logging), con el
+contexto de la petición (trace, request id, schema, ruta), muestreo por nivel y escritura en un
+hilo aparte (QueueHandler/QueueListener) para que la E/S nunca bloquee a quien loguea.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+# contexto de la petición en curso (lo fija middleware/contexto_log.py)
+contexto_log: ContextVar[dict[str, Any]] = ContextVar("contexto_log", default={})
+
+_CAMPOS_CONTEXTO = ("trace_id", "span_id", "request_id", "schema", "ruta")
+# atributos estándar de LogRecord: el resto (extra=...) se emite como campos del JSON
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", *_CAMPOS_CONTEXTO}
+
+def _dumps(obj: dict[str, Any]) -> str:
+    if orjson is None:
+        return json.dumps(obj, default=str, ensure_ascii=False)
+    return orjson.dumps(obj, default=str).decode()
+
+
+def parse_muestreo(valor: str) -> dict[int, float]:
+    """'DEBUG=0.01,INFO=0.1' -> {10: 0.01, 20: 0.1}."""
+    tasas = {}
+    for parte in filter(None, (p.strip() for p in valor.split(","))):
+        nivel, _, tasa = parte.partition("=")
+        tasas[logging.getLevelName(nivel.strip().upper())] = float(tasa)
+    return tasas
+
+
+class FiltroContexto(logging.Filter):
+    """Copia el contexto de la petición al registro (en el hilo que loguea, antes de encolar)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for campo, valor in contexto_log.get().items():
+            if not hasattr(record, campo):
+                setattr(record, campo, valor)
+        return True
+
+
+class FiltroMuestreo(logging.Filter):
+    """
+    Conserva sólo una fracción de los registros de los niveles configurados. La decisión se toma
+    por request_id (todos los registros de una petición se conservan o descartan juntos).
+    `extra={"muestrear": False}` fuerza a conservar un registro.
+    """
+
+    def __init__(self, tasas: dict[int, float]):
+        super().__init__()
+        self.tasas = tasas
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        tasa = self.tasas.get(record.levelno)
+        if tasa is None or tasa >= 1 or getattr(record, "muestrear", True) is False:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            return (zlib.crc32(request_id.encode()) % 10_000) < tasa * 10_000
+        return random.random() < tasa
+
+
+class FormateadorJSON(logging.Formatter):
+    def __init__(self, proyecto_gcp: str = "", servicio: str = ""):
+        super().__init__()
+        self.proyecto_gcp = proyecto_gcp
+        self.servicio = servicio
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "severity": record.levelname,
+            "message": record.getMessage(),
+            "logger": record.name,
+            "servicio": self.servicio,
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            out["logging.googleapis.com/trace"] = (
+                f"projects/{self.proyecto_gcp}/traces/{trace_id}" if self.proyecto_gcp else trace_id
+            )
+            if getattr(record, "span_id", None):
+                out["logging.googleapis.com/spanId"] = record.span_id
+        for campo in ("request_id", "schema", "ruta"):
+            if getattr(record, campo, None):
+                out[campo] = getattr(record, campo)
+        for k, v in vars(record).items():
+            if k not in _ATRIBUTOS_RECORD and k != "muestrear":
+                out[k] = v
+        if record.exc_info:
+            out["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            out["stack"] = self.formatStack(record.stack_info)
+        return _dumps(out)
+
+
+class QueueHandlerNoBloqueante(logging.handlers.QueueHandler):
+    """QueueHandler sobre una cola acotada: si se llena, descarta el registro y lo cuenta."""
+
+    def __init__(self, cola: queue.Queue):
+        super().__init__(cola)
+        self.descartados = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # sólo se interpola el mensaje (los args pueden cambiar después); el JSON y el traceback
+        # se arman en el hilo del listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configurar_logging(
+    nivel: str = "INFO",
+    formato: str = "json",
+    muestreo: str = "",
+    cola_max: int = 10_000,
+    proyecto_gcp: str = "",
+    servicio: str = "",
+) -> QueueHandlerNoBloqueante:
+    """Instala el handler raíz (idempotente: reemplaza la configuración anterior)."""
+    global _listener
+    detener_logging()
+
+    salida = logging.StreamHandler(sys.stdout)
+    if formato == "json":
+        salida.setFormatter(FormateadorJSON(proyecto_gcp, servicio))
+    else:
+        salida.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s]: %(message)s",
+                                              defaults={"request_id": "-"}))
+
+    handler = QueueHandlerNoBloqueante(queue.Queue(maxsize=cola_max))
+    handler.addFilter(FiltroContexto())
+    tasas = parse_muestreo(muestreo)
+    if tasas:
+        handler.addFilter(FiltroMuestreo(tasas))
+
+    raiz = logging.getLogger()
+    for h in list(raiz.handlers):
+        raiz.removeHandler(h)
+    raiz.addHandler(handler)
+    raiz.setLevel(nivel.upper())
+
+    _listener = logging.handlers.QueueListener(handler.queue, salida, respect_handler_level=False)
+    _listener.start()
+    return handler
+
+
+def detener_logging() -> None:
+    """Vacía la cola y detiene el hilo escritor."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _tras_fork() -> None:
+    # el hilo escritor no sobrevive al fork (p. ej. los workers de gunicorn --preload): el hijo
+    # arranca el suyo sobre una cola nueva, sin heredar registros ni locks del padre
+    global _listener
+    if _listener is None:
+        return
+    handler = next((h for h in logging.getLogger().handlers if isinstance(h, QueueHandlerNoBloqueante)), None)
+    if handler is None:
+        _listener = None
+        return
+    handler.queue = queue.Queue(maxsize=handler.queue.maxsize)
+    _listener = logging.handlers.QueueListener(handler.queue, *_listener.handlers, respect_handler_level=False)
+    _listener.start()
+
+
+atexit.register(detener_logging)
+os.register_at_fork(after_in_child=_tras_fork)
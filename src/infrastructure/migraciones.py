@@ -0,0 +1,56 @@
+import re
+
+from sqlalchemy import Connection, text
+from sqlalchemy.schema import CreateIndex
+
+# Cambios sobre tablas ya existentes que `create_all` no aplica. Deben ser idempotentes:
+# se ejecutan en cada verificación de schema. "{schema}" se sustituye por el schema del tenant.
+MIGRACIONES = (
+    'ALTER TABLE "{schema}".proveedor ADD COLUMN IF NOT EXISTS eliminado_en TIMESTAMP',
+    'ALTER TABLE "{schema}".orden_compra ADD COLUMN IF NOT EXISTS tasa_cambio NUMERIC(20, 10)',
+    'ALTER TABLE "{schema}".orden_compra ADD COLUMN IF NOT EXISTS total_base NUMERIC(18, 4)',
+    'ALTER TABLE "{schema}".orden_compra_archivo ADD COLUMN IF NOT EXISTS tasa_cambio NUMERIC(20, 10)',
+    'ALTER TABLE "{schema}".orden_compra_archivo ADD COLUMN IF NOT EXISTS total_base NUMERIC(18, 4)',
+    'ALTER TABLE "{schema}".proveedor ADD COLUMN IF NOT EXISTS webhook_url VARCHAR(500)',
+)
+
+_CREATE_INDEX = re.compile(r"^CREATE (UNIQUE )?INDEX ")
+
+
+def aplicar_migraciones(conn: Connection, schema: str) -> None:
+    for sql in MIGRACIONES:
+        conn.execute(text(sql.format(schema=schema)))
+
+
+def asegurar_indices(conn: Connection, schema: str) -> None:
+    """
+    Crea con CREATE INDEX CONCURRENTLY (sin bloquear escrituras) los índices del modelo que falten
+    en tablas ya existentes; sólo PostgreSQL y con `conn` en AUTOCOMMIT. Un índice que quedó
+    inválido por una creación interrumpida se borra y se vuelve a crear; uno que otra sesión
+    todavía está construyendo (también figura como inválido) se deja en paz.
+    """
+    from src.domain import models
+
+    existentes = {
+        nombre: (valido, construyendo)
+        for nombre, valido, construyendo in conn.execute(
+            text(
+                "SELECT c.relname, i.indisvalid, EXISTS ("
+                "  SELECT 1 FROM pg_stat_progress_create_index p WHERE p.index_relid = i.indexrelid"
+                ") FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace WHERE n.nspname = :schema"
+            ),
+            {"schema": schema},
+        )
+    }
+    conn.execute(text(f'SET search_path TO "{schema}"'))
+    for tabla in models.Base.metadata.sorted_tables:
+        for indice in sorted(tabla.indexes, key=lambda i: i.name):
+            valido, construyendo = existentes.get(indice.name, (False, False))
+            if valido or construyendo:
+                continue
+            if indice.name in existentes:
+                conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{schema}"."{indice.name}"'))
+            ddl = str(CreateIndex(indice, if_not_exists=True).compile(dialect=conn.dialect))
+            conn.execute(text(_CREATE_INDEX.sub(r"CREATE \1INDEX CONCURRENTLY ", ddl)))
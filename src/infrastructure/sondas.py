@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from sqlalchemy import Engine, bindparam, text
+
+from src.config import settings
+from src.infrastructure.esquemas import InicializacionEsquemas, estado_esquemas
+from src.infrastructure.infrastructure import engine, redis_op
+from src.middleware.latencia import RegistroLatencias, latencias
+
+# un schema está disponible si existe con la tabla principal creada
+_SQL_SCHEMAS = text(
+    "SELECT table_schema FROM information_schema.tables "
+    "WHERE table_name = 'orden_compra' AND table_schema IN :schemas"
+).bindparams(bindparam("schemas", expanding=True))
+
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 2)
+
+
+def _ping_redis() -> Optional[float]:
+    t0 = time.perf_counter()
+    return _ms(t0) if redis_op(lambda r: r.ping(), False) else None
+
+
+class Sondas:
+    """
+    Estado de dependencias para /ready. Las sondas (pool, ping a BD y Redis, schemas) se cachean
+    `ttl_s` segundos y sólo una petición a la vez las ejecuta (las demás reciben el último resultado).
+    """
+
+    def __init__(
+        self,
+        db: Engine,
+        schemas: list[str],
+        ttl_s: float,
+        esquemas: InicializacionEsquemas = estado_esquemas,
+        registro: RegistroLatencias = latencias,
+        ping_redis: Callable[[], Optional[float]] = _ping_redis,
+    ):
+        self.db = db
+        self.schemas = schemas
+        self.ttl_s = ttl_s
+        self.esquemas = esquemas
+        self.registro = registro
+        self.ping_redis = ping_redis
+        self._ultimo: Optional[tuple[float, dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def reporte(self) -> dict[str, Any]:
+        """Sondas cacheadas + estado local (inicialización de schemas, p99), que se calcula siempre."""
+        dependencias = self._dependencias()
+        p99 = self.registro.percentil(0.99)
+        return {
+            "ready": dependencias["db"]["ok"] and self.esquemas.listo,
+            **dependencias,
+            "pendientes": sorted(self.esquemas.pendientes),
+            "latencia_p99_ms": round(p99 * 1000, 2) if p99 is not None else None,
+        }
+
+    def _dependencias(self) -> dict[str, Any]:
+        ultimo = self._ultimo
+        if ultimo is not None and time.monotonic() - ultimo[0] < self.ttl_s:
+            return ultimo[1]
+        if not self._lock.acquire(blocking=ultimo is None):
+            return ultimo[1]
+        try:
+            medicion = self._medir()
+            self._ultimo = (time.monotonic(), medicion)
+            return medicion
+        finally:
+            self._lock.release()
+
+    def _pool(self) -> dict[str, Any]:
+        pool = self.db.pool
+        stats = {"estado": pool.status()}
+        for nombre in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(pool, nombre, None)
+            if callable(fn):
+                stats[nombre] = fn()
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        stats["agotado"] = "size" in stats and stats["checkedout"] >= stats["size"] + max(max_overflow, 0)
+        return stats
+
+    def _medir(self) -> dict[str, Any]:
+        pool = self._pool()
+        db: dict[str, Any] = {"ok": False}
+        schemas = {s: False for s in self.schemas}
+        if pool.get("agotado"):
+            # no se espera por una conexión: la sonda no debe sumar carga a un pool sin cupo
+            db["error"] = "pool agotado"
+        else:
+            try:
+                t0 = time.perf_counter()
+                with self.db.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                    db.update(ok=True, latencia_ms=_ms(t0))
+                    for (schema,) in conn.execute(_SQL_SCHEMAS, {"schemas": self.schemas}):
+                        schemas[schema] = True
+            except Exception as e:
+                db["error"] = str(e).splitlines()[0]
+        db["pool"] = pool
+
+        latencia_redis = self.ping_redis()
+        return {
+            "db": db,
+            "redis": {"ok": latencia_redis is not None, "latencia_ms": latencia_redis},
+            "schemas": schemas,
+            "medido_en": time.time(),
+        }
+
+sondas = Sondas(engine, settings.KNOWN_SCHEMAS, settings.READINESS_CACHE_S)
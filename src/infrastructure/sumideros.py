@@ -0,0 +1,69 @@
+"""
+Destinos de la exportación analítica (services/exportacion.py). Un sumidero guarda un lote ya
+serializado (Parquet) y devuelve su URI; un cargador lo incorpora aguas abajo (BigQuery).
+"""
+import logging
+import pathlib
+from typing import Protocol
+
+from src.infrastructure.gcp import get_bigquery, get_storage
+
+log = logging.getLogger(__name__)
+
+
+class Sumidero(Protocol):
+    def escribir(self, schema: str, tabla: str, nombre: str, datos: bytes) -> str: ...
+
+
+class Cargador(Protocol):
+    def cargar(self, schema: str, tabla: str, uri: str) -> None: ...
+
+
+class SumideroLocal:
+    """Escribe los lotes en `directorio/<schema>/<tabla>/<nombre>` (desarrollo y tests)."""
+
+    def __init__(self, directorio: str):
+        self.directorio = pathlib.Path(directorio)
+
+    def escribir(self, schema: str, tabla: str, nombre: str, datos: bytes) -> str:
+        destino = self.directorio / schema / tabla / nombre
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destino.with_suffix(".tmp")
+        tmp.write_bytes(datos)
+        tmp.replace(destino)  # nunca queda un archivo a medio escribir con el nombre final
+        return destino.as_uri()
+
+
+class SumideroGCS:
+    def __init__(self, bucket: str, prefijo: str = "exportacion"):
+        self.bucket = bucket
+        self.prefijo = prefijo.strip("/")
+
+    def escribir(self, schema: str, tabla: str, nombre: str, datos: bytes) -> str:
+        ruta = f"{self.prefijo}/{schema}/{tabla}/{nombre}"
+        get_storage().bucket(self.bucket).blob(ruta).upload_from_string(datos, content_type="application/octet-stream")
+        return f"gs://{self.bucket}/{ruta}"
+
+
+class SinCarga:
+    """Cargador nulo: los archivos quedan en el sumidero (p. ej. con SumideroLocal)."""
+
+    def cargar(self, schema: str, tabla: str, uri: str) -> None:
+        log.debug("Lote %s.%s sin carga aguas abajo: %s", schema, tabla, uri)
+
+
+class CargadorBigQuery:
+    """Load job (append) del Parquet en `<dataset>.<schema>_<tabla>`; no consume slots de consulta."""
+
+    def __init__(self, dataset: str):
+        self.dataset = dataset
+
+    def cargar(self, schema: str, tabla: str, uri: str) -> None:
+        from google.cloud import bigquery
+
+        config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+            schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+        )
+        get_bigquery().load_table_from_uri(uri, f"{self.dataset}.{schema}_{tabla}", job_config=config).result()
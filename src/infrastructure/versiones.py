@@ -0,0 +1,32 @@
+import threading
+from collections import defaultdict
+
+from src.infrastructure.infrastructure import redis_op
+
+
+class VersionCompartida:
+    """
+    Contador de versión por schema para invalidar caches en memoria.
+
+    El valor compartido vive en Redis (`compras:{schema}:{nombre}:version`) para que un
+    cambio en una instancia invalide las demás. Además se lleva un contador local, de modo
+    que los cambios hechos en esta instancia invalidan su cache aunque Redis esté caído.
+    Las versiones sólo deben compararse por igualdad.
+    """
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self._local: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _clave(self, schema: str) -> str:
+        return f"compras:{schema}:{self.nombre}:version"
+
+    def actual(self, schema: str) -> str:
+        compartida = redis_op(lambda r: r.get(self._clave(schema)), None) or "0"
+        return f"{compartida}:{self._local[schema]}"
+
+    def incrementar(self, schema: str) -> None:
+        with self._lock:
+            self._local[schema] += 1
+        redis_op(lambda r: r.incr(self._clave(schema)), None)
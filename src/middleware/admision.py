@@ -0,0 +1,215 @@
+import logging
+import math
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config import settings
+from src.dependencies import resolver_schema
+from src.infrastructure.infrastructure import espera_pool, redis_op_async
+
+log = logging.getLogger(__name__)
+
+_EXENTAS = ("/health", "/ready", "/docs", "/redoc", "/openapi.json")
+
+# token bucket atómico en Redis: HASH {tokens, ts}; usa el reloj de Redis para no depender de las instancias
+_LUA_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local ok = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  ok = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return ok
+"""
+
+
+class TokenBucketLocal:
+    """Token buckets en memoria (fallback por instancia cuando Redis no está disponible)."""
+
+    def __init__(self, max_claves: int = 10_000):
+        self.max_claves = max_claves
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def tomar(self, clave: str, rps: float, burst: float) -> bool:
+        ahora = time.monotonic()
+        tokens, ts = self._buckets.pop(clave, (burst, ahora))
+        tokens = min(burst, tokens + (ahora - ts) * rps)
+        ok = tokens >= 1
+        self._buckets[clave] = (tokens - 1 if ok else tokens, ahora)
+        if len(self._buckets) > self.max_claves:
+            self._buckets.popitem(last=False)
+        return ok
+
+
+class MetricasAdmision:
+    def __init__(self):
+        self.rechazos: Counter[tuple[str, str]] = Counter()
+
+    def rechazo(self, schema: str, motivo: str) -> None:
+        self.rechazos[(schema, motivo)] += 1
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        out: dict[str, dict[str, int]] = defaultdict(dict)
+        for (schema, motivo), n in self.rechazos.items():
+            out[schema][motivo] = n
+        return dict(out)
+
+
+metricas_admision = MetricasAdmision()
+
+
+# todas las peticiones que no corresponden a una ruta de la app comparten límite
+_SIN_RUTA = "(sin ruta)"
+
+
+class PlantillasRuta:
+    """
+    Plantilla de ruta (p. ej. '/v1/ordenes-compra/por-codigo/{codigo}') para cada path, resuelta una
+    vez por path (LRU acotado) contra los paths del OpenAPI de la app, en el orden en que los
+    registró: es la lista plana de rutas en todas las versiones de FastAPI.
+    """
+
+    def __init__(self, paths: dict[str, dict], max_claves: int = 10_000):
+        self.max_claves = max_claves
+        self._rutas = []
+        for plantilla, operaciones in paths.items():
+            metodos = {m.upper() for m in operaciones}
+            if "GET" in metodos:
+                metodos.add("HEAD")
+            self._rutas.append((compile_path(plantilla)[0], plantilla, frozenset(metodos)))
+        self._cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+
+    def plantilla(self, metodo: str, path: str) -> str:
+        clave = (metodo, path)
+        plantilla = self._cache.get(clave)
+        if plantilla is not None:
+            self._cache.move_to_end(clave)
+            return plantilla
+        plantilla = self._resolver(metodo, path)
+        self._cache[clave] = plantilla
+        if len(self._cache) > self.max_claves:
+            self._cache.popitem(last=False)
+        return plantilla
+
+    def _resolver(self, metodo: str, path: str) -> str:
+        otro_metodo = _SIN_RUTA
+        for regex, plantilla, metodos in self._rutas:
+            if regex.match(path):
+                if metodo in metodos:
+                    return plantilla
+                if otro_metodo == _SIN_RUTA:   # la ruta existe con otro método (405)
+                    otro_metodo = plantilla
+        return otro_metodo
+
+
+def ruta_normalizada(scope: Scope) -> str:
+    """
+    Ruta de la petición como 'MÉTODO plantilla' (p. ej. 'GET /v1/ordenes-compra/por-codigo/{codigo}')
+    para agrupar límites y logs: ningún valor del path crea claves nuevas.
+    """
+    app = scope.get("app")
+    if not hasattr(app, "openapi"):
+        return f"{scope['method']} {_SIN_RUTA}"
+    plantillas = getattr(app.state, "plantillas_ruta", None)
+    if plantillas is None:
+        plantillas = app.state.plantillas_ruta = PlantillasRuta(app.openapi().get("paths", {}))
+    return f"{scope['method']} {plantillas.plantilla(scope['method'], scope['path'])}"
+
+
+class AdmisionMiddleware:
+    """
+    Control de admisión por tenant (schema resuelto igual que `get_session`; los que no están en
+    `schemas` cuentan todos como "otro": el header no crea claves ni series de métricas nuevas):
+      - token bucket por (schema, ruta): en Redis para todas las instancias, local si Redis cae -> 429
+      - tope de peticiones concurrentes por schema en esta instancia -> 503
+      - si la espera media por conexión del pool supera `espera_pool_max_ms`, se descartan las
+        peticiones de los tenants que ya usan más de su parte justa de la concurrencia -> 503
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rps: float = 50,
+        burst: float = 100,
+        max_concurrencia: int = 32,
+        espera_pool_max_ms: float = 250,
+        metricas: Optional[MetricasAdmision] = None,
+        schemas: Optional[Iterable[str]] = None,
+    ):
+        self.app = app
+        self.rps = rps
+        self.burst = burst
+        self.max_concurrencia = max_concurrencia
+        self.espera_pool_max_s = espera_pool_max_ms / 1000
+        self.metricas = metricas or metricas_admision
+        self.schemas = frozenset(settings.KNOWN_SCHEMAS if schemas is None else schemas)
+        self.local = TokenBucketLocal()
+        self.en_curso: Counter[str] = Counter()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(_EXENTAS):
+            await self.app(scope, receive, send)
+            return
+
+        schema = resolver_schema(Headers(scope=scope).get(settings.COUNTRY_HEADER))
+        if schema not in self.schemas:
+            schema = "otro"
+        # primero el rate limit: una petición que se va a rechazar con 429 no ocupa cupo de concurrencia
+        if not await self._token(f"compras:{schema}:rl:{ruta_normalizada(scope)}"):
+            rechazo = 429, "rate_limit"
+        else:
+            # sin await entre la comprobación y la reserva del cupo para que sean consistentes
+            rechazo = self._admitir(schema)
+        if rechazo is None:
+            self.en_curso[schema] += 1
+            try:
+                await self.app(scope, receive, send)
+                return
+            finally:
+                self.en_curso[schema] -= 1
+                if not self.en_curso[schema]:
+                    del self.en_curso[schema]
+
+        status, motivo = rechazo
+        self.metricas.rechazo(schema, motivo)
+        log.warning("Petición rechazada (%s) para schema %s: %s %s", motivo, schema, scope["method"], scope["path"])
+        response = JSONResponse(
+            {"detail": "Demasiadas peticiones" if status == 429 else "Servicio saturado, reintente"},
+            status_code=status,
+            headers={"Retry-After": "1"},
+        )
+        await response(scope, receive, send)
+
+    def _admitir(self, schema: str) -> Optional[tuple[int, str]]:
+        en_curso = self.en_curso[schema]
+        if en_curso >= self.max_concurrencia:
+            return 503, "concurrencia"
+        if espera_pool.actual_s() > self.espera_pool_max_s:
+            activos = max(1, len(self.en_curso))
+            parte_justa = max(1, math.ceil(sum(self.en_curso.values()) / activos))
+            if en_curso >= parte_justa:
+                return 503, "pool_saturado"
+        return None
+
+    async def _token(self, clave: str) -> bool:
+        ok = await redis_op_async(
+            lambda r: r.eval(_LUA_TOKEN_BUCKET, 1, clave, self.rps, self.burst), None
+        )
+        if ok is None:
+            return self.local.tomar(clave, self.rps, self.burst)
+        return bool(ok)
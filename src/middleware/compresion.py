@@ -0,0 +1,98 @@
+import gzip
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+_COMPRIMIBLES = ("application/json", "text/", "application/xml", "application/javascript")
+# por encima de este tamaño se comprime fuera del event loop
+_UMBRAL_HILO = 256 * 1024
+
+
+def negociar(accept_encoding: str) -> Optional[str]:
+    """Elige 'br' o 'gzip' según Accept-Encoding (respetando q=0); None si no aplica."""
+    calidades: dict[str, float] = {}
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, params = parte.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if nombre:
+            calidades[nombre] = q
+    comodin = calidades.get("*", 0.0)
+    opciones = (["br"] if brotli is not None else []) + ["gzip"]
+    mejor = max(opciones, key=lambda c: calidades.get(c, comodin))
+    return mejor if calidades.get(mejor, comodin) > 0 else None
+
+
+class CompresionMiddleware:
+    """
+    Compresión gzip/brotli negociada para respuestas de una sola parte (las de FastAPI)
+    a partir de `minimo_bytes`. Las respuestas en streaming pasan sin comprimir.
+    """
+
+    def __init__(self, app: ASGIApp, minimo_bytes: int = 1024, nivel_gzip: int = 6, calidad_brotli: int = 4):
+        self.app = app
+        self.minimo_bytes = minimo_bytes
+        self.nivel_gzip = nivel_gzip
+        self.calidad_brotli = calidad_brotli
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codificacion = negociar(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio: Optional[Message] = None
+
+        async def enviar(message: Message) -> None:
+            nonlocal inicio
+            if message["type"] == "http.response.start":
+                inicio = message
+                return
+            if message["type"] != "http.response.body" or inicio is None:
+                await send(message)
+                return
+
+            start, inicio = inicio, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            tipo = headers.get("content-type", "")
+            if not tipo.startswith(_COMPRIMIBLES) or "content-encoding" in headers:
+                await send(start)
+                await send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if message.get("more_body", False) or len(body) < self.minimo_bytes:
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) >= _UMBRAL_HILO:
+                comprimido = await anyio.to_thread.run_sync(self._comprimir, codificacion, body)
+            else:
+                comprimido = self._comprimir(codificacion, body)
+            headers["Content-Encoding"] = codificacion
+            headers["Content-Length"] = str(len(comprimido))
+            await send(start)
+            await send({"type": "http.response.body", "body": comprimido, "more_body": False})
+
+        await self.app(scope, receive, enviar)
+
+    def _comprimir(self, codificacion: str, body: bytes) -> bytes:
+        if codificacion == "br":
+            return brotli.compress(body, quality=self.calidad_brotli)
+        return gzip.compress(body, compresslevel=self.nivel_gzip, mtime=0)
@@ -0,0 +1,71 @@
+import logging
+import re
+import time
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+from src.dependencies import resolver_schema
+from src.infrastructure.logs import contexto_log
+from src.middleware.admision import ruta_normalizada
+
+log = logging.getLogger("ms_compras.peticiones")
+
+# X-Cloud-Trace-Context: TRACE_ID/SPAN_ID;o=1   |   traceparent (W3C): 00-TRACE_ID-SPAN_ID-FLAGS
+_CLOUD_TRACE = re.compile(r"^([0-9a-fA-F]{32})(?:/(\d+))?")
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def _trace(headers: Headers) -> tuple[str | None, str | None]:
+    m = _CLOUD_TRACE.match(headers.get("x-cloud-trace-context", ""))
+    if m:
+        return m.group(1), m.group(2)
+    m = _TRACEPARENT.match(headers.get("traceparent", "").strip().lower())
+    if m:
+        return m.group(1), m.group(2)
+    return None, None
+
+
+class ContextoLogMiddleware:
+    """
+    Fija el contexto de logging de la petición (trace/span, request id, schema, ruta), devuelve el
+    request id en X-Request-ID y registra una línea por petición (candidata a muestreo por nivel).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        trace_id, span_id = _trace(headers)
+        request_id = headers.get("x-request-id") or trace_id or uuid.uuid4().hex
+        token = contexto_log.set({
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "request_id": request_id,
+            "schema": resolver_schema(headers.get(settings.COUNTRY_HEADER)),
+            "ruta": ruta_normalizada(scope),
+            "actor": headers.get(settings.ACTOR_HEADER),
+        })
+        status = 500
+
+        async def _send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            log.info("%s %s", status, scope["path"],
+                     extra={"status": status, "duracion_ms": round((time.perf_counter() - t0) * 1000, 2)})
+            contexto_log.reset(token)
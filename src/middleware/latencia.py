@@ -0,0 +1,48 @@
+import math
+import threading
+import time
+from collections import deque
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class RegistroLatencias:
+    """Ventana deslizante de duraciones de peticiones (últimas `max_muestras` dentro de `ventana_s`)."""
+
+    def __init__(self, max_muestras: int = 4096, ventana_s: float = 60):
+        self.ventana_s = ventana_s
+        self._muestras: deque[tuple[float, float]] = deque(maxlen=max_muestras)
+        self._lock = threading.Lock()
+
+    def registrar(self, segundos: float) -> None:
+        with self._lock:
+            self._muestras.append((time.monotonic(), segundos))
+
+    def percentil(self, p: float) -> float | None:
+        desde = time.monotonic() - self.ventana_s
+        with self._lock:
+            valores = sorted(d for t, d in self._muestras if t >= desde)
+        if not valores:
+            return None
+        return valores[min(len(valores) - 1, math.ceil(p * len(valores)) - 1)]
+
+
+latencias = RegistroLatencias()
+
+
+class LatenciaMiddleware:
+    """Registra la duración de cada petición HTTP (excepto las sondas) en `latencias`."""
+
+    def __init__(self, app: ASGIApp, registro: RegistroLatencias = latencias):
+        self.app = app
+        self.registro = registro
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in ("/health", "/ready"):
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.registro.registrar(time.perf_counter() - t0)
@@ -0,0 +1,17 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+class JSONRapida(JSONResponse):
+    """JSONResponse serializada con orjson cuando está instalado (fallback: json de stdlib)."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
@@ -1,8 +1,27 @@
-﻿from fastapi import APIRouter
+﻿from fastapi import APIRouter, Response
+from fastapi.concurrency import run_in_threadpool
 from src.config import settings
+from src.infrastructure.sondas import sondas
+from src.middleware.admision import metricas_admision
 
 router = APIRouter()
 
 @router.get('/health', tags=['meta'])
 async def health():
-    return {'status': 'ok', 'service': settings.SERVICE_NAME}
\ No newline at end of file
+    return {'status': 'ok', 'service': settings.SERVICE_NAME}
+
+@router.get('/ready', tags=['meta'])
+async def ready(response: Response):
+    """
+    Lista para recibir tráfico: BD accesible (con cupo en el pool) y tablas verificadas en todos
+    los schemas. Incluye latencias de BD/Redis, estado del pool y p99 reciente; se cachea unos segundos.
+    """
+    reporte = await run_in_threadpool(sondas.reporte)
+    if not reporte['ready']:
+        response.status_code = 503
+    return {'status': 'ready' if reporte['ready'] else 'not_ready', 'service': settings.SERVICE_NAME, **reporte}
+
+@router.get('/health/admision', tags=['meta'])
+async def admision():
+    """Peticiones rechazadas por el control de admisión, por schema y motivo."""
+    return {'rechazos': metricas_admision.snapshot()}
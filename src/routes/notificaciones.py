@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+
+from src.dependencies import get_read_session, get_session
+from src.domain import schemas
+from src.services.notificaciones import NotificacionService
+
+router = APIRouter(prefix="/v1/notificaciones", tags=["Notificaciones"])
+
+@router.get("/fallidas", response_model=List[schemas.NotificacionFallidaOut])
+def listar_fallidas(
+    proveedor_id: Optional[UUID] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_session)
+):
+    """Webhooks descartados tras agotar los reintentos (o rechazados por el proveedor)."""
+    return NotificacionService(db).fallidas(proveedor_id, limit, offset)
+
+@router.post("/fallidas/{notificacion_id}/reintentar", status_code=status.HTTP_202_ACCEPTED)
+def reintentar_fallida(notificacion_id: UUID, db: Session = Depends(get_session)):
+    """Devuelve la notificación a la cola con la URL actual del proveedor."""
+    try:
+        notificacion = NotificacionService(db).reintentar(notificacion_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Notificación no encontrada")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"id": str(notificacion.id)}
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
-from src.dependencies import get_session
+from src.config import settings
+from src.dependencies import get_read_session, get_session
 from src.domain import schemas
+from src.errors import ConflictError
+from src.http_cache import Validador, es_condicional
+from src.infrastructure import auditoria
+from src.services import lecturas
 from src.services.orden_compra import OrdenCompraService
 
 router = APIRouter(prefix="/v1/ordenes-compra", tags=["OrdenesCompra"])
@@ -24,6 +31,11 @@ def crear_oc(payload: schemas.OrdenCompraCreate, db: Session = Depends(get_sessi
         # carga eager items para respuesta
         oc.items  # accede para materializar
         return oc
+    except ConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except IntegrityError:
+        # otra petición tomó el mismo código entre la verificación y el INSERT
+        raise HTTPException(status_code=409, detail="Ya existe una orden de compra con ese código")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -31,23 +43,98 @@ def crear_oc(payload: schemas.OrdenCompraCreate, db: Session = Depends(get_sessi
 
 @router.get("", response_model=List[schemas.OrdenCompraOut])
 def listar_oc(
+    request: Request,
+    response: Response,
     proveedor_id: Optional[UUID] = Query(None),
     estado: Optional[str] = Query(None, description="ABIERTA|ENVIADA|PARCIAL|COMPLETA|CANCELADA"),
     q: Optional[str] = Query(None, description="búsqueda por código"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     svc = OrdenCompraService(db)
-    return svc.listar(proveedor_id, estado, q, limit, offset)
+    if es_condicional(request, lista=True):
+        validador = Validador.de_lista(svc.versiones(proveedor_id, estado, q, limit, offset))
+        if validador.coincide(request):
+            return validador.no_modificado()
+    ocs = svc.listar(proveedor_id, estado, q, limit, offset)
+    Validador.de_lista((oc.id, oc.actualizado_en) for oc in ocs).aplicar(response)
+    return ocs
+
+@router.get("/pendientes", response_model=List[schemas.PendienteProductoOut])
+def pendientes_por_producto(
+    producto_id: List[UUID] = Query(..., min_length=1, max_length=500, description="producto_id repetido por producto"),
+    db: Session = Depends(get_read_session)
+):
+    """Cantidad ya pedida (OCs ABIERTA/ENVIADA/PARCIAL) de cada producto solicitado."""
+    pendientes = OrdenCompraService(db).pendientes_por_producto(producto_id)
+    return [{"producto_id": pid, "cantidad": cantidad} for pid, cantidad in pendientes.items()]
+
+@router.get("/resumen", response_model=schemas.ResumenOrdenesOut)
+def resumen_oc(
+    proveedor_id: Optional[UUID] = Query(None),
+    desde: Optional[datetime] = Query(None, description="creadas desde (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="creadas hasta (exclusive)"),
+    db: Session = Depends(get_read_session)
+):
+    """Órdenes y monto total por estado, en la moneda base (total_base guardado al crear cada OC)."""
+    por_estado = OrdenCompraService(db).resumen(proveedor_id, desde, hasta)
+    return {"moneda_base": settings.MONEDA_BASE, "por_estado": por_estado}
 
 @router.get("/{oc_id}", response_model=schemas.OrdenCompraOut)
-def obtener_oc(oc_id: UUID = Path(...), db: Session = Depends(get_session)):
+def obtener_oc(request: Request, response: Response, oc_id: UUID = Path(...), db: Session = Depends(get_read_session)):
+    if "obtener_oc" in settings.LECTURAS_DIRECTAS:
+        if es_condicional(request):
+            # sólo la versión: la OC con sus items se lee si el cliente no la tiene
+            validador = Validador.de_recurso(oc_id, lecturas.version_oc(db, oc_id))
+            if validador and validador.coincide(request):
+                return validador.no_modificado()
+        oc = lecturas.orden_compra(db, oc_id)
+        if oc is None:
+            raise HTTPException(status_code=404, detail="Orden de compra no encontrada")
+        validador = Validador.de_recurso(oc["id"], oc["actualizado_en"])
+        if validador:
+            if validador.coincide(request):
+                return validador.no_modificado()
+            validador.aplicar(response)
+        return oc
+
     svc = OrdenCompraService(db)
+    if es_condicional(request):
+        validador = Validador.de_recurso(oc_id, svc.version(oc_id))
+        if validador and validador.coincide(request):
+            return validador.no_modificado()
     oc = svc.obtener(oc_id)
     if not oc:
         raise HTTPException(status_code=404, detail="Orden de compra no encontrada")
     oc.items
+    validador = Validador.de_recurso(oc.id, oc.actualizado_en)
+    if validador:
+        validador.aplicar(response)
+    return oc
+
+@router.get("/{oc_id}/historial", response_model=List[schemas.AuditoriaOut])
+def historial_oc(
+    oc_id: UUID = Path(...),
+    antes_de: Optional[int] = Query(None, description="id del último cambio de la página anterior"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_session)
+):
+    """Cambios de la OC y de sus items, del más reciente hacia atrás (también de OCs archivadas o eliminadas)."""
+    return auditoria.historial(db, "orden_compra", oc_id, antes_de, limit)
+
+@router.get("/por-codigo/{codigo}", response_model=schemas.OrdenCompraOut)
+def obtener_oc_por_codigo(request: Request, response: Response, codigo: str = Path(..., max_length=32),
+                          db: Session = Depends(get_read_session)):
+    oc = OrdenCompraService(db).obtener_por_codigo(codigo)
+    if not oc:
+        raise HTTPException(status_code=404, detail="Orden de compra no encontrada")
+    validador = Validador.de_recurso(oc.id, oc.actualizado_en)
+    if validador:
+        if validador.coincide(request):
+            return validador.no_modificado()
+        validador.aplicar(response)
+    oc.items
     return oc
 
 @router.post("/{oc_id}/marcar-enviada", response_model=schemas.OrdenCompraOut)
@@ -78,6 +165,24 @@ def cancelar_oc(oc_id: UUID, db: Session = Depends(get_session)):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.patch("/{oc_id}/items", response_model=schemas.OrdenCompraOut)
+def enmendar_oc(payload: schemas.OrdenCompraEnmienda, oc_id: UUID = Path(...), db: Session = Depends(get_session)):
+    """Agrega, modifica (sólo los campos enviados) y quita items de una OC ABIERTA en una sola transacción."""
+    svc = OrdenCompraService(db)
+    try:
+        oc = svc.enmendar(
+            oc_id,
+            agregar=[it.model_dump() for it in payload.agregar],
+            modificar=[it.model_dump(exclude_unset=True) for it in payload.modificar],
+            quitar=payload.quitar,
+        )
+        oc.items
+        return oc
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Orden de compra no encontrada")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.delete("/{oc_id}", status_code=status.HTTP_204_NO_CONTENT)
 def eliminar_oc(oc_id: UUID, db: Session = Depends(get_session)):
     svc = OrdenCompraService(db)
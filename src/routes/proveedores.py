@@ -1,11 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+import codecs
+from functools import lru_cache
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Integer, Select, bindparam, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from uuid import UUID
 
-from src.dependencies import get_session
+from src.config import settings
+from src.dependencies import get_read_session, get_session
 from src.domain.models import Proveedor, ProductoProveedor
 from src.domain import schemas
+from src.http_cache import Validador, es_condicional
+from src.infrastructure import auditoria
+from src.infrastructure.infrastructure import al_confirmar, schema_de
+from src.services import lecturas
+from src.services.catalogo import CatalogoService
+from src.services.catalogo_cache import catalogo_cache
+from src.services.importacion import ImportacionProveedores, LectorCSV, fila_ndjson
+from src.services.proveedor import ProveedorService
 
 router = APIRouter(prefix="/v1/proveedores", tags=["Proveedores"])
 
@@ -33,34 +47,170 @@ def crear_proveedor(payload: schemas.ProveedorCreate, db: Session = Depends(get_
     return obj
 
 
+async def _lineas(request: Request) -> AsyncIterator[str]:
+    """Líneas del cuerpo a medida que llega (sin cargarlo completo en memoria)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    resto = ""
+    async for chunk in request.stream():
+        resto += decoder.decode(chunk)
+        *completas, resto = resto.split("\n")
+        for linea in completas:
+            yield linea.rstrip("\r")
+    resto += decoder.decode(b"", final=True)
+    if resto:
+        yield resto.rstrip("\r")
+
+
+@router.post("/importar", response_model=schemas.ImportacionProveedoresOut)
+async def importar_proveedores(request: Request, db: Session = Depends(get_session)):
+    """
+    Alta masiva de proveedores desde CSV con cabecera (text/csv) o NDJSON (application/x-ndjson),
+    leídos en streaming y procesados en lotes de IMPORTACION_LOTE filas. Los (documento, pais)
+    repetidos en el archivo o ya existentes no se insertan; la respuesta trae el resultado por fila.
+    """
+    tipo = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if tipo == "text/csv":
+        lector = LectorCSV()
+        parsear = lector.alimentar
+    elif tipo in ("application/x-ndjson", "application/jsonl"):
+        parsear = fila_ndjson
+    else:
+        raise HTTPException(status_code=415, detail="Use text/csv o application/x-ndjson")
+
+    svc = ImportacionProveedores(db)
+    resultados: list[dict] = []
+    lote: list = []
+    n = 0
+    async for linea in _lineas(request):
+        try:
+            fila = parsear(linea)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Registro {n + 1} mal formado: {e}")
+        if fila is None:
+            continue
+        n += 1
+        lote.append(fila)
+        if len(lote) >= settings.IMPORTACION_LOTE:
+            resultados += await run_in_threadpool(svc.importar_lote, lote, n - len(lote) + 1)
+            lote = []
+    if lote:
+        resultados += await run_in_threadpool(svc.importar_lote, lote, n - len(lote) + 1)
+
+    conteo = {estado: 0 for estado in ("creado", "existente", "duplicado", "invalido")}
+    for r in resultados:
+        conteo[r["estado"]] += 1
+    return {
+        "creados": conteo["creado"], "existentes": conteo["existente"],
+        "duplicados": conteo["duplicado"], "invalidos": conteo["invalido"],
+        "resultados": resultados,
+    }
+
+
+# Consultas de listado construidas una vez por combinación de filtros y reutilizadas con parámetros:
+# su cache key queda memorizada y la compilación sale del cache del engine (la misma para todos los tenants).
+_LIMIT = bindparam("limit", type_=Integer)
+_OFFSET = bindparam("offset", type_=Integer)
+
+
+@lru_cache(maxsize=None)
+def _consulta_proveedores(solo_versiones: bool, por_texto: bool, por_pais: bool, por_activo: bool) -> Select:
+    stmt = select(Proveedor.id, Proveedor.actualizado_en) if solo_versiones else select(Proveedor)
+    stmt = stmt.where(Proveedor.eliminado_en.is_(None))
+    if por_texto:
+        stmt = stmt.where(Proveedor.nombre.ilike(bindparam("like")) | Proveedor.documento.ilike(bindparam("like")))
+    if por_pais:
+        stmt = stmt.where(Proveedor.pais == bindparam("pais"))
+    if por_activo:
+        stmt = stmt.where(Proveedor.activo == bindparam("activo"))
+    return stmt.order_by(Proveedor.nombre.asc()).offset(_OFFSET).limit(_LIMIT)
+
+
+def _pagina_proveedores(solo_versiones: bool, q: Optional[str], pais: Optional[str], activo: Optional[bool],
+                        limit: int, offset: int) -> tuple[Select, dict]:
+    stmt = _consulta_proveedores(solo_versiones, bool(q), bool(pais), activo is not None)
+    params = {"pais": pais, "activo": activo, "limit": limit, "offset": offset}
+    if q:
+        params["like"] = f"%{q.strip()}%"
+    return stmt, params
+
+
+@lru_cache(maxsize=None)
+def _consulta_productos_de_proveedor(por_activo: bool) -> Select:
+    stmt = select(ProductoProveedor).where(ProductoProveedor.proveedor_id == bindparam("proveedor_id"))
+    if por_activo:
+        stmt = stmt.where(ProductoProveedor.activo == bindparam("activo"))
+    return stmt.order_by(ProductoProveedor.producto_id.asc())
+
+
 @router.get("", response_model=List[schemas.ProveedorOut])
 def listar_proveedores(
+    request: Request,
+    response: Response,
     q: Optional[str] = Query(None, description="Búsqueda por nombre/documento"),
     pais: Optional[str] = Query(None, min_length=2, max_length=2),
     activo: Optional[bool] = Query(None),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
-    query = db.query(Proveedor)
-    if q:
-        like = f"%{q.strip()}%"
-        query = query.filter((Proveedor.nombre.ilike(like)) | (Proveedor.documento.ilike(like)))
-    if pais:
-        query = query.filter(Proveedor.pais == pais)
-    if activo is not None:
-        query = query.filter(Proveedor.activo == activo)
-    return query.order_by(Proveedor.nombre.asc()).offset(offset).limit(limit).all()
+    if es_condicional(request, lista=True):
+        # sólo (id, actualizado_en) de la página: sin hidratar ni serializar proveedores
+        versiones = db.execute(*_pagina_proveedores(True, q, pais, activo, limit, offset)).all()
+        validador = Validador.de_lista(versiones)
+        if validador.coincide(request):
+            return validador.no_modificado()
+
+    rows = list(db.scalars(*_pagina_proveedores(False, q, pais, activo, limit, offset)))
+    Validador.de_lista((p.id, p.actualizado_en) for p in rows).aplicar(response)
+    return rows
 
 
 @router.get("/{proveedor_id}", response_model=schemas.ProveedorOut)
-def obtener_proveedor(proveedor_id: UUID = Path(...), db: Session = Depends(get_session)):
+def obtener_proveedor(
+    request: Request,
+    response: Response,
+    proveedor_id: UUID = Path(...),
+    db: Session = Depends(get_read_session)
+):
+    if "obtener_proveedor" in settings.LECTURAS_DIRECTAS:
+        prov = lecturas.proveedor(db, proveedor_id)
+        if prov is None:
+            raise HTTPException(status_code=404, detail="Proveedor no encontrado")
+        validador = Validador.de_recurso(prov["id"], prov["actualizado_en"])
+        if validador:
+            if validador.coincide(request):
+                return validador.no_modificado()
+            validador.aplicar(response)
+        return prov
+
+    if es_condicional(request):
+        actualizado_en = db.query(Proveedor.actualizado_en).filter(
+            Proveedor.id == proveedor_id, Proveedor.eliminado_en.is_(None)
+        ).scalar()
+        validador = Validador.de_recurso(proveedor_id, actualizado_en)
+        if validador and validador.coincide(request):
+            return validador.no_modificado()
+
     obj = db.get(Proveedor, proveedor_id)
-    if not obj:
+    if not obj or obj.eliminado_en is not None:
         raise HTTPException(status_code=404, detail="Proveedor no encontrado")
+    validador = Validador.de_recurso(obj.id, obj.actualizado_en)
+    if validador:
+        validador.aplicar(response)
     return obj
 
 
+@router.get("/{proveedor_id}/historial", response_model=List[schemas.AuditoriaOut])
+def historial_proveedor(
+    proveedor_id: UUID = Path(...),
+    antes_de: Optional[int] = Query(None, description="id del último cambio de la página anterior"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_session)
+):
+    """Cambios del proveedor y de su catálogo (precios, términos), del más reciente hacia atrás."""
+    return auditoria.historial(db, "proveedor", proveedor_id, antes_de, limit)
+
+
 @router.patch("/{proveedor_id}", response_model=schemas.ProveedorOut)
 def actualizar_proveedor(
     proveedor_id: UUID,
@@ -68,7 +218,7 @@ def actualizar_proveedor(
     db: Session = Depends(get_session)
 ):
     obj = db.get(Proveedor, proveedor_id)
-    if not obj:
+    if not obj or obj.eliminado_en is not None:
         raise HTTPException(status_code=404, detail="Proveedor no encontrado")
 
     # ✅ dump parcial seguro (solo campos enviados) y JSON-friendly
@@ -97,12 +247,17 @@ def actualizar_proveedor(
 
 
 @router.delete("/{proveedor_id}", status_code=status.HTTP_204_NO_CONTENT)
-def eliminar_proveedor(proveedor_id: UUID, db: Session = Depends(get_session)):
-    obj = db.get(Proveedor, proveedor_id)
-    if not obj:
+def eliminar_proveedor(
+    proveedor_id: UUID,
+    definitivo: bool = Query(False, description="Borrar la fila y su catálogo (sólo proveedores sin OCs)"),
+    db: Session = Depends(get_session)
+):
+    try:
+        ProveedorService(db).eliminar(proveedor_id, definitivo)
+    except LookupError:
         raise HTTPException(status_code=404, detail="Proveedor no encontrado")
-    db.delete(obj)
-    db.commit()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return None
 
 
@@ -114,7 +269,7 @@ def asociar_producto(
     db: Session = Depends(get_session)
 ):
     prov = db.get(Proveedor, proveedor_id)
-    if not prov:
+    if not prov or prov.eliminado_en is not None:
         raise HTTPException(status_code=404, detail="Proveedor no encontrado")
 
     rel = db.get(ProductoProveedor, {"proveedor_id": proveedor_id, "producto_id": payload.producto_id})
@@ -127,24 +282,45 @@ def asociar_producto(
         db.add(rel)
 
     db.commit()
+    al_confirmar(db, lambda: catalogo_cache.invalidar(schema_de(db)))
     db.refresh(rel)
     return rel
 
 
+@router.put("/{proveedor_id}/productos", response_model=schemas.SincronizacionCatalogoOut)
+def sincronizar_catalogo(
+    proveedor_id: UUID,
+    payload: List[schemas.ProductoProveedorIn],
+    db: Session = Depends(get_session)
+):
+    """
+    Reemplaza el catálogo del proveedor por la lista completa recibida: sólo se escriben
+    las diferencias y los productos ausentes quedan inactivos.
+    """
+    svc = CatalogoService(db)
+    try:
+        return svc.sincronizar(proveedor_id, [it.model_dump() for it in payload])
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Proveedor no encontrado")
+    except IntegrityError:
+        # otra sincronización del mismo proveedor asignó el SKU entre la lectura y la escritura
+        raise HTTPException(status_code=409, detail="sku_proveedor en uso por otro producto del proveedor")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{proveedor_id}/productos", response_model=List[schemas.ProductoProveedorOut])
 def listar_productos_de_proveedor(
     proveedor_id: UUID,
     activo: Optional[bool] = Query(None),
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     prov = db.get(Proveedor, proveedor_id)
-    if not prov:
+    if not prov or prov.eliminado_en is not None:
         raise HTTPException(status_code=404, detail="Proveedor no encontrado")
 
-    q = db.query(ProductoProveedor).filter(ProductoProveedor.proveedor_id == proveedor_id)
-    if activo is not None:
-        q = q.filter(ProductoProveedor.activo == activo)
-    return q.order_by(ProductoProveedor.producto_id.asc()).all()
+    stmt = _consulta_productos_de_proveedor(activo is not None)
+    return list(db.scalars(stmt, {"proveedor_id": proveedor_id, "activo": activo}))
 
 
 @router.delete("/{proveedor_id}/productos/{producto_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -158,6 +334,7 @@ def desasociar_producto(
         raise HTTPException(status_code=404, detail="Relación no encontrada")
     db.delete(rel)
     db.commit()
+    al_confirmar(db, lambda: catalogo_cache.invalidar(schema_de(db)))
     return None
 
 
@@ -168,49 +345,10 @@ def listar_proveedores_por_producto(
     activo_proveedor: Optional[bool] = Query(None, description="Filtrar por proveedor activo/inactivo"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     """
     Devuelve los proveedores que abastecen el producto indicado,
     incluyendo los términos de compra (precio, sku_proveedor, lead time, etc.).
     """
-    q = (
-        db.query(ProductoProveedor, Proveedor)
-        .join(Proveedor, ProductoProveedor.proveedor_id == Proveedor.id)
-        .filter(ProductoProveedor.producto_id == producto_id)
-    )
-
-    if activo_relacion is not None:
-        q = q.filter(ProductoProveedor.activo == activo_relacion)
-    if activo_proveedor is not None:
-        q = q.filter(Proveedor.activo == activo_proveedor)
-
-    rows = q.order_by(Proveedor.nombre.asc()).offset(offset).limit(limit).all()
-
-    resultado: List[schemas.ProveedorParaProductoOut] = []
-    for rel, prov in rows:
-        resultado.append(
-            schemas.ProveedorParaProductoOut(
-                id=prov.id,
-                nombre=prov.nombre,
-                tipo_de_persona=prov.tipo_de_persona,
-                documento=prov.documento,
-                tipo_documento=prov.tipo_documento,
-                pais=prov.pais,
-                direccion=prov.direccion,
-                telefono=prov.telefono,
-                email=prov.email,
-                pagina_web=prov.pagina_web,
-                activo=prov.activo,
-                terminos=schemas.TerminosCompraOut(
-                    sku_proveedor=rel.sku_proveedor,
-                    precio=float(rel.precio) if rel.precio is not None else None,
-                    moneda=rel.moneda,
-                    lead_time_dias=rel.lead_time_dias,
-                    lote_minimo=rel.lote_minimo,
-                    activo=rel.activo,
-                ),
-            )
-        )
-
-    return resultado
\ No newline at end of file
+    return lecturas.proveedores_por_producto(db, producto_id, activo_relacion, activo_proveedor, limit, offset)
\ No newline at end of file
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from src.dependencies import get_read_session, get_session
+from src.domain import schemas
+from src.services.tasas_cambio import TasaCambioService
+
+router = APIRouter(prefix="/v1/tasas-cambio", tags=["TasasCambio"])
+
+@router.post("", response_model=schemas.TasaCambioOut, status_code=status.HTTP_201_CREATED)
+def registrar_tasa(payload: schemas.TasaCambioCreate, db: Session = Depends(get_session)):
+    """Registra la tasa de una moneda a la moneda base desde `vigente_desde` (corrige si ya existe)."""
+    try:
+        return TasaCambioService(db).registrar(payload.moneda, payload.tasa, payload.vigente_desde)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("", response_model=List[schemas.TasaCambioOut])
+def listar_tasas(
+    moneda: Optional[str] = Query(None, min_length=3, max_length=3),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_session)
+):
+    return TasaCambioService(db).listar(moneda, limit, offset)
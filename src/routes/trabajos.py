@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+
+from src.dependencies import get_primary_read_session, get_read_session, get_session
+from src.domain import schemas
+from src.domain.models import Trabajo
+from src.services.trabajos import ejecutor_trabajos
+
+router = APIRouter(prefix="/v1/trabajos", tags=["Trabajos"])
+
+@router.post("", response_model=schemas.TrabajoOut, status_code=status.HTTP_202_ACCEPTED)
+def crear_trabajo(payload: schemas.TrabajoCreate, db: Session = Depends(get_session)):
+    """Encola un trabajo (recalcular_totales, repreciar_abiertas, normalizar_totales); el avance se consulta con GET."""
+    try:
+        return ejecutor_trabajos.crear(db, payload.tipo, payload.parametros)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("", response_model=List[schemas.TrabajoOut])
+def listar_trabajos(
+    estado: Optional[str] = Query(None, description="PENDIENTE|EN_CURSO|COMPLETADO|CANCELADO|FALLIDO"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_session)
+):
+    q = db.query(Trabajo)
+    if estado:
+        q = q.filter(Trabajo.estado == estado)
+    return q.order_by(Trabajo.creado_en.desc()).offset(offset).limit(limit).all()
+
+@router.get("/{trabajo_id}", response_model=schemas.TrabajoOut)
+def obtener_trabajo(trabajo_id: UUID = Path(...), db: Session = Depends(get_primary_read_session)):
+    # primario: el progreso cambia en cada lote y una réplica lo mostraría atrasado
+    trabajo = db.get(Trabajo, trabajo_id)
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+@router.post("/{trabajo_id}/cancelar", response_model=schemas.TrabajoOut)
+def cancelar_trabajo(trabajo_id: UUID, db: Session = Depends(get_session)):
+    try:
+        return ejecutor_trabajos.cancelar(db, trabajo_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -0,0 +1,77 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, delete, exists, func, insert, literal, select
+from sqlalchemy.orm import Session
+import logging
+
+from src.domain.models import OrdenCompra, ItemOrdenCompra, OrdenCompraArchivo, ItemOrdenCompraArchivo
+
+log = logging.getLogger(__name__)
+
+ESTADOS_ARCHIVABLES = ("COMPLETA", "CANCELADA")
+
+_COLUMNAS_OC = [c.name for c in OrdenCompra.__table__.columns]
+_COLUMNAS_ITEM = [c.name for c in ItemOrdenCompra.__table__.columns]
+
+
+def corte_por_meses(meses: int, ahora: datetime | None = None) -> datetime:
+    """Fecha límite de archivo: `meses` de 30 días antes de `ahora`."""
+    return (ahora or datetime.utcnow()) - timedelta(days=30 * meses)
+
+
+def _codigo_archivado():
+    return exists().where(OrdenCompraArchivo.codigo == OrdenCompra.codigo)
+
+
+class ArchivoService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def archivar_lote(self, antes_de: datetime, lote: int = 500) -> int:
+        """
+        Mueve a las tablas de archivo hasta `lote` OCs COMPLETA/CANCELADA sin cambios desde
+        `antes_de` (actualizado_en: fecha de cierre), con sus items. Devuelve cuántas movió;
+        el llamador repite en transacciones cortas hasta que devuelva 0.
+
+        Las OCs cuyo código ya está en el archivo (codigo es único allí) se quedan en la tabla
+        viva: no se toman en el lote, así no hacen fallar el INSERT ... SELECT en cada corrida.
+        """
+        archivables = (
+            OrdenCompra.estado.in_(ESTADOS_ARCHIVABLES),
+            OrdenCompra.actualizado_en < antes_de,
+        )
+        ids = (
+            self.db.execute(
+                select(OrdenCompra.id)
+                .where(*archivables, ~_codigo_archivado())
+                .order_by(OrdenCompra.actualizado_en)
+                .limit(lote)
+                .with_for_update(skip_locked=True)
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            retenidas = self.db.scalar(select(func.count()).select_from(OrdenCompra).where(*archivables, _codigo_archivado()))
+            if retenidas:
+                log.warning("%s OCs archivables retenidas: su código ya existe en el archivo", retenidas)
+            return 0
+
+        # INSERT ... SELECT en el servidor: las filas no pasan por la aplicación
+        self.db.execute(
+            insert(OrdenCompraArchivo).from_select(
+                [*_COLUMNAS_OC, "archivado_en"],
+                select(*(OrdenCompra.__table__.c[c] for c in _COLUMNAS_OC), literal(datetime.utcnow(), DateTime))
+                .where(OrdenCompra.id.in_(ids)),
+            )
+        )
+        self.db.execute(
+            insert(ItemOrdenCompraArchivo).from_select(
+                _COLUMNAS_ITEM,
+                select(*(ItemOrdenCompra.__table__.c[c] for c in _COLUMNAS_ITEM)).where(ItemOrdenCompra.oc_id.in_(ids)),
+            )
+        )
+        self.db.execute(delete(ItemOrdenCompra).where(ItemOrdenCompra.oc_id.in_(ids)).execution_options(synchronize_session=False))
+        self.db.execute(delete(OrdenCompra).where(OrdenCompra.id.in_(ids)).execution_options(synchronize_session=False))
+        self.db.commit()
+        return len(ids)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from src.domain.models import Proveedor, ProductoProveedor
+from src.infrastructure import auditoria
+from src.infrastructure.infrastructure import al_confirmar, schema_de
+from src.services.catalogo_cache import catalogo_cache
+
+# columnas de términos comparadas para decidir si una fila cambió
+CAMPOS_TERMINOS = ("sku_proveedor", "precio", "moneda", "lead_time_dias", "lote_minimo", "activo")
+
+_CUATRO_DECIMALES = Decimal("0.0001")
+
+
+def _precio(v) -> Optional[Decimal]:
+    # misma escala que Numeric(14, 4) para no ver cambios donde sólo difiere la representación
+    return None if v is None else Decimal(str(v)).quantize(_CUATRO_DECIMALES)
+
+
+def _normalizar(it: dict) -> dict:
+    return {
+        "sku_proveedor": it.get("sku_proveedor"),
+        "precio": _precio(it.get("precio")),
+        "moneda": it.get("moneda"),
+        "lead_time_dias": it.get("lead_time_dias"),
+        "lote_minimo": it.get("lote_minimo"),
+        "activo": True if it.get("activo") is None else it["activo"],
+    }
+
+
+class CatalogoService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def sincronizar(self, proveedor_id: UUID, items: list[dict]) -> dict[str, int]:
+        """
+        Aplica un snapshot completo del catálogo del proveedor: inserta los productos nuevos,
+        actualiza sólo los que cambiaron y desactiva (activo=False, sin sku_proveedor) los que ya
+        no vienen. Las filas sin cambios no se tocan.
+        """
+        prov = self.db.get(Proveedor, proveedor_id)
+        if not prov or prov.eliminado_en is not None:
+            raise LookupError("Proveedor no encontrado")
+
+        snapshot: dict[UUID, dict] = {}
+        skus: set[str] = set()
+        for it in items:
+            if it["producto_id"] in snapshot:
+                raise ValueError(f"Producto duplicado en el catálogo: {it['producto_id']}")
+            terminos = _normalizar(it)
+            sku = terminos["sku_proveedor"]
+            if sku is not None:
+                if sku in skus:
+                    raise ValueError(f"sku_proveedor duplicado en el catálogo: {sku}")
+                skus.add(sku)
+            snapshot[it["producto_id"]] = terminos
+
+        actuales = {
+            r.producto_id: r
+            for r in self.db.query(ProductoProveedor.producto_id, *(getattr(ProductoProveedor, c) for c in CAMPOS_TERMINOS))
+            .filter(ProductoProveedor.proveedor_id == proveedor_id)
+            .all()
+        }
+
+        inserts, updates, sin_cambios = [], [], 0
+        for producto_id, terminos in snapshot.items():
+            actual = actuales.get(producto_id)
+            if actual is None:
+                inserts.append({"proveedor_id": proveedor_id, "producto_id": producto_id, **terminos})
+                continue
+            cambios = {
+                c: v for c, v in terminos.items()
+                if (_precio(getattr(actual, c)) if c == "precio" else getattr(actual, c)) != v
+            }
+            if cambios:
+                updates.append({"proveedor_id": proveedor_id, "producto_id": producto_id, **cambios})
+                auditoria.registrar(self.db, "proveedor", proveedor_id, ProductoProveedor.__tablename__, producto_id,
+                                    "U", {c: (getattr(actual, c), v) for c, v in cambios.items()})
+            else:
+                sin_cambios += 1
+        # los que salen del catálogo sueltan también su SKU (puede pasar a otro producto)
+        fuera = {pid: r for pid, r in actuales.items() if pid not in snapshot and (r.activo or r.sku_proveedor)}
+        desactivar = [pid for pid, r in fuera.items() if r.activo]
+        # SKUs que cambian de producto: se liberan antes de reasignarlos, así un intercambio entre
+        # dos productos no choca con uq_cat_prov_sku a mitad del UPDATE
+        liberar = [u["producto_id"] for u in updates
+                   if "sku_proveedor" in u and actuales[u["producto_id"]].sku_proveedor is not None]
+
+        # el unit of work no ve estas escrituras: se anotan a mano en el historial
+        for fila in inserts:
+            auditoria.registrar(self.db, "proveedor", proveedor_id, ProductoProveedor.__tablename__,
+                                fila["producto_id"], "I", fila)
+        for producto_id, r in fuera.items():
+            cambios = {"activo": (True, False)} if r.activo else {}
+            if r.sku_proveedor is not None:
+                cambios["sku_proveedor"] = (r.sku_proveedor, None)
+            auditoria.registrar(self.db, "proveedor", proveedor_id, ProductoProveedor.__tablename__,
+                                producto_id, "U", cambios)
+
+        # orden sin conflictos de SKU: liberar, sacar del catálogo, actualizar e insertar
+        if liberar:
+            self._actualizar(proveedor_id, liberar, sku_proveedor=None)
+        if fuera:
+            self._actualizar(proveedor_id, list(fuera), activo=False, sku_proveedor=None)
+        if updates:
+            # bulk UPDATE por primary key (executemany)
+            self.db.execute(update(ProductoProveedor), updates)
+        if inserts:
+            self.db.execute(insert(ProductoProveedor), inserts)
+
+        if inserts or updates or fuera:
+            self.db.commit()
+            schema = schema_de(self.db)
+            al_confirmar(self.db, lambda: catalogo_cache.invalidar(schema))
+
+        return {
+            "insertados": len(inserts),
+            "actualizados": len(updates),
+            "desactivados": len(desactivar),
+            "sin_cambios": sin_cambios,
+        }
+
+    def _actualizar(self, proveedor_id: UUID, productos: list[UUID], **valores) -> None:
+        self.db.execute(
+            update(ProductoProveedor)
+            .where(ProductoProveedor.proveedor_id == proveedor_id, ProductoProveedor.producto_id.in_(productos))
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,143 @@
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, Optional
+from uuid import UUID
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.domain.models import ProductoProveedor
+from src.infrastructure.infrastructure import schema_de
+from src.infrastructure.versiones import VersionCompartida
+
+
+@dataclass(frozen=True, slots=True)
+class TerminosCatalogo:
+    producto_id: UUID
+    sku_proveedor: Optional[str]
+    precio: Optional[Decimal]
+    moneda: Optional[str]
+    lead_time_dias: Optional[int]
+    lote_minimo: Optional[int]
+    activo: bool
+
+
+_COLUMNAS = (
+    ProductoProveedor.producto_id,
+    ProductoProveedor.sku_proveedor,
+    ProductoProveedor.precio,
+    ProductoProveedor.moneda,
+    ProductoProveedor.lead_time_dias,
+    ProductoProveedor.lote_minimo,
+    ProductoProveedor.activo,
+)
+
+
+def _terminos(row) -> TerminosCatalogo:
+    return TerminosCatalogo(
+        producto_id=row.producto_id,
+        sku_proveedor=row.sku_proveedor,
+        precio=row.precio,
+        moneda=row.moneda,
+        lead_time_dias=row.lead_time_dias,
+        lote_minimo=row.lote_minimo,
+        activo=row.activo,
+    )
+
+
+class _SnapshotSchema:
+    def __init__(self, version: str):
+        self.version = version
+        # proveedor_id -> (cargado_en, {producto_id: TerminosCatalogo}); orden LRU
+        self.proveedores: OrderedDict[UUID, tuple[float, dict[UUID, TerminosCatalogo]]] = OrderedDict()
+
+
+class CatalogoCache:
+    """
+    Índice en memoria proveedor -> producto -> términos, por tenant (schema).
+
+    El catálogo de cada proveedor se carga completo la primera vez que se consulta y se
+    reutiliza mientras no cambie la versión del catálogo del schema (ver `invalidar`).
+    Si un producto no aparece en el snapshot se consulta la BD antes de darlo por inválido.
+    """
+
+    def __init__(self, max_proveedores: int, ttl_s: float):
+        self.max_proveedores = max_proveedores
+        self.ttl_s = ttl_s
+        self.version = VersionCompartida("catalogo")
+        self._schemas: dict[str, _SnapshotSchema] = {}
+        self._lock = threading.Lock()
+
+    def terminos(self, db: Session, proveedor_id: UUID, producto_ids: Iterable[UUID]) -> dict[UUID, TerminosCatalogo]:
+        """
+        Términos de los productos pedidos que el proveedor oferta: los ausentes y los desactivados
+        (activo=False, p. ej. retirados por la sincronización del catálogo) no vienen.
+        """
+        schema = schema_de(db)
+        producto_ids = set(producto_ids)
+        catalogo = self._catalogo(db, schema, proveedor_id)
+
+        encontrados = {pid: catalogo[pid] for pid in producto_ids if pid in catalogo and catalogo[pid].activo}
+        faltantes = producto_ids - encontrados.keys()
+        if faltantes:
+            # fallback a BD: el snapshot pudo quedar desfasado si otra instancia no logró publicar la versión
+            rows = (
+                db.query(*_COLUMNAS)
+                .filter(ProductoProveedor.proveedor_id == proveedor_id,
+                        ProductoProveedor.producto_id.in_(list(faltantes)))
+                .all()
+            )
+            nuevos = {r.producto_id: _terminos(r) for r in rows}
+            if nuevos:
+                self._completar(schema, proveedor_id, catalogo, nuevos)
+                encontrados.update((pid, t) for pid, t in nuevos.items() if t.activo)
+        return encontrados
+
+    def invalidar(self, schema: str) -> None:
+        """Publica un cambio de catálogo en el schema; todas las instancias recargan al siguiente uso."""
+        self.version.incrementar(schema)
+        with self._lock:
+            self._schemas.pop(schema, None)
+
+    def _catalogo(self, db: Session, schema: str, proveedor_id: UUID) -> dict[UUID, TerminosCatalogo]:
+        # la versión se lee antes de cargar: si cambia durante la carga, el próximo uso recarga
+        version = self.version.actual(schema)
+        ahora = time.monotonic()
+        with self._lock:
+            snap = self._schemas.get(schema)
+            if snap is None or snap.version != version:
+                snap = self._schemas[schema] = _SnapshotSchema(version)
+            entrada = snap.proveedores.get(proveedor_id)
+            if entrada is not None and ahora - entrada[0] < self.ttl_s:
+                snap.proveedores.move_to_end(proveedor_id)
+                return entrada[1]
+
+        rows = db.query(*_COLUMNAS).filter(ProductoProveedor.proveedor_id == proveedor_id).all()
+        catalogo = {r.producto_id: _terminos(r) for r in rows}
+
+        with self._lock:
+            if self._schemas.get(schema) is snap:
+                snap.proveedores[proveedor_id] = (ahora, catalogo)
+                snap.proveedores.move_to_end(proveedor_id)
+                while len(snap.proveedores) > self.max_proveedores:
+                    snap.proveedores.popitem(last=False)
+        return catalogo
+
+    def _completar(self, schema: str, proveedor_id: UUID, catalogo: dict[UUID, TerminosCatalogo],
+                   nuevos: dict[UUID, TerminosCatalogo]) -> None:
+        # copia y reemplazo bajo el lock: otros hilos pueden estar leyendo el dict publicado, que no se
+        # modifica; si entretanto se recargó o invalidó el catálogo, la carga nueva ya trae estos productos
+        with self._lock:
+            snap = self._schemas.get(schema)
+            entrada = snap.proveedores.get(proveedor_id) if snap is not None else None
+            if entrada is not None and entrada[1] is catalogo:
+                snap.proveedores[proveedor_id] = (entrada[0], {**catalogo, **nuevos})
+
+
+catalogo_cache = CatalogoCache(
+    max_proveedores=settings.CATALOGO_CACHE_MAX_PROVEEDORES,
+    ttl_s=settings.CATALOGO_CACHE_TTL_S,
+)
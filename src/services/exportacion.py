@@ -0,0 +1,152 @@
+from __future__ import annotations
+import io
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, ContextManager, Optional
+from sqlalchemy import Boolean, DateTime, Integer, Numeric, Table, select, tuple_
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.domain.models import ItemOrdenCompra, MarcaExportacion, OrdenCompra, OrdenCompraEliminada, Proveedor
+from src.infrastructure.infrastructure import session_for_schema
+from src.infrastructure.sumideros import Cargador, CargadorBigQuery, SinCarga, Sumidero, SumideroGCS, SumideroLocal
+
+log = logging.getLogger(__name__)
+
+
+def _tipo_arrow(pa, columna):
+    tipo = columna.type
+    if isinstance(tipo, Numeric):
+        return pa.decimal128(tipo.precision or 38, tipo.scale or 0)
+    if isinstance(tipo, DateTime):
+        return pa.timestamp("us")
+    if isinstance(tipo, Boolean):
+        return pa.bool_()
+    if isinstance(tipo, Integer):
+        return pa.int64()
+    return pa.string()  # String, UUID
+
+
+def a_parquet(tabla: Table, filas: list[dict[str, Any]], exportado_en: datetime,
+              fechas_extra: tuple[str, ...] = ()) -> bytes:
+    """
+    Parquet (zstd) con un esquema fijo derivado de las columnas del modelo, para que todos los
+    lotes tengan los mismos tipos aunque una columna venga toda en NULL. `fechas_extra` son
+    claves de `filas`, fuera del modelo, que se agregan como columnas timestamp.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([pa.field(c.name, _tipo_arrow(pa, c)) for c in tabla.columns]
+                        + [pa.field(n, pa.timestamp("us")) for n in fechas_extra]
+                        + [pa.field("_exportado_en", pa.timestamp("us"))])
+    columnas = {
+        c.name: [str(f[c.name]) if isinstance(f[c.name], uuid.UUID) else f[c.name] for f in filas]
+        for c in tabla.columns
+    }
+    for n in fechas_extra:
+        columnas[n] = [f[n] for f in filas]
+    columnas["_exportado_en"] = [exportado_en] * len(filas)
+    buf = io.BytesIO()
+    pq.write_table(pa.Table.from_pydict(columnas, schema=esquema), buf, compression="zstd")
+    return buf.getvalue()
+
+
+class ExportadorAnalitico:
+    """
+    Exportación incremental a analítica. Por tabla lee, desde una réplica si hay, las filas con
+    (actualizado_en, id) posterior a la marca de agua, en lotes de `lote`; cada lote se escribe en
+    Parquet al sumidero, se carga aguas abajo y recién entonces avanza la marca (en el primario).
+    Entrega al menos una vez: aguas abajo se deduplica por (id, actualizado_en).
+
+    Sólo se exportan filas con actualizado_en anterior a ahora - `margen_s`: una transacción larga
+    puede confirmar filas con un actualizado_en ya superado por la marca.
+
+    Los items no tienen actualizado_en: viajan con el lote de sus órdenes (toda modificación de
+    items actualiza la orden), todos los de cada orden, con `_oc_actualizado_en` (la versión de la
+    orden). Aguas abajo se reemplazan por oc_id: los items de una orden son los de su
+    `_oc_actualizado_en` más reciente, así desaparecen los que se quitaron.
+    Las OCs borradas llegan como filas de `orden_compra_eliminada` (id de la OC): aguas abajo se
+    borran la orden y sus items. Archivar no es una baja: la OC se archiva COMPLETA/CANCELADA y
+    sin cambios desde hace meses, ya exportada en su estado final, y se conserva.
+    """
+
+    TABLAS = {"proveedor": Proveedor, "orden_compra": OrdenCompra, "orden_compra_eliminada": OrdenCompraEliminada}
+
+    def __init__(
+        self,
+        sumidero: Sumidero,
+        cargador: Cargador,
+        lote: int = 5000,
+        margen_s: float = 300,
+        sesion: Callable[..., ContextManager[Session]] = session_for_schema,
+    ):
+        self.sumidero = sumidero
+        self.cargador = cargador
+        self.lote = lote
+        self.margen_s = margen_s
+        self.sesion = sesion
+
+    def exportar(self, schema: str, ahora: Optional[datetime] = None) -> dict[str, int]:
+        corte = (ahora or datetime.utcnow()) - timedelta(seconds=self.margen_s)
+        return {tabla: self._exportar_tabla(schema, tabla, corte) for tabla in self.TABLAS}
+
+    def _exportar_tabla(self, schema: str, tabla: str, corte: datetime) -> int:
+        modelo = self.TABLAS[tabla]
+        with self.sesion(schema) as db:
+            marca = db.get(MarcaExportacion, tabla)
+            desde = (marca.actualizado_hasta, marca.id_hasta) if marca else None
+
+        total = 0
+        while True:
+            with self.sesion(schema, read_only=True) as db:
+                qy = select(modelo.__table__).where(modelo.actualizado_en < corte)
+                if desde:
+                    qy = qy.where(tuple_(modelo.actualizado_en, modelo.id) > tuple_(*desde))
+                filas = [dict(r._mapping) for r in db.execute(
+                    qy.order_by(modelo.actualizado_en, modelo.id).limit(self.lote)
+                )]
+                items = self._items(db, filas) if tabla == "orden_compra" and filas else []
+            if not filas:
+                return total
+
+            exportado_en = datetime.utcnow()
+            nombre = f"{filas[-1]['actualizado_en']:%Y%m%dT%H%M%S%f}-{filas[-1]['id']}.parquet"
+            self._enviar(schema, tabla, modelo.__table__, nombre, filas, exportado_en)
+            if items:
+                self._enviar(schema, "item_orden_compra", ItemOrdenCompra.__table__, nombre, items, exportado_en,
+                             fechas_extra=("_oc_actualizado_en",))
+
+            desde = (filas[-1]["actualizado_en"], filas[-1]["id"])
+            with self.sesion(schema) as db:
+                marca = db.get(MarcaExportacion, tabla)
+                if marca is None:
+                    db.add(MarcaExportacion(tabla=tabla, actualizado_hasta=desde[0], id_hasta=desde[1]))
+                else:
+                    marca.actualizado_hasta, marca.id_hasta = desde
+                db.commit()
+            total += len(filas)
+            log.info("Exportadas %d filas de %s.%s (hasta %s)", len(filas), schema, tabla, desde[0])
+            if len(filas) < self.lote:
+                return total
+
+    def _items(self, db: Session, ordenes: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        version = {f["id"]: f["actualizado_en"] for f in ordenes}
+        qy = select(ItemOrdenCompra.__table__).where(ItemOrdenCompra.oc_id.in_(list(version)))
+        return [{**r._mapping, "_oc_actualizado_en": version[r.oc_id]} for r in db.execute(qy)]
+
+    def _enviar(self, schema: str, tabla: str, columnas: Table, nombre: str,
+                filas: list[dict[str, Any]], exportado_en: datetime, fechas_extra: tuple[str, ...] = ()) -> None:
+        datos = a_parquet(columnas, filas, exportado_en, fechas_extra)
+        uri = self.sumidero.escribir(schema, tabla, nombre, datos)
+        self.cargador.cargar(schema, tabla, uri)
+
+
+def exportador_configurado() -> ExportadorAnalitico:
+    """GCS + BigQuery si hay bucket/dataset configurados; si no, archivos locales en EXPORT_DIR."""
+    if settings.GCS_BUCKET and settings.BQ_DATASET:
+        sumidero, cargador = SumideroGCS(settings.GCS_BUCKET), CargadorBigQuery(settings.BQ_DATASET)
+    else:
+        sumidero, cargador = SumideroLocal(settings.EXPORT_DIR), SinCarga()
+    return ExportadorAnalitico(sumidero, cargador, lote=settings.EXPORT_LOTE, margen_s=settings.EXPORT_MARGEN_S)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import csv
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+from pydantic import ValidationError
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from src.domain.models import Proveedor
+from src.domain.schemas import ProveedorCreate
+from src.infrastructure import auditoria
+from src.infrastructure.infrastructure import insert_con_conflictos
+
+
+class LectorCSV:
+    """
+    Convierte líneas de un CSV con cabecera en dicts, una a la vez (para leer el cuerpo en streaming).
+    Un registro puede ocupar varias líneas si un campo entre comillas contiene saltos de línea.
+    """
+
+    def __init__(self):
+        self.cabecera: Optional[list[str]] = None
+        self._pendiente = ""
+
+    def alimentar(self, linea: str) -> Optional[dict[str, Any]]:
+        texto = f"{self._pendiente}\n{linea}" if self._pendiente else linea
+        if texto.count('"') % 2:  # comillas abiertas: el registro sigue en la próxima línea
+            self._pendiente = texto
+            return None
+        self._pendiente = ""
+        if not texto.strip():
+            return None
+        valores = next(csv.reader([texto]))
+        if self.cabecera is None:
+            self.cabecera = [c.strip() for c in valores]
+            return None
+        # celdas vacías = campo no enviado
+        return {k: v for k, v in zip(self.cabecera, valores) if v != ""}
+
+
+def fila_ndjson(linea: str) -> Optional[Any]:
+    return json.loads(linea) if linea.strip() else None
+
+
+class ImportacionProveedores:
+    """
+    Importación masiva de proveedores por lotes. Por cada fila reporta `creado`, `invalido`,
+    `duplicado` (repetida en el mismo archivo) o `existente` (ya estaba en la BD).
+    La instancia recuerda las claves (documento, pais) vistas en lotes anteriores del mismo archivo.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._vistas: dict[tuple[str, str], int] = {}
+
+    def importar_lote(self, filas: list[Any], primera_fila: int = 1) -> list[dict[str, Any]]:
+        resultados: list[dict[str, Any]] = []
+        candidatas: dict[tuple[str, str], tuple[dict[str, Any], dict[str, Any]]] = {}
+
+        # 1) validación y deduplicación dentro del archivo
+        for n, fila in enumerate(filas, start=primera_fila):
+            resultado: dict[str, Any] = {"fila": n}
+            resultados.append(resultado)
+            try:
+                data = ProveedorCreate.model_validate(fila).model_dump(mode="json", exclude_none=True)
+            except ValidationError as e:
+                resultado.update(estado="invalido", errores=[
+                    f"{'.'.join(map(str, err['loc'])) or 'fila'}: {err['msg']}" for err in e.errors()
+                ])
+                continue
+            clave = (data["documento"], data["pais"])
+            if clave in self._vistas:
+                resultado.update(estado="duplicado", errores=[f"Repite la fila {self._vistas[clave]}"])
+                continue
+            self._vistas[clave] = n
+            candidatas[clave] = (resultado, data)
+
+        if not candidatas:
+            return resultados
+
+        # 2) una sola consulta contra uq_proveedor_documento_pais para todo el lote
+        existentes = {
+            (documento, pais): id_
+            for documento, pais, id_ in self.db.execute(
+                select(Proveedor.documento, Proveedor.pais, Proveedor.id)
+                .where(tuple_(Proveedor.documento, Proveedor.pais).in_(list(candidatas)))
+            )
+        }
+
+        # 3) INSERT multi-fila; ON CONFLICT cubre altas concurrentes entre la consulta y el insert
+        ahora = datetime.utcnow()
+        nuevas = []
+        for clave, (resultado, data) in candidatas.items():
+            if clave in existentes:
+                resultado.update(estado="existente", id=existentes[clave])
+            else:
+                nuevas.append({
+                    "id": uuid.uuid4(), "activo": True, "creado_en": ahora, "actualizado_en": ahora, **data,
+                })
+        if nuevas:
+            insertadas = set(
+                self.db.execute(
+                    insert_con_conflictos(self.db, Proveedor)
+                    .values(nuevas)
+                    .on_conflict_do_nothing(index_elements=["documento", "pais"])
+                    .returning(Proveedor.id)
+                ).scalars()
+            )
+            for fila in nuevas:
+                resultado = candidatas[(fila["documento"], fila["pais"])][0]
+                if fila["id"] in insertadas:
+                    resultado.update(estado="creado", id=fila["id"])
+                    auditoria.registrar(self.db, "proveedor", fila["id"], Proveedor.__tablename__, fila["id"], "I",
+                                        {k: v for k, v in fila.items() if k not in ("creado_en", "actualizado_en")})
+                else:
+                    resultado.update(estado="existente")
+            self.db.commit()
+        return resultados
@@ -0,0 +1,117 @@
+"""
+Lecturas sin ORM para los endpoints de lectura más llamados: `select()` de Core sobre las tablas,
+ejecutado en la conexión de la sesión, con las filas como mappings que van directo al schema de
+respuesta. Sin identity map, estado de relaciones ni instancias que luego sólo se serializan.
+
+Cada función devuelve la misma representación que la ruta arma con el ORM; las rutas las usan si
+su nombre está en LECTURAS_DIRECTAS (ver scripts/bench_lecturas.py). `proveedores_por_producto`
+no tiene variante ORM: la ruta la usa siempre.
+"""
+from __future__ import annotations
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional
+from uuid import UUID
+from sqlalchemy import Integer, Select, Table, bindparam, select
+from sqlalchemy.orm import Session
+
+from src.domain import schemas
+from src.domain.models import ItemOrdenCompra, ItemOrdenCompraArchivo, OrdenCompra, OrdenCompraArchivo, ProductoProveedor, Proveedor
+
+
+def _columnas(tabla: Table, *modelos, extra: tuple[str, ...] = ()) -> list:
+    """Columnas de `tabla` que usan los schemas `modelos` (más `extra`), en el orden de la tabla."""
+    nombres = set(extra).union(*(m.model_fields for m in modelos))
+    return [c for c in tabla.c if c.name in nombres]
+
+
+def _consulta_oc(oc: Table, item: Table) -> tuple[Select, Select]:
+    return (
+        select(*_columnas(oc, schemas.OrdenCompraOut, extra=("actualizado_en",))).where(oc.c.id == bindparam("id")),
+        # sin ORDER BY, como la carga de OrdenCompra.items
+        select(*_columnas(item, schemas.ItemOCOut)).where(item.c.oc_id == bindparam("id")),
+    )
+
+
+# OCs vivas primero y luego el archivo, como OrdenCompraService.obtener
+_OC_POR_ID = (
+    _consulta_oc(OrdenCompra.__table__, ItemOrdenCompra.__table__),
+    _consulta_oc(OrdenCompraArchivo.__table__, ItemOrdenCompraArchivo.__table__),
+)
+
+_VERSION_OC = tuple(
+    select(t.c.actualizado_en).where(t.c.id == bindparam("id"))
+    for t in (OrdenCompra.__table__, OrdenCompraArchivo.__table__)
+)
+
+_PROV = Proveedor.__table__
+_CAT = ProductoProveedor.__table__
+_COLUMNAS_PROVEEDOR = _columnas(_PROV, schemas.ProveedorOut)
+_PROVEEDOR_POR_ID = (
+    select(*_COLUMNAS_PROVEEDOR, _PROV.c.actualizado_en)
+    .where(_PROV.c.id == bindparam("id"), _PROV.c.eliminado_en.is_(None))
+)
+_TERMINOS = tuple(schemas.TerminosCompraOut.model_fields)
+
+
+def orden_compra(db: Session, oc_id: UUID) -> Optional[dict[str, Any]]:
+    """OC (viva o archivada) con sus items, o None."""
+    conn = db.connection()
+    for stmt_oc, stmt_items in _OC_POR_ID:
+        fila = conn.execute(stmt_oc, {"id": oc_id}).mappings().first()
+        if fila is not None:
+            oc = dict(fila)
+            oc["items"] = conn.execute(stmt_items, {"id": oc_id}).mappings().all()
+            return oc
+    return None
+
+
+def version_oc(db: Session, oc_id: UUID) -> Optional[datetime]:
+    """actualizado_en de la OC (viva o archivada), sin leer la fila ni los items; None si no existe."""
+    conn = db.connection()
+    for stmt in _VERSION_OC:
+        actualizado_en = conn.execute(stmt, {"id": oc_id}).scalar()
+        if actualizado_en is not None:
+            return actualizado_en
+    return None
+
+
+def proveedor(db: Session, proveedor_id: UUID) -> Optional[dict[str, Any]]:
+    """Proveedor vigente (no eliminado), o None."""
+    fila = db.connection().execute(_PROVEEDOR_POR_ID, {"id": proveedor_id}).mappings().first()
+    return None if fila is None else dict(fila)
+
+
+@lru_cache(maxsize=None)
+def _consulta_proveedores_por_producto(por_relacion: bool, por_proveedor: bool) -> Select:
+    stmt = (
+        select(*_COLUMNAS_PROVEEDOR, *(_CAT.c[c].label(f"t_{c}") for c in _TERMINOS))
+        .join_from(_CAT, _PROV, _CAT.c.proveedor_id == _PROV.c.id)
+        .where(_CAT.c.producto_id == bindparam("producto_id"), _PROV.c.eliminado_en.is_(None))
+    )
+    if por_relacion:
+        stmt = stmt.where(_CAT.c.activo == bindparam("activo_relacion"))
+    if por_proveedor:
+        stmt = stmt.where(_PROV.c.activo == bindparam("activo_proveedor"))
+    return (
+        stmt.order_by(_PROV.c.nombre.asc())
+        .offset(bindparam("offset", type_=Integer)).limit(bindparam("limit", type_=Integer))
+    )
+
+
+def proveedores_por_producto(db: Session, producto_id: UUID, activo_relacion: Optional[bool],
+                             activo_proveedor: Optional[bool], limit: int, offset: int) -> list[dict[str, Any]]:
+    """Proveedores vigentes del producto con sus términos de compra anidados en `terminos`."""
+    stmt = _consulta_proveedores_por_producto(activo_relacion is not None, activo_proveedor is not None)
+    filas = db.connection().execute(stmt, {
+        "producto_id": producto_id, "activo_relacion": activo_relacion, "activo_proveedor": activo_proveedor,
+        "limit": limit, "offset": offset,
+    })
+    claves = tuple(c.name for c in _COLUMNAS_PROVEEDOR)
+    n = len(claves)
+    resultado = []
+    for fila in filas:
+        prov = dict(zip(claves, fila[:n]))
+        prov["terminos"] = dict(zip(_TERMINOS, fila[n:]))
+        resultado.append(prov)
+    return resultado
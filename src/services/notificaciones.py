@@ -0,0 +1,354 @@
+"""
+Notificaciones (webhooks) a proveedores. Los eventos se encolan en la tabla `notificacion` en la
+misma transacción que el cambio que los origina, y un despachador asyncio los entrega:
+
+  - toma lotes de la cola con lease (varias instancias no entregan la misma notificación)
+  - agrupa los eventos de cada URL en envíos de hasta `eventos_por_envio`
+  - limita los envíos simultáneos en total y por proveedor
+  - sólo envía por https a hosts públicos: la URL se vuelve a validar al enviar (su nombre puede
+    resolver hoy a otra dirección que cuando se guardó)
+  - reintenta con backoff exponencial; agotados los intentos (o ante un 4xx definitivo) la
+    notificación pasa a `notificacion_fallida`, de donde puede reencolarse a mano
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import hmac
+import logging
+import random
+import socket
+from contextlib import AbstractContextManager, asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Optional
+from urllib.parse import urlsplit
+from uuid import UUID
+import orjson
+from sqlalchemy import delete, or_, select
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.domain import schemas, webhooks
+from src.domain.models import Notificacion, NotificacionFallida, OrdenCompra, Proveedor
+from src.infrastructure.infrastructure import al_confirmar, schema_de, session_fondo
+
+if TYPE_CHECKING:  # httpx se importa al iniciar el despachador, no al arrancar
+    import httpx
+
+log = logging.getLogger(__name__)
+
+EVENTO_OC_ENVIADA = "oc.enviada"
+HEADER_FIRMA = "X-Compras-Firma"
+# sin reintento: la petición no va a funcionar repitiéndola igual
+_RECHAZO_DEFINITIVO = frozenset(range(400, 500)) - {408, 425, 429}
+
+
+def encolar_oc_enviada(db: Session, oc: OrdenCompra) -> Optional[Notificacion]:
+    """Encola el aviso de `oc` ENVIADA si el proveedor tiene webhook; se confirma con la transacción de `db`."""
+    url = db.scalar(select(Proveedor.webhook_url).where(Proveedor.id == oc.proveedor_id))
+    if not url:
+        return None
+    datos = schemas.OrdenCompraOut.model_validate(oc, from_attributes=True).model_dump(mode="json")
+    notificacion = Notificacion(proveedor_id=oc.proveedor_id, evento=EVENTO_OC_ENVIADA, url=url, payload=datos,
+                                intentos=0, proximo_intento_en=datetime.utcnow())
+    db.add(notificacion)
+    schema = schema_de(db)
+    al_confirmar(db, lambda: despachador_notificaciones.avisar(schema))
+    return notificacion
+
+
+class NotificacionService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def fallidas(self, proveedor_id: Optional[UUID], limit: int = 50, offset: int = 0) -> list[NotificacionFallida]:
+        stmt = select(NotificacionFallida)
+        if proveedor_id:
+            stmt = stmt.where(NotificacionFallida.proveedor_id == proveedor_id)
+        stmt = stmt.order_by(NotificacionFallida.fallida_en.desc()).offset(offset).limit(limit)
+        return list(self.db.scalars(stmt))
+
+    def reintentar(self, notificacion_id: UUID) -> Notificacion:
+        """Devuelve a la cola una notificación fallida, con los intentos en cero y la URL vigente del proveedor."""
+        fallida = self.db.get(NotificacionFallida, notificacion_id)
+        if not fallida:
+            raise LookupError("Notificación no encontrada")
+        url = self.db.scalar(
+            select(Proveedor.webhook_url).where(Proveedor.id == fallida.proveedor_id, Proveedor.eliminado_en.is_(None))
+        )
+        if not url:
+            raise ValueError("El proveedor no tiene webhook configurado")
+        notificacion = Notificacion(
+            id=fallida.id, proveedor_id=fallida.proveedor_id, evento=fallida.evento, url=url,
+            payload=fallida.payload, intentos=0, proximo_intento_en=datetime.utcnow(), creado_en=fallida.creado_en,
+        )
+        self.db.delete(fallida)
+        self.db.add(notificacion)
+        self.db.commit()
+        schema = schema_de(self.db)
+        al_confirmar(self.db, lambda: despachador_notificaciones.avisar(schema))
+        return notificacion
+
+
+@dataclass(frozen=True, slots=True)
+class _Envio:
+    """Eventos de una misma URL que viajan en un solo POST."""
+    proveedor_id: UUID
+    url: str
+    ids: tuple[UUID, ...]
+    cuerpo: bytes
+
+
+@dataclass(frozen=True, slots=True)
+class _Resultado:
+    ids: tuple[UUID, ...]
+    error: Optional[str] = None       # None = entregado
+    reintentar: bool = True
+
+
+@dataclass(slots=True)
+class _LimiteProveedor:
+    semaforo: asyncio.Semaphore
+    usuarios: int = 0      # envíos esperando o en curso
+
+
+class DespachadorNotificaciones:
+    """
+    Entrega la cola de notificaciones de cada schema desde una tarea asyncio del proceso. Las
+    operaciones de BD (tomar el lote, registrar el resultado) van en hilos y en una transacción
+    cada una; los envíos HTTP de un lote van en paralelo con los límites de concurrencia.
+    `avisar` despierta al despachador al encolar; si no, revisa la cola cada `intervalo_s`.
+    """
+
+    def __init__(
+        self,
+        lote: int,
+        eventos_por_envio: int,
+        concurrencia: int,
+        concurrencia_proveedor: int,
+        timeout_s: float,
+        max_intentos: int,
+        backoff_base_s: float,
+        backoff_max_s: float,
+        lease_s: float,
+        intervalo_s: float,
+        secreto: str = "",
+        solo_publicos: bool = True,
+        sesion: Callable[[str], AbstractContextManager[Session]] = session_fondo,
+    ):
+        self.lote = lote
+        self.eventos_por_envio = eventos_por_envio
+        self.concurrencia = concurrencia
+        self.concurrencia_proveedor = concurrencia_proveedor
+        self.timeout_s = timeout_s
+        self.max_intentos = max_intentos
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.lease_s = lease_s
+        self.intervalo_s = intervalo_s
+        self.secreto = secreto.encode()
+        self.solo_publicos = solo_publicos
+        self.sesion = sesion
+        self._schemas: set[str] = set()
+        self._cliente: Optional[httpx.AsyncClient] = None
+        self._tarea: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._aviso: Optional[asyncio.Event] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        # sólo proveedores con envíos en curso: la entrada se quita con el último
+        self._por_proveedor: dict[UUID, _LimiteProveedor] = {}
+
+    # --------- ciclo de vida (desde el event loop de la app) ----------
+    def iniciar(self, schemas: list[str], listo: Callable[[str], bool] = lambda s: True) -> None:
+        if self._tarea is not None and not self._tarea.done():
+            return
+        self._schemas.update(schemas)
+        self._loop = asyncio.get_running_loop()
+        self._aviso = asyncio.Event()
+        self._tarea = self._loop.create_task(self._bucle(listo), name="notificaciones")
+
+    async def detener(self) -> None:
+        tarea, self._tarea = self._tarea, None
+        if tarea is not None:
+            tarea.cancel()
+            try:
+                await tarea
+            except asyncio.CancelledError:
+                pass
+        if self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
+        self._loop = self._aviso = self._semaforo = None
+        self._por_proveedor.clear()
+
+    def avisar(self, schema: str) -> None:
+        """Hay notificaciones nuevas en `schema`. Se puede llamar desde cualquier hilo."""
+        self._schemas.add(schema)
+        loop, aviso = self._loop, self._aviso
+        if loop is not None and aviso is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(aviso.set)
+
+    async def _bucle(self, listo: Callable[[str], bool]) -> None:
+        while True:
+            self._aviso.clear()
+            pendientes = False
+            for schema in sorted(self._schemas):
+                if not listo(schema):  # las tablas del schema aún no están verificadas
+                    continue
+                try:
+                    pendientes |= await self.procesar(schema) == self.lote
+                except Exception:
+                    log.exception("Error despachando notificaciones en schema %s", schema)
+            if pendientes:
+                continue  # lote lleno: seguir sin esperar
+            try:
+                await asyncio.wait_for(self._aviso.wait(), timeout=self.intervalo_s)
+            except asyncio.TimeoutError:
+                pass
+
+    # --------- un lote ----------
+    async def procesar(self, schema: str) -> int:
+        """Entrega un lote de la cola de `schema`; devuelve cuántas notificaciones tomó."""
+        envios, tomadas = await asyncio.to_thread(self._tomar, schema)
+        if envios:
+            resultados = await asyncio.gather(*(self._enviar(envio) for envio in envios))
+            await asyncio.to_thread(self._registrar, schema, resultados)
+        return tomadas
+
+    def _tomar(self, schema: str) -> tuple[list[_Envio], int]:
+        ahora = datetime.utcnow()
+        with self.sesion(schema) as db:
+            notificaciones = db.scalars(
+                select(Notificacion)
+                .where(Notificacion.proximo_intento_en <= ahora,
+                       or_(Notificacion.tomado_hasta.is_(None), Notificacion.tomado_hasta < ahora))
+                .order_by(Notificacion.proximo_intento_en)
+                .limit(self.lote)
+                .with_for_update(skip_locked=True)
+            ).all()
+            por_url: dict[tuple[UUID, str], list[Notificacion]] = {}
+            for n in notificaciones:
+                n.tomado_hasta = ahora + timedelta(seconds=self.lease_s)
+                por_url.setdefault((n.proveedor_id, n.url), []).append(n)
+            envios = [
+                self._envio(proveedor_id, url, grupo[i:i + self.eventos_por_envio])
+                for (proveedor_id, url), grupo in por_url.items()
+                for i in range(0, len(grupo), self.eventos_por_envio)
+            ]
+            db.commit()
+        return envios, len(notificaciones)
+
+    @staticmethod
+    def _envio(proveedor_id: UUID, url: str, grupo: list[Notificacion]) -> _Envio:
+        eventos = [
+            {"id": str(n.id), "evento": n.evento, "creado_en": n.creado_en.isoformat(), "datos": n.payload}
+            for n in grupo
+        ]
+        return _Envio(proveedor_id, url, tuple(n.id for n in grupo), orjson.dumps({"eventos": eventos}))
+
+    async def _enviar(self, envio: _Envio) -> _Resultado:
+        headers = {"Content-Type": "application/json"}
+        if self.secreto:
+            headers[HEADER_FIRMA] = "sha256=" + hmac.new(self.secreto, envio.cuerpo, hashlib.sha256).hexdigest()
+        motivo = await self._destino_rechazado(envio.url)
+        if motivo:
+            return _Resultado(envio.ids, f"destino no permitido: {motivo}", reintentar=False)
+        async with self._limite_global(), self._limite_proveedor(envio.proveedor_id):
+            try:
+                r = await self._http().post(envio.url, content=envio.cuerpo, headers=headers)
+            except Exception as e:
+                return _Resultado(envio.ids, f"{type(e).__name__}: {e}"[:1000])
+        if 200 <= r.status_code < 300:
+            return _Resultado(envio.ids)
+        return _Resultado(envio.ids, f"HTTP {r.status_code}: {r.text[:200]}",
+                          reintentar=r.status_code not in _RECHAZO_DEFINITIVO)
+
+    def _registrar(self, schema: str, resultados: list[_Resultado]) -> None:
+        entregadas = [i for r in resultados if r.error is None for i in r.ids]
+        fallos = {i: r for r in resultados if r.error is not None for i in r.ids}
+        ahora = datetime.utcnow()
+        with self.sesion(schema) as db:
+            if entregadas:
+                db.execute(delete(Notificacion).where(Notificacion.id.in_(entregadas)).execution_options(
+                    synchronize_session=False))
+            if fallos:
+                for n in db.scalars(select(Notificacion).where(Notificacion.id.in_(list(fallos)))):
+                    resultado = fallos[n.id]
+                    n.intentos += 1
+                    n.ultimo_error = resultado.error
+                    n.tomado_hasta = None
+                    if resultado.reintentar and n.intentos < self.max_intentos:
+                        n.proximo_intento_en = ahora + timedelta(seconds=self.espera_s(n.intentos))
+                        continue
+                    log.warning("Notificación %s a %s descartada tras %s intentos: %s",
+                                n.id, n.url, n.intentos, n.ultimo_error)
+                    db.add(NotificacionFallida(
+                        id=n.id, proveedor_id=n.proveedor_id, evento=n.evento, url=n.url, payload=n.payload,
+                        intentos=n.intentos, ultimo_error=n.ultimo_error, creado_en=n.creado_en, fallida_en=ahora,
+                    ))
+                    db.delete(n)
+            db.commit()
+        if entregadas:
+            log.info("%s notificaciones entregadas en schema %s", len(entregadas), schema)
+
+    def espera_s(self, intentos: int) -> float:
+        """Backoff exponencial con jitter (entre la mitad y el total de la espera) tras `intentos` fallidos."""
+        espera = min(self.backoff_base_s * 2 ** (intentos - 1), self.backoff_max_s)
+        return espera * random.uniform(0.5, 1.0)
+
+    # --------- recursos del event loop ----------
+    def _http(self) -> httpx.AsyncClient:
+        if self._cliente is None:
+            import httpx
+
+            self._cliente = httpx.AsyncClient(
+                timeout=self.timeout_s,
+                limits=httpx.Limits(max_connections=self.concurrencia),
+                follow_redirects=False,
+            )
+        return self._cliente
+
+    def _limite_global(self) -> asyncio.Semaphore:
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.concurrencia)
+        return self._semaforo
+
+    @asynccontextmanager
+    async def _limite_proveedor(self, proveedor_id: UUID) -> AsyncIterator[None]:
+        limite = self._por_proveedor.get(proveedor_id)
+        if limite is None:
+            limite = self._por_proveedor[proveedor_id] = _LimiteProveedor(asyncio.Semaphore(self.concurrencia_proveedor))
+        limite.usuarios += 1
+        try:
+            async with limite.semaforo:
+                yield
+        finally:
+            limite.usuarios -= 1
+            if limite.usuarios == 0:
+                del self._por_proveedor[proveedor_id]
+
+    async def _destino_rechazado(self, url: str) -> Optional[str]:
+        if not self.solo_publicos:
+            return None
+        host = urlsplit(url).hostname or ""
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except (OSError, UnicodeError):
+            infos = []  # no resuelve: el envío fallará y se reintentará
+        return webhooks.motivo_rechazo(url, [info[4][0] for info in infos])
+
+
+despachador_notificaciones = DespachadorNotificaciones(
+    lote=settings.WEBHOOK_LOTE,
+    eventos_por_envio=settings.WEBHOOK_EVENTOS_POR_ENVIO,
+    concurrencia=settings.WEBHOOK_CONCURRENCIA,
+    concurrencia_proveedor=settings.WEBHOOK_CONCURRENCIA_PROVEEDOR,
+    timeout_s=settings.WEBHOOK_TIMEOUT_S,
+    max_intentos=settings.WEBHOOK_MAX_INTENTOS,
+    backoff_base_s=settings.WEBHOOK_BACKOFF_BASE_S,
+    backoff_max_s=settings.WEBHOOK_BACKOFF_MAX_S,
+    lease_s=settings.WEBHOOK_LEASE_S,
+    intervalo_s=settings.WEBHOOK_INTERVALO_S,
+    secreto=settings.WEBHOOK_SECRETO,
+    solo_publicos=settings.WEBHOOK_SOLO_PUBLICOS,
+)
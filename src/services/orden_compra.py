@@ -2,31 +2,97 @@ from __future__ import annotations
 from decimal import Decimal
 from typing import Iterable, Optional
 from uuid import UUID
+from collections import Counter
+from functools import lru_cache
+from sqlalchemy import Integer, Select, bindparam, case, delete, func, insert, select, text
 from sqlalchemy.orm import Session
 from datetime import datetime
 import uuid
 
-from src.domain.models import OrdenCompra, ItemOrdenCompra, Proveedor, ProductoProveedor
+from src.domain.precios import calc_linea, dec
+from src.domain.models import OrdenCompra, ItemOrdenCompra, Proveedor, OrdenCompraArchivo, OrdenCompraEliminada, PendienteProducto
+from src.errors import ConflictError
+from src.infrastructure.infrastructure import insert_con_conflictos, schema_de
+from src.services.catalogo_cache import catalogo_cache
+from src.services.notificaciones import encolar_oc_enviada
+from src.services.tasas_cambio import normalizar, tasas_cambio
 
 ESTADOS_VALIDOS = {"ABIERTA","ENVIADA","PARCIAL","COMPLETA","CANCELADA"}
+# estados cuyas cantidades siguen "en camino" (pendiente_producto)
+ESTADOS_PENDIENTES = ("ABIERTA","ENVIADA","PARCIAL")
 
 def _dec(v, default="0"):
-    return Decimal(str(v if v is not None else default))
+    return dec(v, default)
 
 def _calc_totales(items: Iterable[dict[str, object]]):
     subtotal = Decimal("0")
     impuestos = Decimal("0")
     for it in items:
-        pu   = _dec(it.get("precio_unitario"))
-        cant = _dec(it.get("cantidad"), "0")
-        li   = pu * cant
-        dsc  = li * _dec(it.get("descuento_pct")) / Decimal("100")
-        neto = li - dsc
-        imp  = neto * _dec(it.get("impuesto_pct")) / Decimal("100")
+        neto, imp = calc_linea(it.get("precio_unitario"), it.get("cantidad"),
+                               it.get("descuento_pct"), it.get("impuesto_pct"))
         subtotal += neto
         impuestos += imp
     return subtotal, impuestos, (subtotal + impuestos)
 
+def _aplicar_catalogo(items: list[dict], rel_map: dict, moneda: Optional[str]) -> tuple[list[dict], Optional[str]]:
+    """
+    Completa cada item con los términos del catálogo (precio, sku) y valida lote mínimo.
+    Devuelve los items completados y la moneda de la orden (la del catálogo si no llegó).
+    """
+    completados = []
+    monedas_catalogo = set()
+    for it in items:
+        rel = rel_map[it["producto_id"]]
+        if rel.lote_minimo and it["cantidad"] < rel.lote_minimo:
+            raise ValueError(
+                f"Cantidad {it['cantidad']} menor al lote mínimo ({rel.lote_minimo}) del producto {it['producto_id']}"
+            )
+        it = dict(it)
+        if it.get("precio_unitario") is None and rel.precio is not None:
+            it["precio_unitario"] = rel.precio
+            if rel.moneda:
+                monedas_catalogo.add(rel.moneda)
+        it["sku_proveedor"] = it.get("sku_proveedor") or rel.sku_proveedor
+        completados.append(it)
+
+    if moneda is None and len(monedas_catalogo) > 1:
+        raise ValueError(f"Precios de catálogo en monedas distintas: {', '.join(sorted(monedas_catalogo))}")
+    if moneda is None and monedas_catalogo:
+        moneda = monedas_catalogo.pop()
+    elif moneda is not None and monedas_catalogo - {moneda}:
+        raise ValueError(
+            f"La moneda de la orden ({moneda}) no coincide con la del catálogo ({', '.join(sorted(monedas_catalogo))})"
+        )
+    return completados, moneda
+
+@lru_cache(maxsize=None)
+def _consulta_ordenes(solo_versiones: bool, por_proveedor: bool, por_estado: bool, por_codigo: bool) -> Select:
+    """
+    Página de OCs para una combinación de filtros, construida una sola vez con parámetros
+    (`bindparam`). Al reutilizar el mismo objeto, su cache key queda memorizada y la compilación
+    sale del cache del engine; el schema del tenant se aplica al ejecutar, así que una compilación
+    sirve a todos los tenants.
+    """
+    stmt = select(OrdenCompra.id, OrdenCompra.actualizado_en) if solo_versiones else select(OrdenCompra)
+    if por_proveedor:
+        stmt = stmt.where(OrdenCompra.proveedor_id == bindparam("proveedor_id"))
+    if por_estado:
+        stmt = stmt.where(OrdenCompra.estado == bindparam("estado"))
+    if por_codigo:
+        stmt = stmt.where(OrdenCompra.codigo.ilike(bindparam("codigo")))
+    return (
+        stmt.order_by(OrdenCompra.creado_en.desc())
+        .offset(bindparam("offset", type_=Integer)).limit(bindparam("limit", type_=Integer))
+    )
+
+def _pagina_ordenes(solo_versiones: bool, proveedor_id: Optional[UUID], estado: Optional[str], q: Optional[str],
+                    limit: int, offset: int) -> tuple[Select, dict[str, object]]:
+    stmt = _consulta_ordenes(solo_versiones, bool(proveedor_id), bool(estado), bool(q))
+    params = {"proveedor_id": proveedor_id, "estado": estado, "limit": limit, "offset": offset}
+    if q:
+        params["codigo"] = f"%{q.strip()}%"
+    return stmt, params
+
 class OrdenCompraService:
     def __init__(self, db: Session):
         self.db = db
@@ -49,27 +115,33 @@ class OrdenCompraService:
         if not items:
             raise ValueError("La orden debe tener items")
 
-        # 2) Validar catálogo proveedor-producto (existencia relación)
+        # 2) Validar catálogo proveedor-producto (existencia relación), desde el snapshot en memoria
         producto_ids = {it["producto_id"] for it in items}
-        rels = (
-            self.db.query(ProductoProveedor)
-            .filter(ProductoProveedor.proveedor_id == proveedor_id,
-                    ProductoProveedor.producto_id.in_(list(producto_ids)))
-            .all()
-        )
-        valid_ids = {r.producto_id for r in rels}
-        missing = producto_ids - valid_ids
+        rel_map = catalogo_cache.terminos(self.db, proveedor_id, producto_ids)
+        missing = producto_ids - rel_map.keys()
         if missing:
             raise ValueError(f"Producto(s) no ofertados por el proveedor: {', '.join(map(str, missing))}")
 
-        # 3) Generar código si no llega
-        if not codigo:
-            codigo = f"OC-{datetime.utcnow().year}-{uuid.uuid4().hex[:6].upper()}"
+        # 3) Precio, moneda y sku desde catálogo cuando no llegan; lote mínimo
+        items, moneda = _aplicar_catalogo(items, rel_map, moneda)
 
-        # 4) Calcular totales
+        # 4) Código único entre vivas y archivadas (el archivo también exige unicidad); generado si no llega
+        if codigo:
+            if self._codigo_en_uso(codigo):
+                raise ConflictError(f"Ya existe una orden de compra con el código {codigo}")
+        else:
+            for _ in range(5):
+                codigo = f"OC-{datetime.utcnow().year}-{uuid.uuid4().hex[:6].upper()}"
+                if not self._codigo_en_uso(codigo):
+                    break
+            else:
+                raise ConflictError("No se pudo generar un código de orden libre")
+
+        # 5) Calcular totales, y el total en moneda base con la tasa vigente hoy
         subtotal, imp, total = _calc_totales(items)
+        tasa = tasas_cambio.tasa(self.db, moneda, datetime.utcnow())
 
-        # 5) Persistir
+        # 6) Persistir
         oc = OrdenCompra(
             codigo=codigo,
             proveedor_id=proveedor_id,
@@ -79,16 +151,15 @@ class OrdenCompraService:
             subtotal=subtotal,
             impuesto_total=imp,
             total=total,
+            tasa_cambio=tasa,
+            total_base=normalizar(total, tasa),
             estado="ABIERTA",
         )
         self.db.add(oc)
         self.db.flush()  # para obtener oc.id
 
-        # 6) Crear items (snapshot sku/precio si llega, o copias del catálogo)
-        #    Rellenar sku_proveedor desde catálogo si no vino en el payload
-        rel_map = {r.producto_id: r for r in rels}
+        # 7) Crear items (snapshot sku/precio del payload o copiados del catálogo)
         for it in items:
-            rel = rel_map[it["producto_id"]]
             self.db.add(
                 ItemOrdenCompra(
                     oc_id=oc.id,
@@ -97,29 +168,103 @@ class OrdenCompraService:
                     precio_unitario=it.get("precio_unitario"),
                     impuesto_pct=it.get("impuesto_pct"),
                     descuento_pct=it.get("descuento_pct"),
-                    sku_proveedor=it.get("sku_proveedor") or rel.sku_proveedor
+                    sku_proveedor=it["sku_proveedor"]
                 )
             )
+        pendientes = Counter()
+        for it in items:
+            pendientes[it["producto_id"]] += it["cantidad"]
+        self._ajustar_pendientes(pendientes)
 
         self.db.commit()
         self.db.refresh(oc)
         return oc
 
-    # --------- READ ----------
-    def obtener(self, oc_id: UUID) -> Optional[OrdenCompra]:
-        return self.db.get(OrdenCompra, oc_id)
+    # --------- READ (las OCs archivadas se buscan en el archivo si no están vivas) ----------
+    def obtener(self, oc_id: UUID) -> Optional[OrdenCompra | OrdenCompraArchivo]:
+        return self.db.get(OrdenCompra, oc_id) or self.db.get(OrdenCompraArchivo, oc_id)
+
+    def obtener_por_codigo(self, codigo: str) -> Optional[OrdenCompra | OrdenCompraArchivo]:
+        for modelo in (OrdenCompra, OrdenCompraArchivo):
+            oc = self.db.query(modelo).filter(modelo.codigo == codigo).first()
+            if oc:
+                return oc
+        return None
 
     def listar(self, proveedor_id: Optional[UUID], estado: Optional[str], q: Optional[str],
                limit: int = 50, offset: int = 0) -> list[OrdenCompra]:
-        qy = self.db.query(OrdenCompra)
+        return list(self.db.scalars(*_pagina_ordenes(False, proveedor_id, estado, q, limit, offset)))
+
+    # --------- metadatos para peticiones condicionales (sin cargar items) ----------
+    def version(self, oc_id: UUID) -> Optional[datetime]:
+        for modelo in (OrdenCompra, OrdenCompraArchivo):
+            actualizado_en = self.db.query(modelo.actualizado_en).filter(modelo.id == oc_id).scalar()
+            if actualizado_en is not None:
+                return actualizado_en
+        return None
+
+    def versiones(self, proveedor_id: Optional[UUID], estado: Optional[str], q: Optional[str],
+                  limit: int = 50, offset: int = 0) -> list[tuple[UUID, datetime]]:
+        """(id, actualizado_en) de la misma página que devolvería `listar`."""
+        return [tuple(r) for r in self.db.execute(*_pagina_ordenes(True, proveedor_id, estado, q, limit, offset))]
+
+    def resumen(self, proveedor_id: Optional[UUID], desde: Optional[datetime], hasta: Optional[datetime]) -> list[dict]:
+        """
+        Órdenes y total en moneda base por estado (creadas en [desde, hasta)), agregados en la BD
+        sobre `total_base`, sin convertir fila a fila. `sin_tasa` cuenta las que no se pudieron
+        normalizar (sin moneda o sin tasa vigente al crearlas) y no suman al total.
+        """
+        stmt = select(
+            OrdenCompra.estado,
+            func.count(),
+            func.coalesce(func.sum(OrdenCompra.total_base), 0),
+            func.sum(case((OrdenCompra.total_base.is_(None), 1), else_=0)),
+        ).group_by(OrdenCompra.estado).order_by(OrdenCompra.estado)
         if proveedor_id:
-            qy = qy.filter(OrdenCompra.proveedor_id == proveedor_id)
-        if estado:
-            qy = qy.filter(OrdenCompra.estado == estado)
-        if q:
-            like = f"%{q.strip()}%"
-            qy = qy.filter(OrdenCompra.codigo.ilike(like))
-        return qy.order_by(OrdenCompra.creado_en.desc()).offset(offset).limit(limit).all()
+            stmt = stmt.where(OrdenCompra.proveedor_id == proveedor_id)
+        if desde:
+            stmt = stmt.where(OrdenCompra.creado_en >= desde)
+        if hasta:
+            stmt = stmt.where(OrdenCompra.creado_en < hasta)
+        return [
+            {"estado": estado, "ordenes": ordenes, "total_base": _dec(total), "sin_tasa": sin_tasa}
+            for estado, ordenes, total, sin_tasa in self.db.execute(stmt)
+        ]
+
+    def pendientes_por_producto(self, producto_ids: Iterable[UUID]) -> dict[UUID, int]:
+        """Cantidad en órdenes ABIERTA/ENVIADA/PARCIAL por producto (0 si no tiene), desde el resumen."""
+        ids = list(dict.fromkeys(producto_ids))
+        pendientes = dict(
+            self.db.query(PendienteProducto.producto_id, PendienteProducto.cantidad)
+            .filter(PendienteProducto.producto_id.in_(ids))
+            .all()
+        )
+        return {pid: pendientes.get(pid, 0) for pid in ids}
+
+    def recalcular_pendientes(self) -> None:
+        """
+        Reconstruye pendiente_producto desde las órdenes (carga inicial o reparación). Al desplegar
+        el resumen debe correr antes de dar tráfico a la versión nueva: las OCs abiertas que ya
+        existían no tienen su cantidad en la tabla, y sus transiciones la descontarían de un resumen
+        incompleto.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            # EXCLUSIVE deja leer pero espera a las OCs en curso que ya tocaron el resumen y frena las
+            # nuevas hasta el commit: sin él, el INSERT choca con la fila que una de ellas insertó
+            self.db.execute(text(
+                f'LOCK TABLE "{schema_de(self.db)}".{PendienteProducto.__tablename__} IN EXCLUSIVE MODE'
+            ))
+        self.db.execute(delete(PendienteProducto))
+        self.db.execute(
+            insert(PendienteProducto).from_select(
+                ["producto_id", "cantidad", "actualizado_en"],
+                select(ItemOrdenCompra.producto_id, func.sum(ItemOrdenCompra.cantidad), func.now())
+                .join(OrdenCompra, OrdenCompra.id == ItemOrdenCompra.oc_id)
+                .where(OrdenCompra.estado.in_(ESTADOS_PENDIENTES))
+                .group_by(ItemOrdenCompra.producto_id),
+            )
+        )
+        self.db.commit()
 
     # --------- UPDATE (estados mínimos) ----------
     def marcar_enviada(self, oc_id: UUID) -> OrdenCompra:
@@ -127,11 +272,14 @@ class OrdenCompraService:
         if oc.estado not in {"ABIERTA","PARCIAL"}:
             raise ValueError("Transición no válida")
         oc.estado = "ENVIADA"
+        # el aviso al proveedor se confirma junto con el cambio de estado
+        encolar_oc_enviada(self.db, oc)
         self.db.commit(); self.db.refresh(oc)
         return oc
 
     def marcar_completa(self, oc_id: UUID) -> OrdenCompra:
         oc = self._ensure(oc_id)
+        self._liberar_pendientes(oc)
         oc.estado = "COMPLETA"
         self.db.commit(); self.db.refresh(oc)
         return oc
@@ -140,18 +288,193 @@ class OrdenCompraService:
         oc = self._ensure(oc_id)
         if oc.estado in {"COMPLETA","CANCELADA"}:
             raise ValueError("No puede cancelarse una OC completa/cancelada")
+        self._liberar_pendientes(oc)
         oc.estado = "CANCELADA"
         self.db.commit(); self.db.refresh(oc)
         return oc
 
+    # --------- ENMIENDA (items de una OC ABIERTA) ----------
+    def enmendar(
+        self,
+        oc_id: UUID,
+        agregar: list[dict],
+        modificar: list[dict],
+        quitar: list[UUID],
+    ) -> OrdenCompra:
+        """
+        Agrega, modifica y quita items de una OC ABIERTA en una sola transacción, sin recrearla.
+        `modificar` trae el id del item y sólo los campos que cambian. Únicamente los productos
+        con cantidad o precio nuevo se validan contra el catálogo, y los totales se ajustan con
+        la diferencia de las líneas tocadas (no se recorren los demás items).
+        """
+        if not (agregar or modificar or quitar):
+            raise ValueError("La enmienda no tiene cambios")
+        tocados = [m["id"] for m in modificar] + list(quitar)
+        if len(set(tocados)) != len(tocados):
+            raise ValueError("Cada item puede modificarse o quitarse una sola vez")
+
+        # bloqueo de la fila: dos enmiendas concurrentes ajustarían los totales sobre la misma base
+        oc = self.db.get(OrdenCompra, oc_id, with_for_update=True, populate_existing=True)
+        if not oc:
+            raise LookupError("Orden de compra no encontrada")
+        if oc.estado != "ABIERTA":
+            raise ValueError("Sólo se pueden modificar los items de una orden ABIERTA")
+
+        # sólo los items que se tocan
+        existentes = {
+            it.id: it for it in self.db.scalars(
+                select(ItemOrdenCompra).where(ItemOrdenCompra.oc_id == oc.id, ItemOrdenCompra.id.in_(tocados))
+            )
+        } if tocados else {}
+        ajenos = set(tocados) - existentes.keys()
+        if ajenos:
+            raise ValueError(f"Item(s) que no pertenecen a la orden: {', '.join(map(str, ajenos))}")
+        if quitar and not agregar:
+            quedan = self.db.scalar(
+                select(func.count()).select_from(ItemOrdenCompra).where(ItemOrdenCompra.oc_id == oc.id)
+            ) - len(quitar)
+            if quedan < 1:
+                raise ValueError("La orden debe tener items")
+
+        # estado final de cada línea modificada; las que cambian cantidad o precio van al catálogo
+        modificados = []
+        for m in modificar:
+            if "cantidad" in m and m["cantidad"] is None:
+                raise ValueError("La cantidad de un item no puede ser nula")
+            it = existentes[m["id"]]
+            nuevo = {c: getattr(it, c) for c in ("producto_id", "cantidad", "precio_unitario", "impuesto_pct",
+                                                  "descuento_pct", "sku_proveedor")}
+            nuevo.update({c: v for c, v in m.items() if c != "id"})
+            modificados.append((it, nuevo, "cantidad" in m or "precio_unitario" in m))
+        validar = list(agregar) + [nuevo for _, nuevo, revalidar in modificados if revalidar]
+        if validar:
+            producto_ids = {it["producto_id"] for it in validar}
+            rel_map = catalogo_cache.terminos(self.db, oc.proveedor_id, producto_ids)
+            missing = producto_ids - rel_map.keys()
+            if missing:
+                raise ValueError(f"Producto(s) no ofertados por el proveedor: {', '.join(map(str, missing))}")
+            n = len(agregar)
+            completados, moneda = _aplicar_catalogo(validar, rel_map, oc.moneda)
+            agregar, revalidados = completados[:n], iter(completados[n:])
+            modificados = [(it, next(revalidados) if revalidar else nuevo, revalidar)
+                           for it, nuevo, revalidar in modificados]
+            if oc.moneda is None and moneda is not None:
+                # la orden no tenía precios de catálogo: toma la moneda, con la tasa de su creación
+                oc.moneda = moneda
+                oc.tasa_cambio = tasas_cambio.tasa(self.db, moneda, oc.creado_en)
+
+        def linea(it) -> tuple[Decimal, Decimal]:
+            return calc_linea(it["precio_unitario"], it["cantidad"], it.get("descuento_pct"), it.get("impuesto_pct"))
+
+        def actual(it: ItemOrdenCompra) -> tuple[Decimal, Decimal]:
+            return calc_linea(it.precio_unitario, it.cantidad, it.descuento_pct, it.impuesto_pct)
+
+        d_neto, d_imp = Decimal("0"), Decimal("0")
+        pendientes = Counter()
+        for it in agregar:
+            neto, imp = linea(it)
+            d_neto += neto; d_imp += imp
+            pendientes[it["producto_id"]] += it["cantidad"]
+            self.db.add(ItemOrdenCompra(
+                oc_id=oc.id,
+                producto_id=it["producto_id"],
+                cantidad=it["cantidad"],
+                precio_unitario=it.get("precio_unitario"),
+                impuesto_pct=it.get("impuesto_pct"),
+                descuento_pct=it.get("descuento_pct"),
+                sku_proveedor=it["sku_proveedor"],
+            ))
+        for it, nuevo, _ in modificados:
+            (neto_0, imp_0), (neto, imp) = actual(it), linea(nuevo)
+            d_neto += neto - neto_0; d_imp += imp - imp_0
+            pendientes[it.producto_id] += nuevo["cantidad"] - it.cantidad
+            for c in ("cantidad", "precio_unitario", "impuesto_pct", "descuento_pct", "sku_proveedor"):
+                setattr(it, c, nuevo[c])
+        for item_id in quitar:
+            it = existentes[item_id]
+            neto, imp = actual(it)
+            d_neto -= neto; d_imp -= imp
+            pendientes[it.producto_id] -= it.cantidad
+            self.db.delete(it)
+
+        oc.subtotal = _dec(oc.subtotal) + d_neto
+        oc.impuesto_total = _dec(oc.impuesto_total) + d_imp
+        oc.total = oc.subtotal + oc.impuesto_total
+        oc.total_base = normalizar(oc.total, oc.tasa_cambio)
+        # cambia aunque los totales no (p. ej. sólo el sku): la versión (ETag) de la OC es actualizado_en
+        oc.actualizado_en = datetime.utcnow()
+        self._ajustar_pendientes(pendientes)
+
+        self.db.commit()
+        self.db.refresh(oc)
+        return oc
+
+    def recalcular_totales(self, oc: OrdenCompra) -> bool:
+        """Recalcula subtotal/impuesto/total desde los items actuales; True si alguno cambió."""
+        subtotal, imp, total = _calc_totales(
+            {"precio_unitario": it.precio_unitario, "cantidad": it.cantidad,
+             "descuento_pct": it.descuento_pct, "impuesto_pct": it.impuesto_pct}
+            for it in oc.items
+        )
+        # comparación a la escala de Numeric(14, 4), la que guarda la BD
+        escala = Decimal("0.0001")
+        nuevos = tuple(v.quantize(escala) for v in (subtotal, imp, total))
+        if nuevos == tuple(_dec(v).quantize(escala) for v in (oc.subtotal, oc.impuesto_total, oc.total)):
+            return False
+        oc.subtotal, oc.impuesto_total, oc.total = subtotal, imp, total
+        # la tasa es la de creación: sólo cambia el monto
+        oc.total_base = normalizar(total, oc.tasa_cambio)
+        return True
+
     # --------- DELETE ----------
     def eliminar(self, oc_id: UUID) -> None:
         oc = self._ensure(oc_id)
+        self._liberar_pendientes(oc)
+        # la exportación analítica la propaga como baja
+        self.db.add(OrdenCompraEliminada(id=oc.id, codigo=oc.codigo))
         self.db.delete(oc); self.db.commit()
 
     # --------- helpers ----------
+    def _liberar_pendientes(self, oc: OrdenCompra) -> None:
+        """Descuenta del resumen las cantidades de `oc` si sale de un estado pendiente."""
+        if oc.estado not in ESTADOS_PENDIENTES:
+            return
+        deltas = Counter()
+        for it in oc.items:
+            deltas[it.producto_id] -= it.cantidad
+        self._ajustar_pendientes(deltas)
+
+    def _ajustar_pendientes(self, deltas: Counter) -> None:
+        """
+        Un solo INSERT ... ON CONFLICT DO UPDATE con los deltas agregados por producto, en la misma
+        transacción que la orden. Las filas van ordenadas por producto para que dos órdenes
+        concurrentes bloqueen los mismos productos en el mismo orden (sin deadlocks).
+        Las filas van como executemany (el driver las agrupa en un solo VALUES): la sentencia no
+        depende del número de productos y se compila una sola vez.
+        """
+        filas = [
+            {"producto_id": pid, "cantidad": delta, "actualizado_en": datetime.utcnow()}
+            for pid, delta in sorted(deltas.items(), key=lambda kv: str(kv[0])) if delta
+        ]
+        if not filas:
+            return
+        stmt = insert_con_conflictos(self.db, PendienteProducto)
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=["producto_id"],
+            set_={"cantidad": PendienteProducto.cantidad + stmt.excluded.cantidad,
+                  "actualizado_en": stmt.excluded.actualizado_en},
+        ), filas)
+
+    def _codigo_en_uso(self, codigo: str) -> bool:
+        return any(
+            self.db.scalar(select(modelo.id).where(modelo.codigo == codigo).limit(1)) is not None
+            for modelo in (OrdenCompra, OrdenCompraArchivo)
+        )
+
     def _ensure(self, oc_id: UUID) -> OrdenCompra:
-        oc = self.obtener(oc_id)
+        # sólo OCs vivas: las archivadas son de sólo lectura. Bloquea la fila y relee el estado:
+        # dos transiciones concurrentes descontarían dos veces los pendientes de la orden
+        oc = self.db.get(OrdenCompra, oc_id, with_for_update=True, populate_existing=True)
         if not oc:
             raise LookupError("Orden de compra no encontrada")
         return oc
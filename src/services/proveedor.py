@@ -0,0 +1,35 @@
+from __future__ import annotations
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy.orm import Session
+
+from src.domain.models import OrdenCompra, OrdenCompraArchivo, Proveedor
+from src.infrastructure.infrastructure import al_confirmar, schema_de
+from src.services.catalogo_cache import catalogo_cache
+
+
+class ProveedorService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def eliminar(self, proveedor_id: UUID, definitivo: bool = False) -> None:
+        """
+        Por defecto borrado lógico: marca `eliminado_en` y desactiva el proveedor (sus OCs y
+        catálogo se conservan). Con `definitivo` borra la fila y la BD elimina el catálogo
+        (ON DELETE CASCADE, sin cargarlo); no se permite si el proveedor tiene OCs.
+        """
+        prov = self.db.get(Proveedor, proveedor_id)
+        if not prov or (prov.eliminado_en is not None and not definitivo):
+            raise LookupError("Proveedor no encontrado")
+
+        if definitivo:
+            for modelo in (OrdenCompra, OrdenCompraArchivo):
+                if self.db.query(modelo.id).filter(modelo.proveedor_id == proveedor_id).first():
+                    raise ValueError("El proveedor tiene órdenes de compra; use el borrado lógico")
+            self.db.delete(prov)
+        else:
+            prov.eliminado_en = datetime.utcnow()
+            prov.activo = False
+        self.db.commit()
+        schema = schema_de(self.db)
+        al_confirmar(self.db, lambda: catalogo_cache.invalidar(schema))
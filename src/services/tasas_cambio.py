@@ -0,0 +1,132 @@
+from __future__ import annotations
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.domain.models import TasaCambio
+from src.infrastructure.infrastructure import al_confirmar, insert_con_conflictos, schema_de
+from src.infrastructure.versiones import VersionCompartida
+
+_UNO = Decimal("1")
+_CUATRO_DECIMALES = Decimal("0.0001")
+
+
+@dataclass(frozen=True, slots=True)
+class _Historial:
+    fechas: tuple[datetime, ...]      # vigente_desde ascendente
+    tasas: tuple[Decimal, ...]
+
+
+class _TablaSchema:
+    def __init__(self, version: str, cargada_en: float, monedas: dict[str, _Historial]):
+        self.version = version
+        self.cargada_en = cargada_en
+        self.monedas = monedas
+
+
+class TasasCambioCache:
+    """
+    Tabla de tasas de cambio por tenant (schema) en memoria, completa: son pocas filas y se
+    consultan en cada OC creada. Se recarga cuando cambia la versión compartida (ver `invalidar`)
+    o tras `ttl_s`; la tasa de una fecha se busca por bisección en el historial de la moneda.
+    """
+
+    def __init__(self, moneda_base: str, ttl_s: float):
+        self.moneda_base = moneda_base
+        self.ttl_s = ttl_s
+        self.version = VersionCompartida("tasas_cambio")
+        self._schemas: dict[str, _TablaSchema] = {}
+        self._lock = threading.Lock()
+
+    def tasa(self, db: Session, moneda: Optional[str], fecha: datetime) -> Optional[Decimal]:
+        """Unidades de moneda base por 1 de `moneda` vigentes en `fecha`; None si no hay tasa."""
+        if not moneda:
+            return None
+        moneda = moneda.upper()
+        if moneda == self.moneda_base:
+            return _UNO
+        historial = self._tabla(db, schema_de(db)).get(moneda)
+        if historial is None:
+            return None
+        i = bisect_right(historial.fechas, fecha)
+        return historial.tasas[i - 1] if i else None
+
+    def invalidar(self, schema: str) -> None:
+        """Publica un cambio de tasas en el schema; todas las instancias recargan al siguiente uso."""
+        self.version.incrementar(schema)
+        with self._lock:
+            self._schemas.pop(schema, None)
+
+    def _tabla(self, db: Session, schema: str) -> dict[str, _Historial]:
+        version = self.version.actual(schema)
+        ahora = time.monotonic()
+        with self._lock:
+            tabla = self._schemas.get(schema)
+            if tabla is not None and tabla.version == version and ahora - tabla.cargada_en < self.ttl_s:
+                return tabla.monedas
+
+        filas = db.execute(
+            select(TasaCambio.moneda, TasaCambio.vigente_desde, TasaCambio.tasa)
+            .order_by(TasaCambio.moneda, TasaCambio.vigente_desde)
+        ).all()
+        historiales: dict[str, tuple[list, list]] = {}
+        for moneda, vigente_desde, tasa in filas:
+            fechas, tasas = historiales.setdefault(moneda, ([], []))
+            fechas.append(vigente_desde)
+            tasas.append(Decimal(tasa))
+        monedas = {m: _Historial(tuple(f), tuple(t)) for m, (f, t) in historiales.items()}
+
+        with self._lock:
+            self._schemas[schema] = _TablaSchema(version, ahora, monedas)
+        return monedas
+
+
+tasas_cambio = TasasCambioCache(moneda_base=settings.MONEDA_BASE, ttl_s=settings.TASAS_CACHE_TTL_S)
+
+
+def normalizar(total: Optional[Decimal], tasa: Optional[Decimal]) -> Optional[Decimal]:
+    """`total` en moneda base a la escala de Numeric(18, 4); None si falta el total o la tasa."""
+    if total is None or tasa is None:
+        return None
+    return (Decimal(total) * tasa).quantize(_CUATRO_DECIMALES)
+
+
+class TasaCambioService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def registrar(self, moneda: str, tasa: Decimal, vigente_desde: Optional[datetime] = None) -> TasaCambio:
+        """
+        Registra (o corrige, si ya existe para esa fecha) la tasa de `moneda` desde `vigente_desde`.
+        No recalcula las OCs existentes: conservan la tasa con la que se crearon.
+        """
+        moneda = moneda.upper()
+        if moneda == tasas_cambio.moneda_base:
+            raise ValueError(f"{moneda} es la moneda base")
+        if tasa <= 0:
+            raise ValueError("La tasa debe ser mayor que 0")
+        fila = {"moneda": moneda, "vigente_desde": vigente_desde or datetime.utcnow(), "tasa": tasa,
+                "creado_en": datetime.utcnow()}
+        stmt = insert_con_conflictos(self.db, TasaCambio).values(fila)
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=["moneda", "vigente_desde"],
+            set_={"tasa": stmt.excluded.tasa, "creado_en": stmt.excluded.creado_en},
+        ))
+        self.db.commit()
+        schema = schema_de(self.db)
+        al_confirmar(self.db, lambda: tasas_cambio.invalidar(schema))
+        return TasaCambio(**fila)
+
+    def listar(self, moneda: Optional[str], limit: int = 100, offset: int = 0) -> list[TasaCambio]:
+        stmt = select(TasaCambio)
+        if moneda:
+            stmt = stmt.where(TasaCambio.moneda == moneda.upper())
+        stmt = stmt.order_by(TasaCambio.moneda, TasaCambio.vigente_desde.desc()).offset(offset).limit(limit)
+        return list(self.db.scalars(stmt))
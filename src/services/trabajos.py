@@ -0,0 +1,377 @@
+from __future__ import annotations
+import logging
+from abc import ABC, abstractmethod
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, ContextManager, Optional, Protocol
+from uuid import UUID
+from sqlalchemy import or_, tuple_, update
+from sqlalchemy.orm import Session, selectinload
+
+from src.config import settings
+from src.domain.models import OrdenCompra, ProductoProveedor, Trabajo
+from src.infrastructure.infrastructure import al_confirmar, schema_de, session_fondo
+from src.services.orden_compra import ESTADOS_PENDIENTES, ESTADOS_VALIDOS, OrdenCompraService
+from src.services.tasas_cambio import normalizar, tasas_cambio
+
+log = logging.getLogger(__name__)
+
+ESTADOS_TERMINALES = ("COMPLETADO", "CANCELADO", "FALLIDO")
+
+
+class TipoTrabajo(Protocol):
+    def validar(self, parametros: dict[str, Any]) -> None:
+        """ValueError si los parámetros no son válidos."""
+
+    def total(self, db: Session, parametros: dict[str, Any]) -> Optional[int]:
+        """Cantidad de elementos a procesar (para el progreso), si se conoce."""
+
+    def lote(self, db: Session, parametros: dict[str, Any], cursor: Optional[str], tamano: int) -> tuple[Optional[str], int]:
+        """Procesa hasta `tamano` elementos después de `cursor`: (nuevo cursor o None si terminó, procesados)."""
+
+
+def _uuid(v, campo: str) -> UUID:
+    try:
+        return UUID(str(v))
+    except ValueError:
+        raise ValueError(f"{campo} debe ser un UUID")
+
+
+class _LoteDeOrdenes(ABC):
+    """
+    Recorre por id (keyset) las OCs que cumplen `_filtro`. Cada página se vuelve a leer con
+    bloqueo de las OCs (como `_ensure`) y el filtro aplicado otra vez: así no se pisa una enmienda
+    o una transición que se confirmó entre medio, y las OCs archivadas o eliminadas en ese lapso
+    simplemente no vienen. Los items se cargan ya con el bloqueo tomado.
+    """
+
+    con_items = True
+
+    @abstractmethod
+    def _filtro(self, qy, parametros: dict[str, Any]):
+        """Restringe la consulta `qy` (sobre OrdenCompra) a las OCs del trabajo."""
+
+    @abstractmethod
+    def _procesar(self, svc: OrdenCompraService, ocs: list[OrdenCompra], parametros: dict[str, Any]) -> None:
+        """Aplica el trabajo a un lote de OCs."""
+
+    def total(self, db: Session, parametros: dict[str, Any]) -> Optional[int]:
+        return self._filtro(db.query(OrdenCompra.id), parametros).count()
+
+    def lote(self, db: Session, parametros: dict[str, Any], cursor: Optional[str], tamano: int) -> tuple[Optional[str], int]:
+        qy = self._filtro(db.query(OrdenCompra.id), parametros)
+        if cursor:
+            qy = qy.filter(OrdenCompra.id > UUID(cursor))
+        ids = [oc_id for oc_id, in qy.order_by(OrdenCompra.id).limit(tamano)]
+        if not ids:
+            return None, 0
+        ocs = self._bloqueadas(db, parametros, ids).all()
+        self._procesar(OrdenCompraService(db), ocs, parametros)
+        return (str(ids[-1]) if len(ids) == tamano else None), len(ocs)
+
+    def _bloqueadas(self, db: Session, parametros: dict[str, Any], ids: list[UUID]):
+        # FOR UPDATE vuelve a evaluar el filtro sobre la versión confirmada de cada fila bloqueada
+        qy = (
+            self._filtro(db.query(OrdenCompra), parametros)
+            .filter(OrdenCompra.id.in_(ids))
+            .order_by(OrdenCompra.id)
+            .with_for_update(of=OrdenCompra)
+            .populate_existing()
+        )
+        if self.con_items:
+            qy = qy.options(selectinload(OrdenCompra.items))
+        return qy
+
+
+class RecalcularTotales(_LoteDeOrdenes):
+    """
+    Recalcula subtotal/impuesto/total de las OCs (por defecto ABIERTA/ENVIADA/PARCIAL).
+    Con `impuesto_pct` primero fija ese impuesto en todos sus items (cambio de tarifa).
+    Parámetros: estados, proveedor_id, impuesto_pct (todos opcionales).
+    """
+
+    def validar(self, parametros: dict[str, Any]) -> None:
+        estados = set(parametros.get("estados") or ESTADOS_PENDIENTES)
+        if estados - ESTADOS_VALIDOS:
+            raise ValueError(f"Estados inválidos: {', '.join(sorted(estados - ESTADOS_VALIDOS))}")
+        if parametros.get("proveedor_id") is not None:
+            _uuid(parametros["proveedor_id"], "proveedor_id")
+        if parametros.get("impuesto_pct") is not None and not 0 <= Decimal(str(parametros["impuesto_pct"])) <= 100:
+            raise ValueError("impuesto_pct debe estar entre 0 y 100")
+
+    def _filtro(self, qy, parametros):
+        qy = qy.filter(OrdenCompra.estado.in_(parametros.get("estados") or ESTADOS_PENDIENTES))
+        if parametros.get("proveedor_id"):
+            qy = qy.filter(OrdenCompra.proveedor_id == UUID(parametros["proveedor_id"]))
+        return qy
+
+    def _procesar(self, svc, ocs, parametros):
+        impuesto = parametros.get("impuesto_pct")
+        for oc in ocs:
+            if impuesto is not None:
+                for it in oc.items:
+                    it.impuesto_pct = Decimal(str(impuesto))
+            svc.recalcular_totales(oc)
+
+
+class RepreciarAbiertas(_LoteDeOrdenes):
+    """
+    Actualiza el precio de los items de las OCs ABIERTA con el precio vigente del catálogo del
+    proveedor (si el producto sigue activo, tiene precio y la moneda coincide) y recalcula sus totales.
+    Parámetros: proveedor_id (opcional).
+    """
+
+    def validar(self, parametros: dict[str, Any]) -> None:
+        if parametros.get("proveedor_id") is not None:
+            _uuid(parametros["proveedor_id"], "proveedor_id")
+
+    def _filtro(self, qy, parametros):
+        qy = qy.filter(OrdenCompra.estado == "ABIERTA")
+        if parametros.get("proveedor_id"):
+            qy = qy.filter(OrdenCompra.proveedor_id == UUID(parametros["proveedor_id"]))
+        return qy
+
+    def _procesar(self, svc, ocs, parametros):
+        pares = {(oc.proveedor_id, it.producto_id) for oc in ocs for it in oc.items}
+        if not pares:
+            return
+        catalogo = {
+            (r.proveedor_id, r.producto_id): r
+            for r in svc.db.query(ProductoProveedor.proveedor_id, ProductoProveedor.producto_id,
+                                  ProductoProveedor.precio, ProductoProveedor.moneda)
+            .filter(tuple_(ProductoProveedor.proveedor_id, ProductoProveedor.producto_id).in_(list(pares)),
+                    ProductoProveedor.activo.is_(True))
+        }
+        for oc in ocs:
+            for it in oc.items:
+                rel = catalogo.get((oc.proveedor_id, it.producto_id))
+                if rel is None or rel.precio is None or (oc.moneda and rel.moneda and rel.moneda != oc.moneda):
+                    continue
+                it.precio_unitario = rel.precio
+            svc.recalcular_totales(oc)
+
+
+class NormalizarTotales(_LoteDeOrdenes):
+    """
+    Completa tasa_cambio/total_base de las OCs que no lo tienen (anteriores a la tabla de tasas, o
+    creadas sin tasa vigente) con la tasa vigente en su fecha de creación. Las que siguen sin tasa
+    quedan igual. Parámetros: estados (opcional, por defecto todos).
+    """
+
+    con_items = False
+
+    def validar(self, parametros: dict[str, Any]) -> None:
+        estados = set(parametros.get("estados") or ESTADOS_VALIDOS)
+        if estados - ESTADOS_VALIDOS:
+            raise ValueError(f"Estados inválidos: {', '.join(sorted(estados - ESTADOS_VALIDOS))}")
+
+    def _filtro(self, qy, parametros):
+        qy = qy.filter(OrdenCompra.total_base.is_(None), OrdenCompra.total.isnot(None), OrdenCompra.moneda.isnot(None))
+        if parametros.get("estados"):
+            qy = qy.filter(OrdenCompra.estado.in_(parametros["estados"]))
+        return qy
+
+    def _procesar(self, svc, ocs, parametros):
+        for oc in ocs:
+            tasa = tasas_cambio.tasa(svc.db, oc.moneda, oc.creado_en)
+            if tasa is not None:
+                oc.tasa_cambio, oc.total_base = tasa, normalizar(oc.total, tasa)
+
+
+TIPOS_TRABAJO: dict[str, TipoTrabajo] = {
+    "recalcular_totales": RecalcularTotales(),
+    "repreciar_abiertas": RepreciarAbiertas(),
+    "normalizar_totales": NormalizarTotales(),
+}
+
+
+class EjecutorTrabajos:
+    """
+    Ejecuta trabajos en un pool acotado de hilos. Cada lote se procesa en su propia transacción
+    junto con el avance del trabajo (cursor, procesados, latido), así que tras un reinicio se
+    retoma desde el último lote confirmado. Un trabajo EN_CURSO cuyo latido supera `lease_s`
+    se considera abandonado y cualquier instancia puede retomarlo.
+
+    Sólo corre en el proceso que lo inicia (`iniciar`, un worker por instancia): los trabajos que
+    encolan los demás los recoge el sondeo, cada `sondeo_s`.
+    """
+
+    def __init__(
+        self,
+        tipos: dict[str, TipoTrabajo],
+        max_workers: int,
+        lote: int,
+        lease_s: float,
+        sondeo_s: float = 10,
+        sesion: Callable[[str], ContextManager[Session]] = session_fondo,
+    ):
+        self.tipos = tipos
+        self.max_workers = max_workers
+        self.lote = lote
+        self.lease_s = lease_s
+        self.sondeo_s = sondeo_s
+        self.sesion = sesion
+        self.instancia = f"{socket.gethostname()}-{os.getpid()}"[:64]
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._sondeo: Optional[threading.Thread] = None
+        self._en_cola: set[tuple[str, UUID]] = set()
+
+    # --------- API para las rutas ----------
+    def crear(self, db: Session, tipo: str, parametros: dict[str, Any]) -> Trabajo:
+        if tipo not in self.tipos:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}. Disponibles: {', '.join(sorted(self.tipos))}")
+        self.tipos[tipo].validar(parametros)
+        trabajo = Trabajo(tipo=tipo, parametros=parametros, estado="PENDIENTE", procesados=0)
+        db.add(trabajo)
+        db.commit()
+        db.refresh(trabajo)
+        if self._sondeo is not None:  # en otro worker lo recoge el sondeo
+            schema, trabajo_id = schema_de(db), trabajo.id
+            al_confirmar(db, lambda: self.enviar(schema, trabajo_id))
+        return trabajo
+
+    def cancelar(self, db: Session, trabajo_id: UUID) -> Trabajo:
+        trabajo = db.get(Trabajo, trabajo_id)
+        if not trabajo:
+            raise LookupError("Trabajo no encontrado")
+        if trabajo.estado in ESTADOS_TERMINALES:
+            raise ValueError(f"El trabajo ya terminó ({trabajo.estado})")
+        # el worker lo ve al empezar el siguiente lote
+        trabajo.estado = "CANCELADO"
+        trabajo.terminado_en = datetime.utcnow()
+        db.commit()
+        db.refresh(trabajo)
+        return trabajo
+
+    # --------- ciclo de vida ----------
+    def iniciar(self, schemas: list[str], listo: Callable[[str], bool] = lambda s: True) -> None:
+        """Retoma los trabajos pendientes o abandonados de cada schema y los vuelve a buscar cada `sondeo_s`."""
+        self._ejecutor()
+        with self._lock:
+            if self._sondeo is not None:
+                return
+            self._sondeo = threading.Thread(
+                target=self._sondear, args=(list(schemas), listo, self._parar), name="trabajos-sondeo", daemon=True,
+            )
+            self._sondeo.start()
+
+    def enviar(self, schema: str, trabajo_id: UUID) -> None:
+        clave = (schema, trabajo_id)
+        with self._lock:
+            if clave in self._en_cola:
+                return
+            self._en_cola.add(clave)
+        futuro = self._ejecutor().submit(self.ejecutar, schema, trabajo_id)
+        futuro.add_done_callback(lambda _: self._en_cola.discard(clave))
+
+    def detener(self) -> None:
+        self._parar.set()
+        with self._lock:
+            self._sondeo = None
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            self._en_cola.clear()
+
+    def _ejecutor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._parar = threading.Event()
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="trabajos")
+            return self._pool
+
+    # --------- ejecución ----------
+    def _sondear(self, schemas: list[str], listo: Callable[[str], bool], parar: threading.Event) -> None:
+        while not parar.is_set():
+            for schema in schemas:
+                if listo(schema):  # las tablas del schema ya están verificadas
+                    for trabajo_id in self._pendientes(schema):
+                        self.enviar(schema, trabajo_id)
+            parar.wait(self.sondeo_s)
+
+    def _pendientes(self, schema: str) -> list[UUID]:
+        try:
+            with self.sesion(schema) as db:
+                return [
+                    t for (t,) in db.query(Trabajo.id).filter(or_(
+                        Trabajo.estado == "PENDIENTE",
+                        (Trabajo.estado == "EN_CURSO") & self._abandonado(),
+                    )).order_by(Trabajo.creado_en)
+                ]
+        except Exception as e:
+            log.warning("No se pudieron buscar trabajos pendientes en schema %s: %s", schema, e)
+            return []
+
+    def _abandonado(self):
+        return or_(Trabajo.latido_en.is_(None), Trabajo.latido_en < datetime.utcnow() - timedelta(seconds=self.lease_s))
+
+    def _tomar(self, db: Session, trabajo_id: UUID) -> bool:
+        tomado = db.execute(
+            update(Trabajo)
+            .where(Trabajo.id == trabajo_id, or_(
+                Trabajo.estado == "PENDIENTE",
+                (Trabajo.estado == "EN_CURSO") & self._abandonado(),
+            ))
+            .values(estado="EN_CURSO", tomado_por=self.instancia, latido_en=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        return tomado.rowcount == 1
+
+    def ejecutar(self, schema: str, trabajo_id: UUID) -> None:
+        parar = self._parar
+        try:
+            with self.sesion(schema) as db:
+                if not self._tomar(db, trabajo_id):
+                    return
+                trabajo = db.get(Trabajo, trabajo_id, populate_existing=True)
+                tipo = self.tipos[trabajo.tipo]
+                if trabajo.total is None:
+                    trabajo.total = tipo.total(db, trabajo.parametros)
+                db.commit()
+
+            terminado = False
+            while not terminado and not parar.is_set():
+                with self.sesion(schema) as db:
+                    trabajo = db.get(Trabajo, trabajo_id, with_for_update=True, populate_existing=True)
+                    if trabajo.estado != "EN_CURSO" or trabajo.tomado_por != self.instancia:
+                        return  # cancelado o retomado por otra instancia
+                    cursor, n = tipo.lote(db, trabajo.parametros, trabajo.cursor, self.lote)
+                    trabajo.cursor = cursor or trabajo.cursor
+                    trabajo.procesados += n
+                    trabajo.latido_en = datetime.utcnow()
+                    terminado = cursor is None
+                    if terminado:
+                        trabajo.estado = "COMPLETADO"
+                        trabajo.terminado_en = datetime.utcnow()
+                    db.commit()
+            if terminado:
+                log.info("Trabajo %s (%s) completado en schema %s", trabajo_id, trabajo.tipo, schema)
+        except Exception as e:
+            log.exception("Trabajo %s falló en schema %s", trabajo_id, schema)
+            try:
+                with self.sesion(schema) as db:
+                    db.execute(
+                        update(Trabajo)
+                        .where(Trabajo.id == trabajo_id, Trabajo.estado == "EN_CURSO")
+                        .values(estado="FALLIDO", error=str(e)[:1000], terminado_en=datetime.utcnow())
+                        .execution_options(synchronize_session=False)
+                    )
+                    db.commit()
+            except Exception:
+                # sin BD: queda EN_CURSO y se retoma cuando venza el lease
+                log.exception("No se pudo marcar el trabajo %s como fallido", trabajo_id)
+
+
+ejecutor_trabajos = EjecutorTrabajos(
+    TIPOS_TRABAJO,
+    max_workers=settings.TRABAJOS_WORKERS,
+    lote=settings.TRABAJOS_LOTE,
+    lease_s=settings.TRABAJOS_LEASE_S,
+    sondeo_s=settings.TRABAJOS_SONDEO_S,
+)
@@ -0,0 +1,100 @@
+"""
+Configuración de gunicorn para producción: N procesos worker de uvicorn sobre la misma app.
+
+    gunicorn -c python:src.servidor src.app:app
+
+  - workers: WEB_WORKERS o, si es 0, uno por CPU disponible para el contenedor (afinidad y cuota
+    de cgroup; en Cloud Run os.cpu_count() ve los núcleos del host, no los asignados).
+  - preload (WEB_PRELOAD): la app se importa una vez en el master y los workers la heredan por
+    fork (arranque más rápido, memoria compartida). El lifespan (schemas) sigue corriendo en cada
+    worker; pools de BD, Redis y el hilo de logging se rehacen tras el fork (os.register_at_fork
+    en infrastructure y logs).
+  - trabajos y webhooks: corren en un solo worker (WEB_FONDO), con un pool reservado para ellos;
+    si ese worker muere o se recarga el servidor, los hereda el siguiente que se crea.
+  - pool de BD por worker: DB_POOL_TOTAL, menos la reserva de trabajos y webhooks, y
+    DB_MAX_OVERFLOW_TOTAL repartidos entre los workers.
+  - apagado: con SIGTERM cada worker deja de aceptar conexiones, espera las peticiones en curso
+    hasta WEB_GRACEFUL_TIMEOUT_S y al salir del lifespan cierra el pool.
+"""
+import math
+import os
+from typing import Optional
+
+from src.config import settings
+
+_CGROUP_V2 = "/sys/fs/cgroup/cpu.max"
+_CGROUP_V1 = ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+
+
+def _leer(ruta: str) -> Optional[str]:
+    try:
+        with open(ruta) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cuota_cgroup(cgroup_v2: str = _CGROUP_V2, cgroup_v1: tuple[str, str] = _CGROUP_V1) -> Optional[float]:
+    """CPUs de la cuota del contenedor (cuota / periodo); None si no tiene límite."""
+    v2 = _leer(cgroup_v2)
+    if v2:
+        cuota, _, periodo = v2.partition(" ")
+        if cuota != "max" and periodo:
+            return int(cuota) / int(periodo)
+        return None
+    cuota, periodo = (_leer(r) for r in cgroup_v1)
+    if cuota and periodo and int(cuota) > 0:
+        return int(cuota) / int(periodo)
+    return None
+
+
+def cpus_disponibles(cgroup_v2: str = _CGROUP_V2, cgroup_v1: tuple[str, str] = _CGROUP_V1) -> int:
+    """CPUs que el proceso puede usar: afinidad, acotada por la cuota de cgroup (redondeada hacia arriba)."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    cuota = _cuota_cgroup(cgroup_v2, cgroup_v1)
+    if cuota is not None:
+        cpus = min(cpus, math.ceil(cuota))
+    return max(1, cpus)
+
+
+def resolver_workers() -> int:
+    return settings.WEB_WORKERS if settings.WEB_WORKERS > 0 else cpus_disponibles()
+
+
+# el master la resuelve antes de importar la app: infrastructure reparte el pool con este valor
+settings.WEB_WORKERS = resolver_workers()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = settings.WEB_WORKERS
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = settings.WEB_PRELOAD
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT_S
+keepalive = settings.WEB_KEEPALIVE_S
+# sin timeout de worker, como recomienda Cloud Run: el límite por petición lo aplica la plataforma
+timeout = 0
+forwarded_allow_ips = "*"
+
+
+def on_starting(server):
+    from src.infrastructure.infrastructure import opciones_pool, reserva_fondo
+    pool = opciones_pool(workers)
+    server.log.info("ms-compras: %s workers, pool de BD por worker %s+%s, %s para trabajos y webhooks (preload=%s)",
+                    workers, pool["pool_size"], pool["max_overflow"], reserva_fondo(), preload_app)
+
+
+def on_reload(server):
+    # los workers actuales se van a reemplazar: el de fondo pasa a uno de los nuevos (mientras el
+    # anterior termina ambos pueden tomar trabajos y notificaciones; se toman con lease, sin duplicar)
+    for w in server.WORKERS.values():
+        w.fondo = False
+
+
+def pre_fork(server, worker):
+    # el master lo decide antes del fork: el worker nuevo es el de fondo si ningún otro vivo lo es
+    worker.fondo = not any(getattr(w, "fondo", False) for w in server.WORKERS.values())
+
+
+def post_fork(server, worker):
+    settings.WEB_FONDO = worker.fondo
+    if worker.fondo:
+        server.log.info("worker %s: ejecuta trabajos y webhooks", worker.pid)
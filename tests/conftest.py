@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from src.domain import models
+
+
+@pytest.fixture
+def sqlite_session():
+    """Sesión sobre SQLite en memoria con el schema 'co' adjunto (schema_translate_map como en producción)."""
+    # StaticPool + check_same_thread=False: las rutas usan la sesión desde el threadpool de FastAPI
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _adjuntar_schema(dbapi_conn, _):
+        dbapi_conn.execute("ATTACH DATABASE ':memory:' AS co")
+        dbapi_conn.execute("PRAGMA foreign_keys = ON")
+
+    with engine.connect().execution_options(schema_translate_map={None: "co"}) as conn:
+        models.Base.metadata.create_all(conn)
+        with Session(bind=conn, info={"schema": "co"}, expire_on_commit=False) as session:
+            yield session
@@ -0,0 +1,228 @@
+"""
+Planes de ejecución de las consultas de las rutas sobre una BD sembrada (PostgreSQL o SQLite).
+
+`CapturaPlanes` registra el EXPLAIN de cada SELECT que pasa por una conexión, con el mismo SQL y
+parámetros que envía la ruta; `planes_de_rutas` llama a las rutas de `CONSULTAS_RUTAS` sobre una
+sesión y devuelve sus planes; `sembrar` llena la BD con datos de prueba. Helper de los tests
+(test_planes, test_lecturas) compartido con scripts/ (explicar_consultas, bench_*): no es parte
+del servicio.
+"""
+from __future__ import annotations
+
+import random
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Union
+
+from sqlalchemy import Connection, Engine, event, insert, text
+from sqlalchemy.orm import Session
+
+from src.domain.models import Auditoria, ItemOrdenCompra, OrdenCompra, PendienteProducto, ProductoProveedor, Proveedor
+
+# tablas que crecen con el negocio: ningún plan de ruta debe recorrerlas completas
+TABLAS_GRANDES = ("proveedor", "producto_proveedor", "orden_compra", "item_orden_compra", "auditoria")
+
+_PAISES = ("CO", "EC", "MX", "PE")
+_ESTADOS = ("ABIERTA", "ENVIADA", "PARCIAL", "COMPLETA", "CANCELADA")
+
+
+@dataclass
+class Plan:
+    sql: str
+    indices: set[str] = field(default_factory=set)
+    secuenciales: set[str] = field(default_factory=set)   # tablas recorridas completas
+    texto: str = ""
+
+
+def _plan_postgresql(sql: str, filas) -> Plan:
+    plan = Plan(sql)
+    documento = filas[0][0]
+    pendientes = [documento[0]["Plan"]]
+    while pendientes:
+        nodo = pendientes.pop()
+        if nodo.get("Index Name"):
+            plan.indices.add(nodo["Index Name"])
+        if nodo["Node Type"] == "Seq Scan":
+            plan.secuenciales.add(nodo["Relation Name"])
+        pendientes.extend(nodo.get("Plans", ()))
+    plan.texto = str(documento)
+    return plan
+
+
+_SQLITE_PASO = re.compile(r"^(SCAN|SEARCH) (?:\w+\.)?(\w+)")
+_SQLITE_INDICE = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+def _plan_sqlite(sql: str, filas) -> Plan:
+    plan = Plan(sql, texto="\n".join(f[-1] for f in filas))
+    for *_, detalle in filas:
+        paso = _SQLITE_PASO.match(detalle)
+        if not paso:
+            continue
+        indice = _SQLITE_INDICE.search(detalle)
+        if indice and "AUTOMATIC" not in detalle:
+            plan.indices.add(indice.group(1))
+        elif paso.group(1) == "SCAN" or "AUTOMATIC" in detalle:
+            # SCAN sin índice, o índice temporal construido recorriendo la tabla entera
+            plan.secuenciales.add(paso.group(2))
+    return plan
+
+
+class CapturaPlanes:
+    """
+    Mientras está activa, ejecuta `EXPLAIN` de cada SELECT que pasa por `bind` (en un cursor aparte,
+    antes de la consulta real, que no se altera) y acumula los planes en `planes`.
+    """
+
+    def __init__(self, bind: Union[Engine, Connection]):
+        self.bind = bind
+        self.planes: list[Plan] = []
+
+    def __enter__(self) -> "CapturaPlanes":
+        event.listen(self.bind, "before_cursor_execute", self._explicar)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.bind, "before_cursor_execute", self._explicar)
+
+    def _explicar(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if executemany or not statement.lstrip().upper().startswith("SELECT"):
+            return
+        postgresql = conn.dialect.name == "postgresql"
+        prefijo = "EXPLAIN (FORMAT JSON) " if postgresql else "EXPLAIN QUERY PLAN "
+        cur = cursor.connection.cursor()
+        try:
+            cur.execute(prefijo + statement, parameters)
+            filas = cur.fetchall()
+        finally:
+            cur.close()
+        self.planes.append((_plan_postgresql if postgresql else _plan_sqlite)(statement, filas))
+
+
+def sembrar(
+    db: Session,
+    schema: str,
+    proveedores: int = 2000,
+    productos_por_proveedor: int = 10,
+    ocs: int = 5000,
+    items_por_oc: int = 3,
+    semilla: int = 17,
+) -> dict[str, Any]:
+    """
+    Llena las tablas con datos sintéticos de distribución realista (países, activos, estados) y
+    actualiza las estadísticas. Devuelve ids de muestra para las rutas de `CONSULTAS_RUTAS`.
+    """
+    rnd = random.Random(semilla)
+    uid = lambda: uuid.UUID(int=rnd.getrandbits(128), version=4)  # noqa: E731
+    ahora = datetime(2025, 6, 1)
+    productos = [uid() for _ in range(max(productos_por_proveedor * 20, 50))]
+
+    filas_prov, filas_cat = [], []
+    for i in range(proveedores):
+        pid = uid()
+        filas_prov.append({
+            "id": pid, "nombre": f"Proveedor {rnd.randrange(10**6):06d}", "tipo_de_persona": "JURIDICA",
+            "documento": f"{900000000 + i}", "tipo_documento": "NIT", "pais": _PAISES[i % len(_PAISES)],
+            "activo": rnd.random() < 0.9, "eliminado_en": ahora if rnd.random() < 0.05 else None,
+            "creado_en": ahora, "actualizado_en": ahora,
+        })
+        for j, producto_id in enumerate(rnd.sample(productos, productos_por_proveedor)):
+            filas_cat.append({
+                "proveedor_id": pid, "producto_id": producto_id, "sku_proveedor": f"SKU-{i}-{j}",
+                "precio": Decimal("1000.0000"), "moneda": "COP", "activo": rnd.random() < 0.8,
+            })
+
+    filas_oc, filas_item = [], []
+    for i in range(ocs):
+        oc_id = uid()
+        filas_oc.append({
+            "id": oc_id, "codigo": f"OC-2025-{i:06d}", "proveedor_id": rnd.choice(filas_prov)["id"],
+            # la mayoría de las OCs históricas están cerradas
+            "estado": rnd.choices(_ESTADOS, weights=(5, 3, 2, 60, 30))[0],
+            "creado_en": ahora - timedelta(minutes=i), "actualizado_en": ahora - timedelta(minutes=i),
+        })
+        for _ in range(items_por_oc):
+            filas_item.append({"id": uid(), "oc_id": oc_id, "producto_id": rnd.choice(productos), "cantidad": 1})
+
+    # historial: alta de cada OC y cambios de estado de las que ya no están ABIERTA
+    filas_auditoria = []
+    for oc in filas_oc:
+        filas_auditoria.append({"raiz": "orden_compra", "raiz_id": oc["id"], "creado_en": oc["creado_en"],
+                                "cambios": [{"t": "orden_compra", "id": str(oc["id"]), "op": "I", "c": {"estado": "ABIERTA"}}]})
+        if oc["estado"] != "ABIERTA":
+            filas_auditoria.append({"raiz": "orden_compra", "raiz_id": oc["id"], "creado_en": oc["creado_en"],
+                                    "cambios": [{"t": "orden_compra", "id": str(oc["id"]), "op": "U",
+                                                 "c": {"estado": ["ABIERTA", oc["estado"]]}}]})
+    for prov in filas_prov:
+        filas_auditoria.append({"raiz": "proveedor", "raiz_id": prov["id"], "creado_en": ahora,
+                                "cambios": [{"t": "proveedor", "id": str(prov["id"]), "op": "I", "c": {"nombre": prov["nombre"]}}]})
+
+    for modelo, filas in ((Proveedor, filas_prov), (ProductoProveedor, filas_cat),
+                          (OrdenCompra, filas_oc), (ItemOrdenCompra, filas_item), (Auditoria, filas_auditoria)):
+        for i in range(0, len(filas), 5000):
+            db.execute(insert(modelo), filas[i:i + 5000])
+    db.execute(insert(PendienteProducto), [{"producto_id": p, "cantidad": 1, "actualizado_en": ahora} for p in productos])
+    db.commit()
+    for tabla in (*TABLAS_GRANDES, PendienteProducto.__tablename__):
+        db.execute(text(f'ANALYZE "{schema}".{tabla}'))
+    db.commit()
+
+    vigente = next(p for p in filas_prov if p["eliminado_en"] is None)
+    return {"proveedor_id": vigente["id"], "producto_id": productos[0], "pais": vigente["pais"], "oc_id": filas_oc[0]["id"]}
+
+
+@dataclass(frozen=True)
+class ConsultaRuta:
+    nombre: str
+    ruta: str                     # con {proveedor_id}/{producto_id}/{pais}/{oc_id} de la muestra de `sembrar`
+    indices: frozenset[str]       # alguno debe aparecer en los planes de la ruta
+
+
+CONSULTAS_RUTAS = (
+    ConsultaRuta("proveedores", "/v1/proveedores?limit=50", frozenset({"ix_proveedor_nombre"})),
+    ConsultaRuta("proveedores_por_pais", "/v1/proveedores?pais={pais}", frozenset({"ix_proveedor_pais_nombre"})),
+    ConsultaRuta("proveedores_activos", "/v1/proveedores?activo=true",
+                 frozenset({"ix_proveedor_activos_nombre", "ix_proveedor_nombre"})),
+    ConsultaRuta("proveedores_activos_por_pais", "/v1/proveedores?pais={pais}&activo=true",
+                 frozenset({"ix_proveedor_pais_nombre"})),
+    ConsultaRuta("productos_de_proveedor_activos", "/v1/proveedores/{proveedor_id}/productos?activo=true",
+                 frozenset({"ix_cat_prov_activos", "producto_proveedor_pkey", "sqlite_autoindex_producto_proveedor_1"})),
+    ConsultaRuta("proveedores_por_producto", "/v1/proveedores/{producto_id}/proveedores",
+                 frozenset({"ix_cat_producto"})),
+    ConsultaRuta("proveedores_por_producto_activos",
+                 "/v1/proveedores/{producto_id}/proveedores?activo_relacion=true",
+                 frozenset({"ix_cat_producto_activos", "ix_cat_producto"})),
+    ConsultaRuta("ordenes", "/v1/ordenes-compra?limit=50", frozenset({"ix_oc_creado"})),
+    ConsultaRuta("ordenes_por_estado", "/v1/ordenes-compra?estado=ABIERTA", frozenset({"ix_oc_estado_creado"})),
+    ConsultaRuta("ordenes_de_proveedor", "/v1/ordenes-compra?proveedor_id={proveedor_id}",
+                 frozenset({"ix_oc_proveedor_estado"})),
+    ConsultaRuta("historial_oc", "/v1/ordenes-compra/{oc_id}/historial", frozenset({"ix_auditoria_raiz"})),
+    ConsultaRuta("historial_proveedor", "/v1/proveedores/{proveedor_id}/historial?antes_de=1000000",
+                 frozenset({"ix_auditoria_raiz"})),
+)
+
+
+def planes_de_rutas(db: Session, muestra: dict[str, Any], consultas=CONSULTAS_RUTAS) -> dict[str, list[Plan]]:
+    """Planes de los SELECT que ejecuta cada ruta (GET por la app completa) sobre la sesión `db`."""
+    from fastapi.testclient import TestClient
+
+    from src.app import app
+    from src.dependencies import get_read_session, get_session
+
+    app.dependency_overrides[get_session] = lambda: db
+    app.dependency_overrides[get_read_session] = lambda: db
+    planes: dict[str, list[Plan]] = {}
+    try:
+        with TestClient(app) as client:
+            for consulta in consultas:
+                with CapturaPlanes(db.connection()) as captura:
+                    r = client.get(consulta.ruta.format(**muestra))
+                r.raise_for_status()
+                planes[consulta.nombre] = captura.planes
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        app.dependency_overrides.pop(get_read_session, None)
+    return planes
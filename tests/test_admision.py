@@ -0,0 +1,171 @@
+import asyncio
+import uuid
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.middleware.admision import AdmisionMiddleware, MetricasAdmision, TokenBucketLocal
+
+
+def _app(**kwargs):
+    app = FastAPI()
+    metricas = MetricasAdmision()
+    app.add_middleware(AdmisionMiddleware, metricas=metricas, **kwargs)
+
+    @app.get("/v1/recurso/{id}")
+    async def recurso(id: str):
+        await asyncio.sleep(0.05)
+        return {"id": id}
+
+    @app.get("/v1/recurso/por-codigo/{codigo}")
+    async def por_codigo(codigo: str):
+        return {"codigo": codigo}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app, metricas
+
+
+def _client(app):
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_token_bucket_local_recarga_en_el_tiempo():
+    bucket = TokenBucketLocal()
+    with patch("src.middleware.admision.time.monotonic", side_effect=[0.0, 0.0, 0.0, 1.0]):
+        assert bucket.tomar("k", rps=1, burst=2)
+        assert bucket.tomar("k", rps=1, burst=2)
+        assert not bucket.tomar("k", rps=1, burst=2)
+        assert bucket.tomar("k", rps=1, burst=2)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_por_tenant_y_ruta():
+    # Arrange
+    app, metricas = _app(rps=0.001, burst=2)
+
+    # Act
+    async with _client(app) as ac:
+        co = [await ac.get(f"/v1/recurso/{i}", headers={"X-Country": "co"}) for i in range(3)]
+        mx = await ac.get("/v1/recurso/1", headers={"X-Country": "MX"})
+        health = await ac.get("/health", headers={"X-Country": "co"})
+
+    # Assert
+    assert [r.status_code for r in co] == [200, 200, 429]
+    assert co[2].headers["retry-after"] == "1"
+    assert mx.status_code == 200
+    assert health.status_code == 200
+    assert metricas.snapshot() == {"co": {"rate_limit": 1}}
+
+
+@pytest.mark.asyncio
+async def test_el_limite_es_por_plantilla_de_ruta_y_no_por_valor_del_path():
+    # Arrange
+    app, metricas = _app(rps=0.001, burst=1)
+
+    # Act
+    async with _client(app) as ac:
+        codigos = [await ac.get(f"/v1/recurso/por-codigo/OC-{i}", headers={"X-Country": "co"}) for i in range(2)]
+        inexistentes = [await ac.get(f"/v1/no-existe-{i}/x", headers={"X-Country": "co"}) for i in range(2)]
+        otra_ruta = await ac.get("/v1/recurso/1", headers={"X-Country": "co"})
+
+    # Assert
+    assert [r.status_code for r in codigos] == [200, 429]
+    assert [r.status_code for r in inexistentes] == [404, 429]
+    assert otra_ruta.status_code == 200
+    assert metricas.snapshot() == {"co": {"rate_limit": 2}}
+
+
+def test_ruta_normalizada_con_la_plantilla_de_la_app():
+    # Arrange
+    from src.app import app
+    from src.middleware.admision import ruta_normalizada
+    scope = lambda metodo, path: {"app": app, "method": metodo, "path": path}
+
+    # Act / Assert
+    assert ruta_normalizada(scope("GET", "/v1/ordenes-compra/por-codigo/OC-2025-A1")) == \
+        "GET /v1/ordenes-compra/por-codigo/{codigo}"
+    assert ruta_normalizada(scope("GET", f"/v1/proveedores/{uuid.uuid4()}")) == "GET /v1/proveedores/{proveedor_id}"
+    assert ruta_normalizada(scope("GET", "/v1/ordenes-compra/pendientes")) == "GET /v1/ordenes-compra/pendientes"
+    assert ruta_normalizada(scope("DELETE", "/v1/ordenes-compra/OC-1")) == "DELETE /v1/ordenes-compra/{oc_id}"
+    assert ruta_normalizada(scope("GET", "/v1/otra/cosa")) == "GET (sin ruta)"
+
+
+@pytest.mark.asyncio
+async def test_tope_de_concurrencia_por_tenant():
+    # Arrange
+    app, metricas = _app(max_concurrencia=2)
+
+    # Act
+    async with _client(app) as ac:
+        respuestas = await asyncio.gather(*(ac.get(f"/v1/recurso/{i}", headers={"X-Country": "pe"}) for i in range(3)))
+        otro = await ac.get("/v1/recurso/x", headers={"X-Country": "ec"})
+
+    # Assert
+    assert sorted(r.status_code for r in respuestas) == [200, 200, 503]
+    assert otro.status_code == 200
+    assert metricas.snapshot() == {"pe": {"concurrencia": 1}}
+
+
+@pytest.mark.asyncio
+async def test_descarta_cuando_el_pool_esta_saturado():
+    # Arrange
+    app, metricas = _app(espera_pool_max_ms=100)
+
+    # Act
+    with patch("src.middleware.admision.espera_pool.actual_s", return_value=0.5):
+        async with _client(app) as ac:
+            co_1, co_2, ec = await asyncio.gather(
+                ac.get("/v1/recurso/1", headers={"X-Country": "co"}),
+                ac.get("/v1/recurso/2", headers={"X-Country": "co"}),
+                ac.get("/v1/recurso/3", headers={"X-Country": "ec"}),
+            )
+
+    # Assert: el tenant que ya ocupa su parte del pool se descarta, el otro entra
+    assert (co_1.status_code, co_2.status_code) == (200, 503)
+    assert ec.status_code == 200
+    assert metricas.snapshot() == {"co": {"pool_saturado": 1}}
+
+
+@pytest.mark.asyncio
+async def test_rechazos_por_rate_limit_no_ocupan_cupo_de_concurrencia():
+    # Arrange
+    app, metricas = _app(rps=0.001, burst=1, max_concurrencia=1)
+
+    # Act
+    async with _client(app) as ac:
+        respuestas = await asyncio.gather(*(ac.get("/v1/recurso/1", headers={"X-Country": "co"}) for _ in range(3)))
+
+    # Assert
+    assert sorted(r.status_code for r in respuestas) == [200, 429, 429]
+    assert metricas.snapshot() == {"co": {"rate_limit": 2}}
+
+
+@pytest.mark.asyncio
+async def test_tenants_desconocidos_comparten_la_etiqueta_otro():
+    # Arrange
+    app, metricas = _app(rps=0.001, burst=1, schemas=["co"])
+
+    # Act
+    async with _client(app) as ac:
+        respuestas = [await ac.get("/v1/recurso/1", headers={"X-Country": f"x{i}"}) for i in range(3)]
+
+    # Assert
+    assert [r.status_code for r in respuestas] == [200, 429, 429]
+    assert metricas.snapshot() == {"otro": {"rate_limit": 2}}
+
+
+def test_cors_envuelve_a_la_admision():
+    # Arrange
+    from fastapi.middleware.cors import CORSMiddleware
+    from src.app import app
+
+    # Act: user_middleware va del más externo al más interno
+    orden = [m.cls for m in app.user_middleware]
+
+    # Assert
+    assert orden.index(CORSMiddleware) < orden.index(AdmisionMiddleware)
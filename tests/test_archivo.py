@@ -0,0 +1,109 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.domain.models import (
+    ItemOrdenCompra, ItemOrdenCompraArchivo, OrdenCompra, OrdenCompraArchivo, ProductoProveedor, Proveedor,
+)
+from src.errors import ConflictError
+from src.services.archivo import ArchivoService
+from src.services.orden_compra import OrdenCompraService
+
+AHORA = datetime(2025, 6, 1)
+
+
+@pytest.fixture
+def ordenes(sqlite_session):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT", pais="CO")
+    sqlite_session.add(prov)
+    sqlite_session.flush()
+
+    def _oc(codigo, estado, dias):
+        fecha = AHORA - timedelta(days=dias)
+        oc = OrdenCompra(codigo=codigo, proveedor_id=prov.id, estado=estado, creado_en=fecha, actualizado_en=fecha)
+        oc.items = [ItemOrdenCompra(producto_id=uuid.uuid4(), cantidad=2)]
+        sqlite_session.add(oc)
+        return oc
+
+    ocs = {
+        "vieja_completa": _oc("OC-1", "COMPLETA", 400),
+        "vieja_cancelada": _oc("OC-2", "CANCELADA", 500),
+        "vieja_abierta": _oc("OC-3", "ABIERTA", 400),
+        "reciente_completa": _oc("OC-4", "COMPLETA", 10),
+    }
+    sqlite_session.commit()
+    return ocs
+
+
+def test_archivar_mueve_solo_cerradas_antiguas(sqlite_session, ordenes):
+    # Arrange
+    svc = ArchivoService(sqlite_session)
+
+    # Act
+    primero = svc.archivar_lote(AHORA - timedelta(days=365), lote=1)
+    segundo = svc.archivar_lote(AHORA - timedelta(days=365), lote=10)
+    tercero = svc.archivar_lote(AHORA - timedelta(days=365), lote=10)
+
+    # Assert
+    assert (primero, segundo, tercero) == (1, 1, 0)
+    sqlite_session.expunge_all()
+    assert {oc.codigo for oc in sqlite_session.query(OrdenCompra)} == {"OC-3", "OC-4"}
+    assert {oc.codigo for oc in sqlite_session.query(OrdenCompraArchivo)} == {"OC-1", "OC-2"}
+    assert sqlite_session.query(ItemOrdenCompra).count() == 2
+    assert sqlite_session.query(ItemOrdenCompraArchivo).count() == 2
+
+
+def test_lectura_transparente_de_archivadas(sqlite_session, ordenes):
+    # Arrange
+    oc_id = ordenes["vieja_completa"].id
+    ArchivoService(sqlite_session).archivar_lote(AHORA - timedelta(days=365))
+    sqlite_session.expunge_all()
+    svc = OrdenCompraService(sqlite_session)
+
+    # Act
+    por_id = svc.obtener(oc_id)
+    por_codigo = svc.obtener_por_codigo("OC-1")
+    viva = svc.obtener_por_codigo("OC-4")
+
+    # Assert
+    assert isinstance(por_id, OrdenCompraArchivo) and len(por_id.items) == 1
+    assert por_codigo.id == oc_id
+    assert isinstance(viva, OrdenCompra)
+    assert svc.version(oc_id) == AHORA - timedelta(days=400)
+    with pytest.raises(LookupError):
+        svc.cancelar(oc_id)
+
+
+def test_codigo_ya_archivado_no_detiene_el_archivo(sqlite_session, ordenes):
+    # Arrange
+    svc = ArchivoService(sqlite_session)
+    svc.archivar_lote(AHORA - timedelta(days=365))
+    fecha = AHORA - timedelta(days=600)  # la más antigua: encabezaría cada lote
+    repetida = OrdenCompra(codigo="OC-1", proveedor_id=ordenes["vieja_abierta"].proveedor_id, estado="COMPLETA",
+                           creado_en=fecha, actualizado_en=fecha)
+    sqlite_session.add(repetida)
+    sqlite_session.commit()
+
+    # Act
+    movidas = svc.archivar_lote(AHORA - timedelta(days=1), lote=1)
+    fin = svc.archivar_lote(AHORA - timedelta(days=1), lote=1)
+
+    # Assert
+    assert (movidas, fin) == (1, 0)  # OC-4 pasa; la repetida queda retenida en la tabla viva
+    sqlite_session.expunge_all()
+    assert {oc.codigo for oc in sqlite_session.query(OrdenCompra)} == {"OC-1", "OC-3"}
+
+
+def test_crear_rechaza_codigo_de_una_orden_archivada(sqlite_session, ordenes):
+    # Arrange
+    proveedor_id = ordenes["vieja_abierta"].proveedor_id
+    producto_id = uuid.uuid4()
+    sqlite_session.add(ProductoProveedor(proveedor_id=proveedor_id, producto_id=producto_id, precio=10, moneda="COP"))
+    ArchivoService(sqlite_session).archivar_lote(AHORA - timedelta(days=365))
+    svc = OrdenCompraService(sqlite_session)
+
+    # Act / Assert
+    with pytest.raises(ConflictError):
+        svc.crear(proveedor_id, [{"producto_id": producto_id, "cantidad": 1}], codigo="OC-2")
+    assert svc.crear(proveedor_id, [{"producto_id": producto_id, "cantidad": 1}]).codigo.startswith("OC-")
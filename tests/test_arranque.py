@@ -0,0 +1,55 @@
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.infrastructure.esquemas import estado_esquemas
+from src.infrastructure.sondas import sondas
+
+RAIZ = pathlib.Path(__file__).resolve().parents[1]
+# presupuesto holgado para CI; el perfil detallado está en scripts/perfil_arranque.py
+IMPORT_MAX_S = float(os.getenv("IMPORT_MAX_S", "5"))
+
+
+def test_tiempo_de_import_y_clientes_perezosos():
+    # Arrange
+    codigo = (
+        "import json, sys, time\n"
+        "t = time.perf_counter()\n"
+        "import src.app\n"
+        "print(json.dumps({'s': time.perf_counter() - t,"
+        " 'cargados': [m for m in ('redis', 'google.cloud.pubsub_v1', 'google.cloud.bigquery', 'google.cloud.storage')"
+        " if m in sys.modules]}))\n"
+    )
+
+    # Act
+    out = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    resultado = json.loads(out.stdout.strip().splitlines()[-1])
+
+    # Assert
+    assert resultado["cargados"] == []
+    assert resultado["s"] < IMPORT_MAX_S
+
+
+def test_ready_separado_de_health(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(estado_esquemas, "pendientes", {"co"})
+    monkeypatch.setattr(estado_esquemas, "iniciar_en_segundo_plano", lambda: None)
+    monkeypatch.setattr(sondas, "_dependencias", lambda: {"db": {"ok": True}})
+
+    # Act
+    with TestClient(app) as client:
+        health = client.get("/health")
+        iniciando = client.get("/ready")
+        estado_esquemas.pendientes = set()
+        listo = client.get("/ready")
+
+    # Assert
+    assert health.status_code == 200
+    assert iniciando.status_code == 503
+    assert iniciando.json()["pendientes"] == ["co"]
+    assert listo.status_code == 200
@@ -0,0 +1,144 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.app import app
+from src.dependencies import get_read_session, get_session
+from src.domain.models import Auditoria, ItemOrdenCompra, OrdenCompra, Proveedor
+from src.infrastructure import auditoria
+from src.services.catalogo import CatalogoService
+from src.services.orden_compra import OrdenCompraService
+
+
+@pytest.fixture
+def db(sqlite_session):
+    auditoria.instalar(sqlite_session)
+    return sqlite_session
+
+
+def _proveedor(session):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT", pais="CO")
+    session.add(prov)
+    session.commit()
+    return prov
+
+
+def _oc(session, proveedor_id):
+    oc = OrdenCompra(codigo=f"OC-{uuid.uuid4().hex[:8]}", proveedor_id=proveedor_id, estado="ABIERTA",
+                     total=Decimal("20"), moneda="COP")
+    oc.items = [ItemOrdenCompra(producto_id=uuid.uuid4(), cantidad=2, precio_unitario=Decimal("10"))]
+    session.add(oc)
+    session.commit()
+    return oc
+
+
+def _historial(session, raiz, raiz_id):
+    return list(reversed(auditoria.historial(session, raiz, raiz_id)))
+
+
+def test_una_fila_por_raiz_y_transaccion_con_diff_compacto(db):
+    # Arrange
+    prov = _proveedor(db)
+    inserts = []
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def _contar(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO co.auditoria"):
+            inserts.append(statement)
+
+    # Act
+    oc = _oc(db, prov.id)
+    OrdenCompraService(db).marcar_enviada(oc.id)
+
+    # Assert
+    creada, enviada = _historial(db, "orden_compra", oc.id)
+    assert len(inserts) == 2  # un INSERT por commit
+    assert sorted(e["t"] for e in creada.cambios) == ["item_orden_compra", "orden_compra"]
+    assert all(e["op"] == "I" for e in creada.cambios)
+    assert enviada.cambios == [{"t": "orden_compra", "id": str(oc.id), "op": "U", "c": {"estado": ["ABIERTA", "ENVIADA"]}}]
+    alta, = _historial(db, "proveedor", prov.id)
+    assert alta.cambios[0]["c"]["documento"] == "900"
+
+
+def test_rollback_descarta_los_cambios(db):
+    # Arrange
+    descartado = Proveedor(nombre="Descartado", tipo_de_persona="JURIDICA", documento="800", tipo_documento="NIT", pais="CO")
+    db.add(descartado)
+    db.flush()
+
+    # Act
+    db.rollback()
+    prov = _proveedor(db)
+
+    # Assert
+    assert _historial(db, "proveedor", descartado.id) == []
+    alta, = _historial(db, "proveedor", prov.id)
+    assert [e["id"] for e in alta.cambios] == [str(prov.id)]
+
+
+def test_sincronizar_catalogo_registra_las_escrituras_masivas(db):
+    # Arrange
+    prov = _proveedor(db)
+    sigue, sale = uuid.uuid4(), uuid.uuid4()
+    svc = CatalogoService(db)
+    svc.sincronizar(prov.id, [{"producto_id": sigue, "precio": "10"}, {"producto_id": sale, "precio": "5"}])
+
+    # Act
+    svc.sincronizar(prov.id, [{"producto_id": sigue, "precio": "12.5"}])
+
+    # Assert
+    _, alta, cambio = _historial(db, "proveedor", prov.id)
+    assert sorted(e["id"] for e in alta.cambios) == sorted([str(sigue), str(sale)])
+    assert {e["id"]: e["c"] for e in cambio.cambios} == {
+        str(sigue): {"precio": ["10.0000", "12.5000"]},
+        str(sale): {"activo": [True, False]},
+    }
+
+
+def test_historial_por_api_pagina_y_guarda_el_actor(db):
+    # Arrange
+    prov = _proveedor(db)
+    app.dependency_overrides[get_session] = lambda: db
+    app.dependency_overrides[get_read_session] = lambda: db
+
+    # Act
+    try:
+        with TestClient(app) as client:
+            for nombre in ("A", "B", "C"):
+                client.patch(f"/v1/proveedores/{prov.id}", json={"nombre": nombre}, headers={"X-Usuario": "ana"})
+            primera = client.get(f"/v1/proveedores/{prov.id}/historial", params={"limit": 2}).json()
+            segunda = client.get(f"/v1/proveedores/{prov.id}/historial",
+                                 params={"limit": 2, "antes_de": primera[-1]["id"]}).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    # Assert
+    assert [h["cambios"][0]["c"]["nombre"] for h in primera] == [["B", "C"], ["A", "B"]]
+    assert [h["cambios"][0]["c"]["nombre"] for h in segunda] == [["Proveedor", "A"], "Proveedor"]
+    assert [h["actor"] for h in segunda] == ["ana", None]
+    assert db.query(Auditoria).count() == 4  # alta + 3 cambios
+
+
+def test_no_guarda_columnas_secretas_ni_inventa_el_valor_anterior(db):
+    # Arrange
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT", pais="CO",
+                     webhook_url="https://x.example/hook?token=SECRETO")
+    db.add(prov)
+    db.commit()
+
+    # Act
+    prov.webhook_url = "https://x.example/hook?token=OTRO"
+    prov.nombre = "Conocido"
+    db.commit()
+    db.expire(prov, ["pais"])
+    prov.pais = "EC"
+    db.commit()
+
+    # Assert
+    alta, cambio, expirado = _historial(db, "proveedor", prov.id)
+    assert "SECRETO" not in str(alta.cambios) and "webhook_url" not in alta.cambios[0]["c"]
+    assert cambio.cambios[0]["c"] == {"nombre": ["Proveedor", "Conocido"]}
+    assert expirado.cambios[0]["c"] == {"pais": ["EC"]}
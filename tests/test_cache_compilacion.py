@@ -0,0 +1,76 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from src.domain import models
+from src.routes.proveedores import _pagina_proveedores
+from src.services.orden_compra import OrdenCompraService
+
+
+@pytest.fixture
+def engine_dos_tenants():
+    """SQLite en memoria con los schemas 'co' y 'ec' adjuntos y las tablas creadas en ambos."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _adjuntar_schemas(dbapi_conn, _):
+        dbapi_conn.execute("ATTACH DATABASE ':memory:' AS co")
+        dbapi_conn.execute("ATTACH DATABASE ':memory:' AS ec")
+
+    for schema in ("co", "ec"):
+        with engine.begin() as conn:
+            models.Base.metadata.create_all(conn.execution_options(schema_translate_map={None: schema}))
+    yield engine
+    engine.dispose()
+
+
+def _ejecuciones(engine, schema, fn):
+    """Ejecuta `fn(session)` sobre `schema` y devuelve [(sql, cache_hit)] de lo que emitió."""
+    vistas = []
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        vistas.append((statement, context.cache_hit == CACHE_HIT))
+
+    event.listen(engine, "after_cursor_execute", _registrar)
+    try:
+        with engine.connect().execution_options(schema_translate_map={None: schema}) as conn:
+            with Session(bind=conn, info={"schema": schema}) as session:
+                fn(session)
+    finally:
+        event.remove(engine, "after_cursor_execute", _registrar)
+    return vistas
+
+
+def test_listar_ordenes_reusa_la_compilacion_entre_tenants_y_valores(engine_dos_tenants):
+    # Arrange: la primera ejecución compila
+    _ejecuciones(engine_dos_tenants, "co", lambda s: OrdenCompraService(s).listar(uuid.uuid4(), "ABIERTA", "OC", 10, 0))
+
+    # Act: otro tenant y otros valores, mismos filtros
+    vistas = _ejecuciones(
+        engine_dos_tenants, "ec", lambda s: OrdenCompraService(s).listar(uuid.uuid4(), "ENVIADA", "X", 50, 20)
+    )
+
+    # Assert
+    assert len(vistas) == 1
+    sql, cache_hit = vistas[0]
+    assert cache_hit
+    assert "ec.orden_compra" in sql
+
+
+def test_listar_proveedores_compila_una_vez_por_combinacion_de_filtros(engine_dos_tenants):
+    # Arrange
+    _ejecuciones(engine_dos_tenants, "co", lambda s: s.execute(*_pagina_proveedores(False, None, "CO", True, 50, 0)))
+
+    # Act
+    misma = _ejecuciones(engine_dos_tenants, "ec", lambda s: s.execute(*_pagina_proveedores(False, None, "MX", False, 10, 5)))
+    otra = _ejecuciones(engine_dos_tenants, "ec", lambda s: s.execute(*_pagina_proveedores(False, "acme", None, None, 10, 5)))
+
+    # Assert
+    assert [hit for _, hit in misma] == [True]
+    assert [hit for _, hit in otra] == [False]
+    # la sentencia de cada combinación se construye una sola vez
+    assert _pagina_proveedores(False, None, "PE", True, 1, 0)[0] is _pagina_proveedores(False, None, "CO", False, 5, 0)[0]
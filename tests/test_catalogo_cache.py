@@ -0,0 +1,101 @@
+import uuid
+from unittest.mock import MagicMock
+
+from src.services.catalogo_cache import CatalogoCache
+
+
+def _row(producto_id, sku="SKU"):
+    row = MagicMock()
+    row.producto_id = producto_id
+    row.sku_proveedor = sku
+    row.precio = None
+    row.moneda = None
+    row.lead_time_dias = None
+    row.lote_minimo = None
+    row.activo = True
+    return row
+
+
+def test_catalogo_se_carga_una_vez_por_proveedor():
+    # Arrange
+    cache = CatalogoCache(max_proveedores=10, ttl_s=300)
+    db = MagicMock()
+    proveedor_id, producto_id = uuid.uuid4(), uuid.uuid4()
+    db.query.return_value.filter.return_value.all.return_value = [_row(producto_id)]
+
+    # Act
+    primero = cache.terminos(db, proveedor_id, {producto_id})
+    segundo = cache.terminos(db, proveedor_id, {producto_id})
+
+    # Assert
+    assert primero[producto_id].sku_proveedor == "SKU"
+    assert segundo == primero
+    assert db.query.call_count == 1
+
+
+def test_invalidar_fuerza_recarga():
+    # Arrange
+    cache = CatalogoCache(max_proveedores=10, ttl_s=300)
+    db = MagicMock()
+    proveedor_id, producto_id = uuid.uuid4(), uuid.uuid4()
+    db.query.return_value.filter.return_value.all.return_value = [_row(producto_id, "SKU_OLD")]
+    cache.terminos(db, proveedor_id, {producto_id})
+
+    # Act
+    cache.invalidar("co")
+    db.query.return_value.filter.return_value.all.return_value = [_row(producto_id, "SKU_NEW")]
+    result = cache.terminos(db, proveedor_id, {producto_id})
+
+    # Assert
+    assert result[producto_id].sku_proveedor == "SKU_NEW"
+    assert db.query.call_count == 2
+
+
+def test_producto_ausente_consulta_bd():
+    # Arrange
+    cache = CatalogoCache(max_proveedores=10, ttl_s=300)
+    db = MagicMock()
+    proveedor_id, conocido, nuevo = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    db.query.return_value.filter.return_value.all.side_effect = [[_row(conocido)], [_row(nuevo)]]
+
+    # Act
+    result = cache.terminos(db, proveedor_id, {conocido, nuevo})
+    otra_vez = cache.terminos(db, proveedor_id, {conocido, nuevo})
+
+    # Assert
+    assert set(result) == {conocido, nuevo}
+    assert set(otra_vez) == {conocido, nuevo}
+    assert db.query.call_count == 2
+
+
+def test_lru_limita_proveedores_en_memoria():
+    # Arrange
+    cache = CatalogoCache(max_proveedores=1, ttl_s=300)
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = []
+    prov_a, prov_b = uuid.uuid4(), uuid.uuid4()
+
+    # Act
+    cache.terminos(db, prov_a, set())
+    cache.terminos(db, prov_b, set())
+    cache.terminos(db, prov_a, set())
+
+    # Assert
+    assert db.query.call_count == 3
+
+
+def test_fallback_publica_un_catalogo_nuevo_sin_modificar_el_que_otros_leen():
+    # Arrange
+    cache = CatalogoCache(max_proveedores=10, ttl_s=300)
+    db = MagicMock()
+    proveedor_id, conocido, nuevo = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    db.query.return_value.filter.return_value.all.side_effect = [[_row(conocido)], [_row(nuevo)]]
+    publicado = cache._catalogo(db, "co", proveedor_id)
+
+    # Act
+    cache.terminos(db, proveedor_id, {nuevo})
+
+    # Assert
+    assert set(publicado) == {conocido}
+    assert set(cache._catalogo(db, "co", proveedor_id)) == {conocido, nuevo}
+    assert db.query.call_count == 2
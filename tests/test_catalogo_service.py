@@ -0,0 +1,130 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from src.domain.models import Proveedor, ProductoProveedor
+from src.services.catalogo import CatalogoService
+
+
+@pytest.fixture
+def proveedor(sqlite_session):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT", pais="CO")
+    sqlite_session.add(prov)
+    sqlite_session.commit()
+    return prov
+
+
+def _catalogo(session, proveedor_id):
+    rows = session.query(ProductoProveedor).filter(ProductoProveedor.proveedor_id == proveedor_id).all()
+    return {r.producto_id: r for r in rows}
+
+
+def test_sincronizar_aplica_solo_diferencias(sqlite_session, proveedor):
+    # Arrange
+    svc = CatalogoService(sqlite_session)
+    igual, cambia, sale, nuevo = (uuid.uuid4() for _ in range(4))
+    svc.sincronizar(proveedor.id, [
+        {"producto_id": igual, "sku_proveedor": "A", "precio": 10.0, "moneda": "COP"},
+        {"producto_id": cambia, "sku_proveedor": "B", "precio": 20.0, "moneda": "COP"},
+        {"producto_id": sale, "sku_proveedor": "C", "precio": 30.0, "moneda": "COP"},
+    ])
+
+    # Act
+    resumen = svc.sincronizar(proveedor.id, [
+        {"producto_id": igual, "sku_proveedor": "A", "precio": 10.0, "moneda": "COP"},
+        {"producto_id": cambia, "sku_proveedor": "B", "precio": 25.5, "moneda": "COP"},
+        {"producto_id": nuevo, "sku_proveedor": "D", "precio": 40.0, "moneda": "COP"},
+    ])
+
+    # Assert
+    assert resumen == {"insertados": 1, "actualizados": 1, "desactivados": 1, "sin_cambios": 1}
+    sqlite_session.expire_all()
+    catalogo = _catalogo(sqlite_session, proveedor.id)
+    assert catalogo[cambia].precio == Decimal("25.5")
+    assert catalogo[sale].activo is False
+    assert catalogo[nuevo].sku_proveedor == "D"
+
+
+def test_sincronizar_reasigna_skus_sin_conflictos(sqlite_session, proveedor):
+    # Arrange
+    svc = CatalogoService(sqlite_session)
+    a, b, sale, nuevo = (uuid.uuid4() for _ in range(4))
+    svc.sincronizar(proveedor.id, [
+        {"producto_id": a, "sku_proveedor": "A"},
+        {"producto_id": b, "sku_proveedor": "B"},
+        {"producto_id": sale, "sku_proveedor": "C"},
+    ])
+
+    # Act: a y b intercambian SKU y el nuevo toma el del producto que sale
+    resumen = svc.sincronizar(proveedor.id, [
+        {"producto_id": a, "sku_proveedor": "B"},
+        {"producto_id": b, "sku_proveedor": "A"},
+        {"producto_id": nuevo, "sku_proveedor": "C"},
+    ])
+
+    # Assert
+    assert resumen == {"insertados": 1, "actualizados": 2, "desactivados": 1, "sin_cambios": 0}
+    sqlite_session.expire_all()
+    catalogo = _catalogo(sqlite_session, proveedor.id)
+    assert {pid: (r.sku_proveedor, r.activo) for pid, r in catalogo.items()} == {
+        a: ("B", True), b: ("A", True), sale: (None, False), nuevo: ("C", True),
+    }
+
+
+def test_sincronizar_sin_cambios_no_escribe(sqlite_session, proveedor):
+    # Arrange
+    svc = CatalogoService(sqlite_session)
+    items = [{"producto_id": uuid.uuid4(), "sku_proveedor": "A", "precio": 10.0}]
+    svc.sincronizar(proveedor.id, items)
+    sentencias = []
+    event.listen(sqlite_session.bind, "before_cursor_execute", lambda *a: sentencias.append(a[2]))
+
+    # Act
+    resumen = svc.sincronizar(proveedor.id, items)
+
+    # Assert
+    assert resumen == {"insertados": 0, "actualizados": 0, "desactivados": 0, "sin_cambios": 1}
+    assert not [s for s in sentencias if not s.lstrip().upper().startswith("SELECT")]
+
+
+def test_sincronizar_rechaza_productos_duplicados(sqlite_session, proveedor):
+    # Arrange
+    producto_id = uuid.uuid4()
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="duplicado"):
+        CatalogoService(sqlite_session).sincronizar(proveedor.id, [
+            {"producto_id": producto_id}, {"producto_id": producto_id},
+        ])
+
+
+def test_sincronizar_proveedor_inexistente(sqlite_session):
+    with pytest.raises(LookupError):
+        CatalogoService(sqlite_session).sincronizar(uuid.uuid4(), [])
+
+
+def test_producto_retirado_por_la_sincronizacion_no_se_puede_pedir(sqlite_session, proveedor):
+    # Arrange
+    from src.services.orden_compra import OrdenCompraService
+    svc, ordenes = CatalogoService(sqlite_session), OrdenCompraService(sqlite_session)
+    queda, sale = uuid.uuid4(), uuid.uuid4()
+    svc.sincronizar(proveedor.id, [
+        {"producto_id": queda, "sku_proveedor": "A", "precio": 10.0, "moneda": "COP"},
+        {"producto_id": sale, "sku_proveedor": "S", "precio": 30.0, "moneda": "COP"},
+    ])
+    oc = ordenes.crear(proveedor.id, [{"producto_id": queda, "cantidad": 2}, {"producto_id": sale, "cantidad": 2}])
+
+    # Act
+    resumen = svc.sincronizar(proveedor.id, [{"producto_id": queda, "sku_proveedor": "A", "precio": 10.0, "moneda": "COP"}])
+    for fn in sqlite_session.info.pop("al_confirmar", ()):  # lo que haría session_for_schema al confirmar
+        fn()
+
+    # Assert
+    assert resumen["desactivados"] == 1
+    with pytest.raises(ValueError, match="no ofertados"):
+        ordenes.crear(proveedor.id, [{"producto_id": sale, "cantidad": 2}])
+    with pytest.raises(ValueError, match="no ofertados"):
+        ordenes.enmendar(oc.id, agregar=[{"producto_id": sale, "cantidad": 1}], modificar=[], quitar=[])
+    assert ordenes.crear(proveedor.id, [{"producto_id": queda, "cantidad": 2}]).total == Decimal("20")
@@ -0,0 +1,71 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.middleware.compresion import CompresionMiddleware, negociar
+
+app_prueba = FastAPI()
+app_prueba.add_middleware(CompresionMiddleware, minimo_bytes=500)
+
+
+@app_prueba.get("/grande")
+def grande():
+    return [{"codigo": f"OC-2025-{i:06d}", "estado": "ABIERTA"} for i in range(200)]
+
+
+@app_prueba.get("/pequeno")
+def pequeno():
+    return {"status": "ok"}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app_prueba) as c:
+        yield c
+
+
+def test_negociar_respeta_preferencias():
+    assert negociar("gzip, deflate, br") == "br"
+    assert negociar("gzip") == "gzip"
+    assert negociar("br;q=0, gzip;q=0.5") == "gzip"
+    assert negociar("identity") is None
+    assert negociar("") is None
+
+
+def test_respuesta_grande_se_comprime_con_gzip(client):
+    # Act
+    response = client.get("/grande", headers={"Accept-Encoding": "gzip"})
+
+    # Assert
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()) == 200
+
+
+def test_respuesta_grande_se_comprime_con_brotli(client):
+    pytest.importorskip("brotli")
+
+    # Act
+    response = client.get("/grande", headers={"Accept-Encoding": "br"})
+
+    # Assert
+    assert response.headers["content-encoding"] == "br"
+
+
+def test_respuesta_pequena_no_se_comprime(client):
+    # Act
+    response = client.get("/pequeno", headers={"Accept-Encoding": "gzip"})
+
+    # Assert
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"status": "ok"}
+
+
+def test_sin_accept_encoding_no_se_comprime(client):
+    # Act
+    response = client.get("/grande", headers={"Accept-Encoding": "identity"})
+
+    # Assert
+    assert "content-encoding" not in response.headers
+    assert len(response.json()) == 200
@@ -0,0 +1,136 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.app import app
+from src.dependencies import get_session
+from src.domain.models import ItemOrdenCompra, ProductoProveedor, Proveedor
+from src.services.catalogo_cache import catalogo_cache
+from src.services.orden_compra import OrdenCompraService
+
+
+@pytest.fixture
+def catalogo(sqlite_session):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT", pais="CO")
+    sqlite_session.add(prov)
+    sqlite_session.flush()
+    productos = [uuid.uuid4() for _ in range(3)]
+    for pid in productos:
+        sqlite_session.add(ProductoProveedor(proveedor_id=prov.id, producto_id=pid, precio=10, moneda="USD",
+                                             lote_minimo=2, sku_proveedor=f"SKU-{pid.hex[:4]}"))
+    sqlite_session.commit()
+    return prov.id, productos
+
+
+def _totales(oc):
+    return tuple(Decimal(v).quantize(Decimal("0.0001")) for v in (oc.subtotal, oc.impuesto_total, oc.total))
+
+
+def test_enmienda_ajusta_totales_y_pendientes_como_una_orden_nueva(sqlite_session, catalogo):
+    # Arrange
+    proveedor_id, (a, b, c) = catalogo
+    svc = OrdenCompraService(sqlite_session)
+    oc = svc.crear(proveedor_id, [
+        {"producto_id": a, "cantidad": 5, "impuesto_pct": Decimal("19")},
+        {"producto_id": b, "cantidad": 2},
+    ])
+    item_a, item_b = sorted(oc.items, key=lambda it: it.producto_id != a)
+
+    # Act
+    oc = svc.enmendar(
+        oc.id,
+        agregar=[{"producto_id": c, "cantidad": 4, "descuento_pct": Decimal("10")}],
+        modificar=[{"id": item_a.id, "cantidad": 3, "precio_unitario": Decimal("12")}],
+        quitar=[item_b.id],
+    )
+
+    # Assert
+    referencia = svc.crear(proveedor_id, [
+        {"producto_id": a, "cantidad": 3, "precio_unitario": Decimal("12"), "impuesto_pct": Decimal("19")},
+        {"producto_id": c, "cantidad": 4, "descuento_pct": Decimal("10")},
+    ])
+    assert _totales(oc) == _totales(referencia)
+    assert oc.total_base == oc.total  # USD es la moneda base: tasa 1
+    assert sorted((it.producto_id, it.cantidad) for it in oc.items) == sorted([(a, 3), (c, 4)])
+    assert {it.sku_proveedor for it in oc.items} == {f"SKU-{a.hex[:4]}", f"SKU-{c.hex[:4]}"}
+    assert svc.pendientes_por_producto([a, b, c]) == {a: 6, b: 0, c: 8}
+
+
+def test_solo_valida_en_el_catalogo_los_productos_que_cambian(sqlite_session, catalogo, monkeypatch):
+    # Arrange
+    proveedor_id, (a, b, _) = catalogo
+    svc = OrdenCompraService(sqlite_session)
+    oc = svc.crear(proveedor_id, [{"producto_id": a, "cantidad": 2}, {"producto_id": b, "cantidad": 2}])
+    item_a, item_b = sorted(oc.items, key=lambda it: it.producto_id != a)
+    consultados = []
+    original = catalogo_cache.terminos
+    monkeypatch.setattr(catalogo_cache, "terminos",
+                        lambda db, pid, productos: consultados.append(set(productos)) or original(db, pid, productos))
+
+    # Act
+    svc.enmendar(oc.id, agregar=[], modificar=[{"id": item_a.id, "cantidad": 4}, {"id": item_b.id, "sku_proveedor": "X"}],
+                 quitar=[])
+
+    # Assert
+    assert consultados == [{a}]
+
+
+def test_enmienda_rechazada_no_deja_cambios(sqlite_session, catalogo):
+    # Arrange
+    proveedor_id, (a, b, _) = catalogo
+    svc = OrdenCompraService(sqlite_session)
+    oc = svc.crear(proveedor_id, [{"producto_id": a, "cantidad": 2}])
+    item, = oc.items
+    antes = _totales(oc)
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="lote mínimo"):
+        svc.enmendar(oc.id, agregar=[{"producto_id": b, "cantidad": 1}], modificar=[], quitar=[])
+    with pytest.raises(ValueError, match="no ofertados"):
+        svc.enmendar(oc.id, agregar=[{"producto_id": uuid.uuid4(), "cantidad": 2}], modificar=[], quitar=[])
+    with pytest.raises(ValueError, match="no pertenecen"):
+        svc.enmendar(oc.id, agregar=[], modificar=[], quitar=[uuid.uuid4()])
+    with pytest.raises(ValueError, match="debe tener items"):
+        svc.enmendar(oc.id, agregar=[], modificar=[], quitar=[item.id])
+    svc.marcar_enviada(oc.id)
+    with pytest.raises(ValueError, match="ABIERTA"):
+        svc.enmendar(oc.id, agregar=[], modificar=[{"id": item.id, "cantidad": 3}], quitar=[])
+    assert _totales(oc) == antes
+    assert sqlite_session.query(ItemOrdenCompra).count() == 1
+
+
+def test_enmienda_por_api_sin_recorrer_los_demas_items(sqlite_session, catalogo):
+    # Arrange
+    proveedor_id, (a, b, c) = catalogo
+    oc = OrdenCompraService(sqlite_session).crear(proveedor_id, [{"producto_id": a, "cantidad": 2},
+                                                                 {"producto_id": b, "cantidad": 2}])
+    item_a = next(it for it in oc.items if it.producto_id == a)
+    app.dependency_overrides[get_session] = lambda: sqlite_session
+    selects = []
+
+    # Act
+    try:
+        with TestClient(app) as client:
+            sqlite_session.expunge_all()
+            escucha = lambda conn, cursor, sql, *args: selects.append(sql) if "FROM co.item_orden_compra" in sql else None
+            event.listen(sqlite_session.get_bind(), "before_cursor_execute", escucha)
+            r = client.patch(f"/v1/ordenes-compra/{oc.id}/items", json={
+                "modificar": [{"id": str(item_a.id), "cantidad": 5}],
+                "agregar": [{"producto_id": str(c), "cantidad": 2}],
+            })
+            event.remove(sqlite_session.get_bind(), "before_cursor_execute", escucha)
+            vacia = client.patch(f"/v1/ordenes-compra/{oc.id}/items", json={})
+            ninguna = client.patch(f"/v1/ordenes-compra/{uuid.uuid4()}/items", json={"quitar": [str(item_a.id)]})
+    finally:
+        app.dependency_overrides.clear()
+
+    # Assert
+    assert r.status_code == 200
+    assert Decimal(r.json()["total"]) == Decimal("90")
+    assert len(r.json()["items"]) == 3
+    assert "IN (" in selects[0] and len(selects) == 2  # el item modificado y, tras confirmar, la respuesta
+    assert vacia.status_code == 400
+    assert ninguna.status_code == 404
@@ -0,0 +1,107 @@
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pyarrow.parquet as pq
+import pytest
+
+from src.domain.models import ItemOrdenCompra, MarcaExportacion, OrdenCompra, Proveedor
+from src.infrastructure.sumideros import SinCarga, SumideroLocal
+from src.services.exportacion import ExportadorAnalitico
+from src.services.orden_compra import OrdenCompraService
+
+AHORA = datetime(2025, 6, 1, 12, 0)
+
+
+class CargadorMemoria:
+    def __init__(self):
+        self.cargas = []
+
+    def cargar(self, schema, tabla, uri):
+        self.cargas.append((schema, tabla, uri))
+
+
+@pytest.fixture
+def datos(sqlite_session):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT",
+                     pais="CO", actualizado_en=AHORA - timedelta(hours=2))
+    sqlite_session.add(prov)
+    sqlite_session.flush()
+    for i in range(3):
+        oc = OrdenCompra(codigo=f"OC-{i}", proveedor_id=prov.id, estado="ABIERTA", total=Decimal("10.5"),
+                         actualizado_en=AHORA - timedelta(hours=1, minutes=i))
+        oc.items = [ItemOrdenCompra(producto_id=uuid.uuid4(), cantidad=1 + i, precio_unitario=Decimal("10.5"))]
+        sqlite_session.add(oc)
+    # dentro del margen: todavía no se exporta
+    sqlite_session.add(OrdenCompra(codigo="OC-reciente", proveedor_id=prov.id, actualizado_en=AHORA - timedelta(seconds=30)))
+    sqlite_session.commit()
+    return prov
+
+
+def _exportador(sqlite_session, directorio, cargador, lote=2):
+    return ExportadorAnalitico(SumideroLocal(str(directorio)), cargador, lote=lote, margen_s=300,
+                               sesion=lambda schema, read_only=False: nullcontext(sqlite_session))
+
+
+def test_exportacion_incremental_por_marca_de_agua(sqlite_session, datos, tmp_path):
+    # Arrange
+    cargador = CargadorMemoria()
+    exportador = _exportador(sqlite_session, tmp_path, cargador)
+
+    # Act
+    primera = exportador.exportar("co", ahora=AHORA)
+    segunda = exportador.exportar("co", ahora=AHORA)
+    oc = sqlite_session.query(OrdenCompra).filter(OrdenCompra.codigo == "OC-1").one()
+    oc.notas = "cambio"
+    oc.actualizado_en = AHORA - timedelta(minutes=10)
+    sqlite_session.commit()
+    tercera = exportador.exportar("co", ahora=AHORA)
+
+    # Assert
+    assert primera == {"proveedor": 1, "orden_compra": 3, "orden_compra_eliminada": 0}
+    assert segunda == {"proveedor": 0, "orden_compra": 0, "orden_compra_eliminada": 0}
+    assert tercera == {"proveedor": 0, "orden_compra": 1, "orden_compra_eliminada": 0}
+    archivos = sorted((tmp_path / "co" / "orden_compra").glob("*.parquet"))
+    assert len(archivos) == 3  # lotes de 2 + 1, y la modificación
+    tabla = pq.read_table(archivos[0])
+    assert tabla.schema.field("total").type.scale == 4
+    assert tabla.column("codigo").to_pylist() == ["OC-2", "OC-1"]
+    assert len(list((tmp_path / "co" / "item_orden_compra").glob("*.parquet"))) == 3
+    assert [t for _, t, _ in cargador.cargas].count("item_orden_compra") == 3
+    marca = sqlite_session.get(MarcaExportacion, "orden_compra")
+    assert marca.actualizado_hasta == AHORA - timedelta(minutes=10)
+
+
+def test_fallo_de_carga_no_avanza_la_marca(sqlite_session, datos, tmp_path):
+    # Arrange
+    class CargadorCaido:
+        def cargar(self, schema, tabla, uri):
+            raise RuntimeError("BigQuery no disponible")
+
+    # Act
+    with pytest.raises(RuntimeError):
+        _exportador(sqlite_session, tmp_path, CargadorCaido()).exportar("co", ahora=AHORA)
+    reintento = _exportador(sqlite_session, tmp_path, SinCarga(), lote=10).exportar("co", ahora=AHORA)
+
+    # Assert
+    assert reintento == {"proveedor": 1, "orden_compra": 3, "orden_compra_eliminada": 0}
+
+
+def test_items_con_la_version_de_su_orden_y_bajas_de_ordenes(sqlite_session, datos, tmp_path):
+    # Arrange
+    borrada = sqlite_session.query(OrdenCompra).filter(OrdenCompra.codigo == "OC-0").one()
+    borrada_id = borrada.id
+    OrdenCompraService(sqlite_session).eliminar(borrada_id)
+    versiones = {it.oc_id: it.orden_compra.actualizado_en for it in sqlite_session.query(ItemOrdenCompra)}
+
+    # Act
+    exportado = _exportador(sqlite_session, tmp_path, SinCarga(), lote=10).exportar(
+        "co", ahora=datetime.utcnow() + timedelta(hours=1))
+
+    # Assert
+    assert exportado == {"proveedor": 1, "orden_compra": 3, "orden_compra_eliminada": 1}
+    items = pq.read_table(next((tmp_path / "co" / "item_orden_compra").glob("*.parquet"))).to_pylist()
+    assert {(i["oc_id"], i["_oc_actualizado_en"]) for i in items} == {(str(k), v) for k, v in versiones.items()}
+    baja, = pq.read_table(next((tmp_path / "co" / "orden_compra_eliminada").glob("*.parquet"))).to_pylist()
+    assert (baja["id"], baja["codigo"]) == (str(borrada_id), "OC-0")
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.dependencies import get_session
+from src.domain.models import Proveedor
+from src.services.importacion import ImportacionProveedores, LectorCSV
+
+
+def _fila(documento, pais="CO", **extra):
+    return {"nombre": f"Proveedor {documento}", "tipo_de_persona": "JURIDICA", "documento": documento,
+            "tipo_documento": "NIT", "pais": pais, **extra}
+
+
+@pytest.fixture
+def existente(sqlite_session):
+    prov = Proveedor(**_fila("900"))
+    sqlite_session.add(prov)
+    sqlite_session.commit()
+    return prov
+
+
+def test_importar_lote_reporta_cada_fila(sqlite_session, existente):
+    # Arrange
+    svc = ImportacionProveedores(sqlite_session)
+
+    # Act
+    primero = svc.importar_lote([_fila("100"), _fila("900"), _fila("100"), {"nombre": "sin documento"}])
+    segundo = svc.importar_lote([_fila("100"), _fila("100", pais="EC")], primera_fila=5)
+
+    # Assert
+    assert [r["estado"] for r in primero] == ["creado", "existente", "duplicado", "invalido"]
+    assert primero[1]["id"] == existente.id
+    assert primero[2]["errores"] == ["Repite la fila 1"]
+    assert any(e.startswith("documento:") for e in primero[3]["errores"])
+    assert [(r["fila"], r["estado"]) for r in segundo] == [(5, "duplicado"), (6, "creado")]
+    assert sqlite_session.query(Proveedor).count() == 3
+
+
+def test_lector_csv_registros_multilinea():
+    # Arrange
+    lector = LectorCSV()
+    lineas = ["nombre,documento,direccion", 'Uno,1,"Calle 1', 'Piso 2"', "Dos,2,", ""]
+
+    # Act
+    filas = [f for f in map(lector.alimentar, lineas) if f is not None]
+
+    # Assert
+    assert filas == [
+        {"nombre": "Uno", "documento": "1", "direccion": "Calle 1\nPiso 2"},
+        {"nombre": "Dos", "documento": "2"},
+    ]
+
+
+@pytest.fixture
+def client(sqlite_session):
+    app.dependency_overrides[get_session] = lambda: sqlite_session
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def test_importar_csv_en_lotes(client, existente, monkeypatch):
+    # Arrange
+    monkeypatch.setattr("src.routes.proveedores.settings.IMPORTACION_LOTE", 2)
+    cuerpo = (
+        "nombre,tipo_de_persona,documento,tipo_documento,pais,email\r\n"
+        "Uno,JURIDICA,1,NIT,CO,\r\n"
+        "Existente,JURIDICA,900,NIT,CO,\r\n"
+        "Tres,JURIDICA,3,NIT,CO,no-es-email\r\n"
+        "Uno otra vez,JURIDICA,1,NIT,CO,\r\n"
+        "Cinco,NATURAL,5,CC,CO,cinco@proveedor.com\r\n"
+    )
+
+    # Act
+    r = client.post("/v1/proveedores/importar", content=cuerpo.encode(), headers={"Content-Type": "text/csv"})
+
+    # Assert
+    assert r.status_code == 200
+    data = r.json()
+    assert (data["creados"], data["existentes"], data["duplicados"], data["invalidos"]) == (2, 1, 1, 1)
+    assert [x["estado"] for x in data["resultados"]] == ["creado", "existente", "invalido", "duplicado", "creado"]
+
+
+def test_importar_ndjson_y_tipo_no_soportado(client):
+    # Arrange
+    cuerpo = "\n".join(json.dumps(_fila(str(i))) for i in range(3))
+
+    # Act
+    ok = client.post("/v1/proveedores/importar", content=cuerpo, headers={"Content-Type": "application/x-ndjson"})
+    mal_formado = client.post("/v1/proveedores/importar", content="{", headers={"Content-Type": "application/x-ndjson"})
+    no_soportado = client.post("/v1/proveedores/importar", json=[_fila("9")])
+
+    # Assert
+    assert ok.status_code == 200 and ok.json()["creados"] == 3
+    assert mal_formado.status_code == 400
+    assert no_soportado.status_code == 415
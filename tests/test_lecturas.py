@@ -0,0 +1,127 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+from src.app import app
+from src.config import settings
+from src.dependencies import get_read_session
+from src.domain.models import OrdenCompra, ProductoProveedor, Proveedor
+from tests.planes import sembrar
+from src.services.archivo import ArchivoService
+
+_DIRECTAS = frozenset({"obtener_oc", "obtener_proveedor"})
+
+
+@pytest.fixture
+def sembrada(sqlite_session):
+    muestra = sembrar(sqlite_session, "co", proveedores=50, productos_por_proveedor=5, ocs=30)
+    sqlite_session.expunge_all()
+    return muestra
+
+
+@pytest.fixture
+def client(sqlite_session):
+    app.dependency_overrides[get_read_session] = lambda: sqlite_session
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def _get(client, monkeypatch, directas, url, **kw):
+    monkeypatch.setattr(settings, "LECTURAS_DIRECTAS", directas)
+    return client.get(url, **kw)
+
+
+@pytest.mark.parametrize("url", [
+    "/v1/ordenes-compra/{oc_id}",
+    "/v1/proveedores/{proveedor_id}",
+])
+def test_lectura_directa_devuelve_lo_mismo_que_el_orm(client, sembrada, monkeypatch, url):
+    # Arrange
+    url = url.format(**sembrada)
+
+    # Act
+    por_orm = _get(client, monkeypatch, frozenset(), url)
+    directa = _get(client, monkeypatch, _DIRECTAS, url)
+
+    # Assert
+    assert por_orm.status_code == directa.status_code == 200
+    assert directa.json() == por_orm.json()
+    assert directa.headers.get("etag") == por_orm.headers.get("etag")
+
+
+def test_lectura_directa_no_carga_instancias_en_la_sesion(client, sqlite_session, sembrada, monkeypatch):
+    # Act
+    r = _get(client, monkeypatch, _DIRECTAS, f"/v1/ordenes-compra/{sembrada['oc_id']}")
+
+    # Assert
+    assert r.status_code == 200 and r.json()["items"]
+    assert len(sqlite_session.identity_map) == 0
+
+
+def test_lectura_directa_de_oc_archivada_y_304(client, sqlite_session, sembrada, monkeypatch):
+    # Arrange
+    oc = sqlite_session.get(OrdenCompra, sembrada["oc_id"])
+    oc.estado = "COMPLETA"
+    sqlite_session.commit()
+    ArchivoService(sqlite_session).archivar_lote(antes_de=datetime(2100, 1, 1))
+    sqlite_session.expunge_all()
+    url = f"/v1/ordenes-compra/{sembrada['oc_id']}"
+
+    # Act
+    r = _get(client, monkeypatch, _DIRECTAS, url)
+    r304 = _get(client, monkeypatch, _DIRECTAS, url, headers={"If-None-Match": r.headers["etag"]})
+
+    # Assert
+    assert r.status_code == 200
+    assert r.json()["estado"] == "COMPLETA" and r.json()["items"]
+    assert r304.status_code == 304
+
+
+def test_proveedores_por_producto_con_sus_terminos(client, sqlite_session, sembrada):
+    # Arrange
+    esperados = sqlite_session.execute(
+        select(Proveedor.id, ProductoProveedor.sku_proveedor)
+        .join(Proveedor, ProductoProveedor.proveedor_id == Proveedor.id)
+        .where(ProductoProveedor.producto_id == sembrada["producto_id"], ProductoProveedor.activo.is_(True),
+               Proveedor.eliminado_en.is_(None))
+        .order_by(Proveedor.nombre).limit(3)
+    ).all()
+
+    # Act
+    r = client.get(f"/v1/proveedores/{sembrada['producto_id']}/proveedores?activo_relacion=true&limit=3")
+
+    # Assert
+    assert r.status_code == 200 and esperados
+    assert [(p["id"], p["terminos"]["sku_proveedor"]) for p in r.json()] == [(str(i), sku) for i, sku in esperados]
+    assert all(p["terminos"]["activo"] for p in r.json())
+
+
+def test_304_de_oc_sin_leer_la_orden_ni_sus_items(client, sqlite_session, sembrada, monkeypatch):
+    # Arrange
+    url = f"/v1/ordenes-compra/{sembrada['oc_id']}"
+    etag = _get(client, monkeypatch, _DIRECTAS, url).headers["etag"]
+    sentencias = []
+    escucha = lambda conn, cursor, sql, *args: sentencias.append(sql)
+    event.listen(sqlite_session.get_bind(), "before_cursor_execute", escucha)
+
+    # Act
+    try:
+        r = _get(client, monkeypatch, _DIRECTAS, url, headers={"If-None-Match": etag})
+    finally:
+        event.remove(sqlite_session.get_bind(), "before_cursor_execute", escucha)
+
+    # Assert
+    assert r.status_code == 304
+    assert len(sentencias) == 1 and "SELECT co.orden_compra.actualizado_en" in " ".join(sentencias[0].split())
+    assert "item_orden_compra" not in sentencias[0]
+
+
+def test_lectura_directa_404(client, sembrada, monkeypatch):
+    # Act / Assert
+    assert _get(client, monkeypatch, _DIRECTAS, f"/v1/ordenes-compra/{uuid.uuid4()}").status_code == 404
+    assert _get(client, monkeypatch, _DIRECTAS, f"/v1/proveedores/{uuid.uuid4()}").status_code == 404
+    assert _get(client, monkeypatch, _DIRECTAS, f"/v1/proveedores/{uuid.uuid4()}/proveedores").json() == []
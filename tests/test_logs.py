@@ -0,0 +1,81 @@
+import json
+import logging
+import queue
+
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.infrastructure.logs import (
+    FiltroContexto, FiltroMuestreo, FormateadorJSON, QueueHandlerNoBloqueante, contexto_log, parse_muestreo,
+)
+
+
+def _record(msg="hola %s", args=("mundo",), nivel=logging.INFO, **extra):
+    record = logging.makeLogRecord({"name": "prueba", "levelno": nivel, "levelname": logging.getLevelName(nivel),
+                                    "msg": msg, "args": args})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_formateador_json_con_contexto_y_trace():
+    # Arrange
+    token = contexto_log.set({"trace_id": "a" * 32, "span_id": "7", "request_id": "r-1", "schema": "co",
+                              "ruta": "GET /v1/proveedores/{id}"})
+    record = _record(extra_campo=3)
+    FiltroContexto().filter(record)
+    contexto_log.reset(token)
+
+    # Act
+    out = json.loads(FormateadorJSON(proyecto_gcp="proyecto", servicio="ms-compras").format(record))
+
+    # Assert
+    assert out["message"] == "hola mundo"
+    assert out["severity"] == "INFO"
+    assert out["logging.googleapis.com/trace"] == f"projects/proyecto/traces/{'a' * 32}"
+    assert out["logging.googleapis.com/spanId"] == "7"
+    assert (out["request_id"], out["schema"], out["ruta"]) == ("r-1", "co", "GET /v1/proveedores/{id}")
+    assert out["extra_campo"] == 3
+
+
+def test_muestreo_por_nivel_y_request_id():
+    # Arrange
+    filtro = FiltroMuestreo(parse_muestreo("INFO=0.5,DEBUG=0"))
+
+    # Act
+    decisiones = {filtro.filter(_record(request_id="r-42")) for _ in range(20)}
+    conservados = sum(filtro.filter(_record(request_id=f"r-{i}")) for i in range(2000))
+
+    # Assert
+    assert len(decisiones) == 1  # misma petición, misma decisión
+    assert 800 < conservados < 1200
+    assert filtro.filter(_record(nivel=logging.WARNING))
+    assert not filtro.filter(_record(nivel=logging.DEBUG))
+    assert filtro.filter(_record(nivel=logging.DEBUG, muestrear=False))
+
+
+def test_cola_llena_descarta_sin_bloquear():
+    # Arrange
+    handler = QueueHandlerNoBloqueante(queue.Queue(maxsize=2))
+
+    # Act
+    for _ in range(5):
+        handler.handle(_record())
+
+    # Assert
+    assert handler.queue.qsize() == 2
+    assert handler.descartados == 3
+    assert handler.queue.get_nowait().getMessage() == "hola mundo"
+
+
+def test_middleware_propaga_trace_y_request_id(caplog):
+    # Arrange
+    trace = "0af7651916cd43dd8448eb211c80319c"
+
+    # Act
+    with caplog.at_level(logging.INFO, logger="ms_compras.peticiones"):
+        r = TestClient(app).get("/health", headers={"traceparent": f"00-{trace}-b7ad6b7169203331-01", "X-Country": "MX"})
+
+    # Assert
+    assert r.headers["x-request-id"] == trace
+    registro = next(rec for rec in caplog.records if rec.name == "ms_compras.peticiones")
+    assert (registro.trace_id, registro.schema, registro.status) == (trace, "mx", 200)
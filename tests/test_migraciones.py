@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.config import settings
+from src.domain import models
+from src.infrastructure import esquemas, migraciones
+
+
+def _sql(llamada) -> str:
+    return str(llamada.args[0])
+
+
+def test_no_borra_indices_que_otra_sesion_esta_construyendo():
+    # Arrange
+    conn = MagicMock()
+    conn.dialect = postgresql.dialect()
+    existentes = [(i.name, True, False) for t in models.Base.metadata.sorted_tables for i in t.indexes]
+    existentes = [fila for fila in existentes if fila[0] not in ("ix_auditoria_raiz", "ix_notificacion_proximo")]
+    existentes += [("ix_auditoria_raiz", False, True), ("ix_notificacion_proximo", False, False)]
+    conn.execute.side_effect = [existentes] + [MagicMock()] * 10
+
+    # Act
+    migraciones.asegurar_indices(conn, "co")
+
+    # Assert
+    ddl = [_sql(c) for c in conn.execute.call_args_list[2:]]
+    assert ddl[0] == 'DROP INDEX CONCURRENTLY IF EXISTS "co"."ix_notificacion_proximo"'
+    assert ddl[1].startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notificacion_proximo")
+    assert len(ddl) == 2
+
+
+@pytest.mark.parametrize("falla", [False, True])
+def test_inicializacion_serializada_con_advisory_lock(monkeypatch, falla):
+    # Arrange
+    pasos = []
+    motor = MagicMock()
+    motor.dialect.name = "postgresql"
+    conn = motor.connect.return_value.execution_options.return_value.__enter__.return_value
+    conn.execute.side_effect = lambda sql, params=None: pasos.append((str(sql).split("(")[0], params["clave"]))
+
+    def crear(schema):
+        pasos.append("ddl")
+        if falla:
+            raise RuntimeError("sin conexión")
+
+    monkeypatch.setattr(esquemas, "engine", motor)
+    monkeypatch.setattr(esquemas, "_crear_tablas", crear)
+    monkeypatch.setattr(migraciones, "asegurar_indices", lambda conn, schema: pasos.append("indices"))
+
+    # Act
+    try:
+        esquemas.crear_tablas("pe")
+    except RuntimeError:
+        pass
+
+    # Assert
+    clave = f"{settings.SERVICE_NAME}:esquema:pe"
+    medio = ["ddl"] if falla else ["ddl", "indices"]
+    assert pasos == [("SELECT pg_advisory_lock", clave), *medio, ("SELECT pg_advisory_unlock", clave)]
@@ -0,0 +1,288 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.dependencies import get_read_session, get_session
+from src.domain.schemas import ProveedorUpdate
+from src.domain.models import ItemOrdenCompra, Notificacion, NotificacionFallida, OrdenCompra, Proveedor
+from src.services.notificaciones import HEADER_FIRMA, DespachadorNotificaciones
+from src.services.orden_compra import OrdenCompraService
+
+
+class _Proveedor:
+    """Servidor HTTP local que hace de webhook de los proveedores: registra lo recibido y responde lo indicado."""
+
+    def __init__(self):
+        self.recibidas: list[tuple[str, dict, dict]] = []
+        self.respuestas: dict[str, list[int]] = {}     # por path, códigos a devolver en orden; luego 200
+        self.demora_s = 0.0
+        self.simultaneas: dict[str, int] = {}
+        self.max_simultaneas: dict[str, int] = {}
+        self._lock = threading.Lock()
+        proveedor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                cuerpo = self.rfile.read(int(self.headers["Content-Length"]))
+                with proveedor._lock:
+                    proveedor.recibidas.append((self.path, dict(self.headers), json.loads(cuerpo)))
+                    pendientes = proveedor.respuestas.get(self.path)
+                    codigo = pendientes.pop(0) if pendientes else 200
+                    n = proveedor.simultaneas[self.path] = proveedor.simultaneas.get(self.path, 0) + 1
+                    proveedor.max_simultaneas[self.path] = max(proveedor.max_simultaneas.get(self.path, 0), n)
+                time.sleep(proveedor.demora_s)
+                with proveedor._lock:
+                    proveedor.simultaneas[self.path] -= 1
+                self.send_response(codigo)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+        threading.Thread(target=self.servidor.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def eventos(self, path=None) -> list[dict]:
+        return [e for p, _, cuerpo in self.recibidas if path in (None, p) for e in cuerpo["eventos"]]
+
+
+@pytest.fixture
+def webhook():
+    proveedor = _Proveedor()
+    yield proveedor
+    proveedor.servidor.shutdown()
+    proveedor.servidor.server_close()
+
+
+@pytest.fixture
+def despachador(sqlite_session):
+    return DespachadorNotificaciones(
+        lote=50, eventos_por_envio=2, concurrencia=10, concurrencia_proveedor=2, timeout_s=2,
+        max_intentos=3, backoff_base_s=60, backoff_max_s=600, lease_s=60, intervalo_s=1,
+        secreto="s3creto", solo_publicos=False,  # el receptor de prueba escucha en 127.0.0.1
+        sesion=lambda schema: nullcontext(sqlite_session),
+    )
+
+
+def _proveedor(session, webhook_url, documento="900"):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento=documento, tipo_documento="NIT",
+                     pais="CO", webhook_url=webhook_url)
+    session.add(prov)
+    session.commit()
+    return prov.id
+
+
+def _enviar_ocs(session, proveedor_id, n):
+    svc = OrdenCompraService(session)
+    ids = []
+    for i in range(n):
+        oc = OrdenCompra(codigo=f"OC-{uuid.uuid4().hex[:8]}", proveedor_id=proveedor_id, estado="ABIERTA",
+                         total=Decimal("10"), moneda="COP")
+        oc.items = [ItemOrdenCompra(producto_id=uuid.uuid4(), cantidad=1, precio_unitario=Decimal("10"))]
+        session.add(oc)
+        session.commit()
+        svc.marcar_enviada(oc.id)
+        ids.append(oc.id)
+    return ids
+
+
+def _vencer_reintentos(session):
+    for n in session.query(Notificacion):
+        n.proximo_intento_en = datetime.utcnow() - timedelta(seconds=1)
+    session.commit()
+
+
+def test_marcar_enviada_encola_solo_si_hay_webhook(sqlite_session, webhook):
+    # Arrange
+    con_webhook = _proveedor(sqlite_session, f"{webhook.url}/a")
+    sin_webhook = _proveedor(sqlite_session, None, documento="901")
+
+    # Act
+    oc_id, = _enviar_ocs(sqlite_session, con_webhook, 1)
+    _enviar_ocs(sqlite_session, sin_webhook, 1)
+
+    # Assert
+    notificacion, = sqlite_session.query(Notificacion).all()
+    assert (notificacion.proveedor_id, notificacion.evento) == (con_webhook, "oc.enviada")
+    assert notificacion.payload["id"] == str(oc_id)
+    assert notificacion.payload["estado"] == "ENVIADA"
+    assert len(notificacion.payload["items"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_entrega_por_lotes_firmados(sqlite_session, webhook, despachador):
+    # Arrange
+    proveedor_id = _proveedor(sqlite_session, f"{webhook.url}/a")
+    oc_ids = _enviar_ocs(sqlite_session, proveedor_id, 3)
+
+    # Act
+    tomadas = await despachador.procesar("co")
+    await despachador.detener()
+
+    # Assert
+    assert tomadas == 3
+    assert len(webhook.recibidas) == 2  # 3 eventos de a 2 por envío
+    assert sorted(e["datos"]["id"] for e in webhook.eventos()) == sorted(map(str, oc_ids))
+    for _, headers, cuerpo in webhook.recibidas:
+        firma = hmac.new(b"s3creto", json.dumps(cuerpo, separators=(",", ":")).encode(), hashlib.sha256).hexdigest()
+        assert headers[HEADER_FIRMA] == f"sha256={firma}"
+    assert sqlite_session.query(Notificacion).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_reintenta_con_backoff_y_luego_entrega(sqlite_session, webhook, despachador):
+    # Arrange
+    proveedor_id = _proveedor(sqlite_session, f"{webhook.url}/a")
+    _enviar_ocs(sqlite_session, proveedor_id, 1)
+    webhook.respuestas = {"/a": [503]}
+
+    # Act
+    await despachador.procesar("co")
+    sqlite_session.expire_all()
+    notificacion = sqlite_session.query(Notificacion).one()
+    reintento = notificacion.proximo_intento_en - datetime.utcnow()
+    antes_de_tiempo = await despachador.procesar("co")
+    _vencer_reintentos(sqlite_session)
+    await despachador.procesar("co")
+    await despachador.detener()
+
+    # Assert
+    assert (notificacion.intentos, notificacion.ultimo_error) == (1, "HTTP 503: ")
+    assert timedelta(seconds=25) < reintento <= timedelta(seconds=60)
+    assert antes_de_tiempo == 0
+    assert len(webhook.recibidas) == 2
+    assert sqlite_session.query(Notificacion).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_agotados_los_intentos_pasa_a_fallidas(sqlite_session, webhook, despachador):
+    # Arrange
+    reintentable = _proveedor(sqlite_session, f"{webhook.url}/caido")
+    rechaza = _proveedor(sqlite_session, f"{webhook.url}/rechaza", documento="901")
+    _enviar_ocs(sqlite_session, reintentable, 1)
+    _enviar_ocs(sqlite_session, rechaza, 1)
+    webhook.respuestas = {"/caido": [500, 500, 500], "/rechaza": [400]}
+
+    # Act
+    for _ in range(3):
+        await despachador.procesar("co")
+        _vencer_reintentos(sqlite_session)
+    await despachador.procesar("co")
+    await despachador.detener()
+
+    # Assert
+    assert sqlite_session.query(Notificacion).count() == 0
+    fallidas = {f.proveedor_id: f for f in sqlite_session.query(NotificacionFallida)}
+    assert fallidas[reintentable].intentos == 3
+    assert fallidas[rechaza].intentos == 1  # 400: sin reintentos
+    assert len(webhook.eventos("/caido")) == 3
+
+
+@pytest.mark.asyncio
+async def test_limita_envios_simultaneos_por_proveedor(sqlite_session, webhook, despachador):
+    # Arrange
+    lento = _proveedor(sqlite_session, f"{webhook.url}/lento")
+    otro = _proveedor(sqlite_session, f"{webhook.url}/otro", documento="901")
+    _enviar_ocs(sqlite_session, lento, 8)    # 4 envíos de 2 eventos
+    _enviar_ocs(sqlite_session, otro, 8)
+    webhook.demora_s = 0.2
+
+    # Act
+    await despachador.procesar("co")
+    activos = dict(despachador._por_proveedor)
+    await despachador.detener()
+
+    # Assert
+    assert len(webhook.recibidas) == 8
+    assert webhook.max_simultaneas == {"/lento": 2, "/otro": 2}
+    assert activos == {}  # sin envíos en curso no queda un semáforo por proveedor
+
+
+@pytest.mark.parametrize("url", [
+    "http://proveedor.com.co/hook",
+    "https://127.0.0.1/hook",
+    "https://localhost:8443/hook",
+    "https://169.254.169.254/computeMetadata/v1/",
+    "https://10.0.0.5/hook",
+    "https://[::1]/hook",
+    "https://[::ffff:192.168.0.1]/hook",
+    "https://metadata.google.internal/hook",
+])
+def test_webhook_solo_https_a_hosts_publicos(url):
+    # Act / Assert
+    with pytest.raises(ValueError):
+        ProveedorUpdate(webhook_url=url)
+    assert str(ProveedorUpdate(webhook_url="https://93.184.216.34/hook").webhook_url) == "https://93.184.216.34/hook"
+
+
+@pytest.mark.asyncio
+async def test_no_envia_a_destinos_internos(sqlite_session, webhook, despachador):
+    # Arrange: URL guardada antes de la validación (o cuyo nombre resuelve ahora a la red interna)
+    proveedor_id = _proveedor(sqlite_session, webhook.url.replace("http://", "https://") + "/interno")
+    _enviar_ocs(sqlite_session, proveedor_id, 1)
+    despachador.solo_publicos = True
+
+    # Act
+    await despachador.procesar("co")
+    await despachador.detener()
+
+    # Assert
+    assert webhook.recibidas == []
+    fallida, = sqlite_session.query(NotificacionFallida).all()
+    assert (fallida.intentos, fallida.ultimo_error) == (1, "destino no permitido: el host 127.0.0.1 apunta a una dirección interna")
+
+
+@pytest.mark.asyncio
+async def test_no_vuelve_a_tomar_lo_que_otra_instancia_esta_entregando(sqlite_session, webhook, despachador):
+    # Arrange
+    proveedor_id = _proveedor(sqlite_session, f"{webhook.url}/a")
+    _enviar_ocs(sqlite_session, proveedor_id, 1)
+    sqlite_session.query(Notificacion).one().tomado_hasta = datetime.utcnow() + timedelta(seconds=30)
+    sqlite_session.commit()
+
+    # Act
+    tomadas = await despachador.procesar("co")
+
+    # Assert
+    assert tomadas == 0
+    assert webhook.recibidas == []
+
+
+def test_reintentar_fallida_por_api(sqlite_session, webhook):
+    # Arrange
+    proveedor_id = _proveedor(sqlite_session, f"{webhook.url}/nuevo")
+    fallida = NotificacionFallida(id=uuid.uuid4(), proveedor_id=proveedor_id, evento="oc.enviada", url=f"{webhook.url}/viejo",
+                                  payload={"id": "x"}, intentos=8, ultimo_error="HTTP 500: ", creado_en=datetime.utcnow())
+    sqlite_session.add(fallida)
+    sqlite_session.commit()
+    app.dependency_overrides[get_session] = lambda: sqlite_session
+    app.dependency_overrides[get_read_session] = lambda: sqlite_session
+
+    # Act
+    try:
+        with TestClient(app) as client:
+            listadas = client.get("/v1/notificaciones/fallidas").json()
+            r = client.post(f"/v1/notificaciones/fallidas/{fallida.id}/reintentar")
+            otra_vez = client.post(f"/v1/notificaciones/fallidas/{fallida.id}/reintentar")
+    finally:
+        app.dependency_overrides.clear()
+
+    # Assert
+    assert [f["id"] for f in listadas] == [str(fallida.id)]
+    assert r.status_code == 202
+    assert otra_vez.status_code == 404
+    notificacion = sqlite_session.get(Notificacion, fallida.id)
+    assert (notificacion.intentos, notificacion.url) == (0, f"{webhook.url}/nuevo")
@@ -1,5 +1,6 @@
 
 import uuid
+from datetime import datetime
 from decimal import Decimal
 from unittest.mock import MagicMock, patch
 import pytest
@@ -31,7 +32,11 @@ def test_crear_orden_compra_exitosa():
     mock_rel = MagicMock(spec=ProductoProveedor)
     mock_rel.producto_id = producto_id
     mock_rel.sku_proveedor = 'SKU_FROM_CATALOG'
+    mock_rel.precio = None
+    mock_rel.moneda = None
+    mock_rel.lote_minimo = None
     db_session.query.return_value.filter.return_value.all.return_value = [mock_rel]
+    db_session.scalar.return_value = None  # código libre en vivas y archivadas
 
     # Act
     result = service.crear(proveedor_id, items)
@@ -102,6 +107,80 @@ def test_crear_orden_compra_productos_no_ofertados():
         service.crear(proveedor_id, items)
 
 
+def _mock_catalogo(db_session, producto_id, precio=None, moneda=None, lote_minimo=None):
+    mock_proveedor = MagicMock(spec=Proveedor)
+    mock_proveedor.activo = True
+    db_session.get.return_value = mock_proveedor
+
+    mock_rel = MagicMock(spec=ProductoProveedor)
+    mock_rel.producto_id = producto_id
+    mock_rel.sku_proveedor = "SKU_CAT"
+    mock_rel.precio = precio
+    mock_rel.moneda = moneda
+    mock_rel.lote_minimo = lote_minimo
+    db_session.query.return_value.filter.return_value.all.return_value = [mock_rel]
+    db_session.scalar.return_value = None  # código libre en vivas y archivadas
+
+
+def test_crear_orden_compra_precio_desde_catalogo():
+    # Arrange
+    db_session = MagicMock()
+    service = OrdenCompraService(db_session)
+    producto_id = uuid.uuid4()
+    _mock_catalogo(db_session, producto_id, precio=Decimal("12.5000"), moneda="COP")
+
+    # Act
+    result = service.crear(uuid.uuid4(), [{"producto_id": producto_id, "cantidad": 4}])
+
+    # Assert
+    assert result.total == Decimal("50.0000")
+    assert result.moneda == "COP"
+    added_item = db_session.add.call_args_list[1].args[0]
+    assert added_item.precio_unitario == Decimal("12.5000")
+    assert added_item.sku_proveedor == "SKU_CAT"
+
+
+def test_crear_orden_compra_precio_del_payload_tiene_prioridad():
+    # Arrange
+    db_session = MagicMock()
+    service = OrdenCompraService(db_session)
+    producto_id = uuid.uuid4()
+    _mock_catalogo(db_session, producto_id, precio=Decimal("12.5"), moneda="COP")
+
+    # Act
+    result = service.crear(uuid.uuid4(), [{"producto_id": producto_id, "cantidad": 1, "precio_unitario": 10}],
+                           moneda="USD")
+
+    # Assert
+    assert result.total == Decimal("10")
+    assert result.moneda == "USD"
+
+
+def test_crear_orden_compra_moneda_no_coincide_con_catalogo():
+    # Arrange
+    db_session = MagicMock()
+    service = OrdenCompraService(db_session)
+    producto_id = uuid.uuid4()
+    _mock_catalogo(db_session, producto_id, precio=Decimal("12.5"), moneda="COP")
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="no coincide"):
+        service.crear(uuid.uuid4(), [{"producto_id": producto_id, "cantidad": 1}], moneda="USD")
+
+
+def test_crear_orden_compra_lote_minimo():
+    # Arrange
+    db_session = MagicMock()
+    service = OrdenCompraService(db_session)
+    producto_id = uuid.uuid4()
+    _mock_catalogo(db_session, producto_id, lote_minimo=10)
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="lote mínimo"):
+        service.crear(uuid.uuid4(), [{"producto_id": producto_id, "cantidad": 3}])
+    db_session.add.assert_not_called()
+
+
 def test_obtener_orden_compra():
     # Arrange
     db_session = MagicMock()
@@ -126,10 +205,10 @@ def test_listar_ordenes_compra():
     db_session = MagicMock()
     service = OrdenCompraService(db_session)
 
-    db_session.query.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = [
+    db_session.scalars.return_value = iter([
         MagicMock(spec=OrdenCompra),
         MagicMock(spec=OrdenCompra),
-    ]
+    ])
 
     # Act
     result = service.listar(None, None, None)
@@ -138,6 +217,21 @@ def test_listar_ordenes_compra():
     assert len(result) == 2
 
 
+def test_version_orden_compra_sin_cargar_items():
+    # Arrange
+    db_session = MagicMock()
+    service = OrdenCompraService(db_session)
+    actualizado_en = datetime(2025, 3, 1, 12, 0)
+    db_session.query.return_value.filter.return_value.scalar.return_value = actualizado_en
+
+    # Act
+    result = service.version(uuid.uuid4())
+
+    # Assert
+    assert result == actualizado_en
+    db_session.get.assert_not_called()
+
+
 def test_marcar_enviada():
     # Arrange
     db_session = MagicMock()
@@ -147,6 +241,7 @@ def test_marcar_enviada():
     oc = MagicMock()
     oc.estado = "ABIERTA"
     service._ensure = MagicMock(return_value=oc)
+    db_session.scalar.return_value = None  # proveedor sin webhook
 
     # Act
     result = service.marcar_enviada(oc_id)
@@ -0,0 +1,97 @@
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from src.app import app
+from src.dependencies import get_read_session
+from src.domain.models import OrdenCompra, PendienteProducto, ProductoProveedor, Proveedor
+from src.services.orden_compra import OrdenCompraService
+
+
+@pytest.fixture
+def catalogo(sqlite_session):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT", pais="CO")
+    sqlite_session.add(prov)
+    sqlite_session.flush()
+    productos = [uuid.uuid4() for _ in range(3)]
+    for pid in productos:
+        sqlite_session.add(ProductoProveedor(proveedor_id=prov.id, producto_id=pid, precio=10, moneda="COP"))
+    sqlite_session.commit()
+    return prov.id, productos
+
+
+def test_pendientes_se_mantienen_con_cada_transicion(sqlite_session, catalogo):
+    # Arrange
+    proveedor_id, (a, b, c) = catalogo
+    svc = OrdenCompraService(sqlite_session)
+    oc1 = svc.crear(proveedor_id, [{"producto_id": a, "cantidad": 5}, {"producto_id": b, "cantidad": 2}])
+    oc2 = svc.crear(proveedor_id, [{"producto_id": a, "cantidad": 3}])
+    oc3 = svc.crear(proveedor_id, [{"producto_id": b, "cantidad": 4}])
+
+    # Act
+    svc.marcar_enviada(oc1.id)
+    svc.cancelar(oc2.id)
+    svc.marcar_completa(oc3.id)
+    svc.marcar_completa(oc3.id)  # repetir no descuenta dos veces
+
+    # Assert
+    assert svc.pendientes_por_producto([a, b, c]) == {a: 5, b: 2, c: 0}
+    svc.recalcular_pendientes()
+    sqlite_session.expire_all()
+    assert svc.pendientes_por_producto([a, b, c]) == {a: 5, b: 2, c: 0}
+    assert sqlite_session.query(PendienteProducto).count() == 2
+
+
+def test_recalcular_bloquea_el_resumen_en_postgres():
+    # Arrange
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    db.info = {"schema": "pe"}
+
+    # Act
+    OrdenCompraService(db).recalcular_pendientes()
+
+    # Assert
+    sentencias = [str(c.args[0]) for c in db.execute.call_args_list]
+    assert sentencias[0] == 'LOCK TABLE "pe".pendiente_producto IN EXCLUSIVE MODE'
+    assert sentencias[1].startswith("DELETE FROM pendiente_producto")
+    db.commit.assert_called_once()
+
+
+def test_transicion_relee_el_estado_tras_bloquear_la_orden(sqlite_session, catalogo):
+    # Arrange: la sesión conserva la orden ABIERTA mientras otra transacción la cancela
+    proveedor_id, (a, _, _) = catalogo
+    svc = OrdenCompraService(sqlite_session)
+    oc = svc.crear(proveedor_id, [{"producto_id": a, "cantidad": 5}])
+    svc.crear(proveedor_id, [{"producto_id": a, "cantidad": 3}])
+    sqlite_session.execute(update(OrdenCompra).where(OrdenCompra.id == oc.id).values(estado="CANCELADA")
+                           .execution_options(synchronize_session=False))
+    sqlite_session.execute(update(PendienteProducto).values(cantidad=3).execution_options(synchronize_session=False))
+    assert oc.estado == "ABIERTA"
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="cancelada"):
+        svc.cancelar(oc.id)
+    svc.marcar_completa(oc.id)
+    assert svc.pendientes_por_producto([a]) == {a: 3}
+
+
+def test_endpoint_pendientes():
+    # Arrange
+    a, b = uuid.uuid4(), uuid.uuid4()
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [(a, 7)]
+    app.dependency_overrides[get_read_session] = lambda: db
+
+    # Act
+    try:
+        r = TestClient(app).get("/v1/ordenes-compra/pendientes", params={"producto_id": [str(a), str(b)]})
+    finally:
+        app.dependency_overrides.clear()
+
+    # Assert
+    assert r.status_code == 200
+    assert r.json() == [{"producto_id": str(a), "cantidad": 7}, {"producto_id": str(b), "cantidad": 0}]
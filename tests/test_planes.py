@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.domain import models
+from tests.planes import CONSULTAS_RUTAS, TABLAS_GRANDES, planes_de_rutas, sembrar
+
+# PostgreSQL opcional para los mismos tests: TEST_DATABASE_URL=postgresql+psycopg2://.../db
+_PG_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def postgres_session():
+    if not _PG_URL:
+        pytest.skip("TEST_DATABASE_URL no definido")
+    engine = create_engine(_PG_URL)
+    with engine.connect() as conn:
+        conn.execute(text('DROP SCHEMA IF EXISTS "planes_test" CASCADE'))
+        conn.execute(text('CREATE SCHEMA "planes_test"'))
+        conn.commit()
+    try:
+        with engine.connect().execution_options(schema_translate_map={None: "planes_test"}) as conn:
+            models.Base.metadata.create_all(conn)
+            conn.commit()
+            with Session(bind=conn, info={"schema": "planes_test"}, expire_on_commit=False) as session:
+                yield session
+    finally:
+        with engine.connect() as conn:
+            conn.execute(text('DROP SCHEMA IF EXISTS "planes_test" CASCADE'))
+            conn.commit()
+        engine.dispose()
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def sembrada(request):
+    session = request.getfixturevalue("sqlite_session" if request.param == "sqlite" else "postgres_session")
+    schema = session.info["schema"]
+    muestra = sembrar(session, schema, proveedores=400, productos_por_proveedor=10, ocs=1000)
+    return session, muestra
+
+
+def test_rutas_usan_sus_indices_sin_recorrer_tablas_grandes(sembrada):
+    # Arrange
+    session, muestra = sembrada
+
+    # Act
+    planes = planes_de_rutas(session, muestra)
+
+    # Assert
+    for consulta in CONSULTAS_RUTAS:
+        usados = set().union(*(p.indices for p in planes[consulta.nombre]))
+        assert usados & consulta.indices, f"{consulta.nombre}: esperaba {set(consulta.indices)}, usa {usados}"
+        for plan in planes[consulta.nombre]:
+            assert not plan.secuenciales & set(TABLAS_GRANDES), f"{consulta.nombre}:\n{plan.sql}\n{plan.texto}"
+
+
+def test_detecta_regresion_si_falta_el_indice(sqlite_session):
+    # Arrange
+    muestra = sembrar(sqlite_session, "co", proveedores=200, ocs=100)
+    sqlite_session.execute(text("DROP INDEX co.ix_oc_estado_creado"))
+    sqlite_session.execute(text("DROP INDEX co.ix_oc_creado"))
+    consulta = next(c for c in CONSULTAS_RUTAS if c.nombre == "ordenes_por_estado")
+
+    # Act
+    planes = planes_de_rutas(sqlite_session, muestra, consultas=(consulta,))
+
+    # Assert
+    principal = planes["ordenes_por_estado"][0]
+    assert "ix_oc_estado_creado" not in principal.indices
+    assert "orden_compra" in principal.secuenciales
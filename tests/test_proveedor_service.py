@@ -0,0 +1,82 @@
+import tracemalloc
+import uuid
+
+import pytest
+from sqlalchemy import event, insert
+
+from src.domain.models import OrdenCompra, ProductoProveedor, Proveedor
+from src.services.proveedor import ProveedorService
+
+
+def _proveedor_con_catalogo(session, n_productos):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento=str(uuid.uuid4())[:12],
+                     tipo_documento="NIT", pais="CO")
+    session.add(prov)
+    session.flush()
+    session.execute(insert(ProductoProveedor), [
+        {"proveedor_id": prov.id, "producto_id": uuid.uuid4(), "sku_proveedor": f"SKU-{i}", "activo": True}
+        for i in range(n_productos)
+    ])
+    session.commit()
+    session.expunge_all()
+    return prov.id
+
+
+def _pico_borrado(session, proveedor_id):
+    tracemalloc.start()
+    try:
+        ProveedorService(session).eliminar(proveedor_id, definitivo=True)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_borrado_definitivo_no_carga_el_catalogo(sqlite_session):
+    # Arrange
+    pequeno = _proveedor_con_catalogo(sqlite_session, 10)
+    grande = _proveedor_con_catalogo(sqlite_session, 5000)
+    cargados = []
+
+    def _al_cargar(obj, ctx):
+        cargados.append(obj)
+
+    # Act
+    event.listen(ProductoProveedor, "load", _al_cargar)
+    try:
+        pico_pequeno = _pico_borrado(sqlite_session, pequeno)
+        pico_grande = _pico_borrado(sqlite_session, grande)
+    finally:
+        event.remove(ProductoProveedor, "load", _al_cargar)
+
+    # Assert: la BD borra el catálogo (ON DELETE CASCADE); memoria independiente del tamaño
+    assert cargados == []
+    assert sqlite_session.query(ProductoProveedor).count() == 0
+    assert sqlite_session.get(Proveedor, grande) is None
+    assert pico_grande < pico_pequeno * 2 + 64 * 1024
+
+
+def test_borrado_logico_por_defecto(sqlite_session):
+    # Arrange
+    proveedor_id = _proveedor_con_catalogo(sqlite_session, 3)
+    svc = ProveedorService(sqlite_session)
+
+    # Act
+    svc.eliminar(proveedor_id)
+
+    # Assert
+    prov = sqlite_session.get(Proveedor, proveedor_id)
+    assert prov.eliminado_en is not None and prov.activo is False
+    assert sqlite_session.query(ProductoProveedor).count() == 3
+    with pytest.raises(LookupError):
+        svc.eliminar(proveedor_id)
+
+
+def test_borrado_definitivo_rechazado_con_ordenes(sqlite_session):
+    # Arrange
+    proveedor_id = _proveedor_con_catalogo(sqlite_session, 1)
+    sqlite_session.add(OrdenCompra(codigo="OC-1", proveedor_id=proveedor_id))
+    sqlite_session.commit()
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="órdenes de compra"):
+        ProveedorService(sqlite_session).eliminar(proveedor_id, definitivo=True)
@@ -1,14 +1,18 @@
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from uuid import uuid4, UUID
+from datetime import datetime
 
 from src.app import app
+from src.config import settings
 from src.domain.models import Proveedor, ProductoProveedor
-from src.dependencies import get_session
+from src.dependencies import get_read_session, get_session
 from src.domain.schemas import TipoDePersona, TipoDocumento
+from src.http_cache import Validador
 
 # Mock de la base de datos
 @pytest.fixture
@@ -16,9 +20,15 @@ def db_session_mock():
     db = MagicMock(spec=Session)
     return db
 
+@pytest.fixture(autouse=True)
+def rutas_por_orm(monkeypatch):
+    # estos tests simulan la sesión ORM; la lectura directa (Core) se prueba en test_lecturas.py
+    monkeypatch.setattr(settings, "LECTURAS_DIRECTAS", frozenset())
+
 @pytest.fixture
 def client(db_session_mock):
     app.dependency_overrides[get_session] = lambda: db_session_mock
+    app.dependency_overrides[get_read_session] = lambda: db_session_mock
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -70,7 +80,7 @@ def test_listar_proveedores(client, db_session_mock):
     # Arrange
     proveedor_1 = Proveedor(id=uuid4(), nombre="Proveedor A", documento="111", pais="CO", activo=True, tipo_de_persona="NATURAL", tipo_documento="CC")
     proveedor_2 = Proveedor(id=uuid4(), nombre="Proveedor B", documento="222", pais="MX", activo=False, tipo_de_persona="JURIDICA", tipo_documento="NIT")
-    db_session_mock.query.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = [proveedor_1, proveedor_2]
+    db_session_mock.scalars.return_value = iter([proveedor_1, proveedor_2])
 
     # Act
     response = client.get("/v1/proveedores")
@@ -155,16 +165,42 @@ def test_actualizar_proveedor_conflicto(client, db_session_mock):
 def test_eliminar_proveedor_exitoso(client, db_session_mock):
     # Arrange
     proveedor_id = uuid4()
-    db_session_mock.get.return_value = Proveedor(id=proveedor_id, **proveedor_data_valida)
+    proveedor = Proveedor(id=proveedor_id, **proveedor_data_valida)
+    db_session_mock.get.return_value = proveedor
 
     # Act
     response = client.delete(f"/v1/proveedores/{proveedor_id}")
 
-    # Assert
+    # Assert: borrado lógico
     assert response.status_code == 204
-    db_session_mock.delete.assert_called_once()
+    assert proveedor.eliminado_en is not None and proveedor.activo is False
+    db_session_mock.delete.assert_not_called()
     db_session_mock.commit.assert_called_once()
 
+def test_eliminar_proveedor_definitivo_con_ordenes(client, db_session_mock):
+    # Arrange
+    proveedor_id = uuid4()
+    db_session_mock.get.return_value = Proveedor(id=proveedor_id, **proveedor_data_valida)
+    db_session_mock.query.return_value.filter.return_value.first.return_value = (uuid4(),)
+
+    # Act
+    response = client.delete(f"/v1/proveedores/{proveedor_id}", params={"definitivo": "true"})
+
+    # Assert
+    assert response.status_code == 409
+    db_session_mock.delete.assert_not_called()
+
+def test_obtener_proveedor_eliminado(client, db_session_mock):
+    # Arrange
+    proveedor_id = uuid4()
+    db_session_mock.get.return_value = Proveedor(id=proveedor_id, eliminado_en=datetime(2025, 1, 1), **proveedor_data_valida)
+
+    # Act
+    response = client.get(f"/v1/proveedores/{proveedor_id}")
+
+    # Assert
+    assert response.status_code == 404
+
 def test_eliminar_proveedor_no_encontrado(client, db_session_mock):
     # Arrange
     proveedor_id = uuid4()
@@ -223,10 +259,10 @@ def test_listar_productos_de_proveedor(client, db_session_mock):
     producto_id_1 = uuid4()
     producto_id_2 = uuid4()
     db_session_mock.get.return_value = Proveedor(id=proveedor_id, **proveedor_data_valida)
-    db_session_mock.query.return_value.filter.return_value.order_by.return_value.all.return_value = [
+    db_session_mock.scalars.return_value = iter([
         ProductoProveedor(proveedor_id=proveedor_id, producto_id=producto_id_1, activo=True),
         ProductoProveedor(proveedor_id=proveedor_id, producto_id=producto_id_2, activo=False)
-    ]
+    ])
 
     # Act
     response = client.get(f"/v1/proveedores/{proveedor_id}/productos")
@@ -264,18 +300,12 @@ def test_desasociar_producto_no_encontrado(client, db_session_mock):
 def test_listar_proveedores_por_producto(client, db_session_mock):
     # Arrange
     producto_id = uuid4()
-    proveedor_id = uuid4()
-    rel = ProductoProveedor(proveedor_id=proveedor_id, producto_id=producto_id, precio=100.0, activo=True)
-    
-    # Evitar conflicto de kwargs duplicados para 'nombre'
-    prov_data = proveedor_data_valida.copy()
-    prov_data["nombre"] = "Proveedor de Producto"
-    prov = Proveedor(id=proveedor_id, **prov_data)
-
-    db_session_mock.query.return_value.join.return_value.filter.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = [(rel, prov)]
+    proveedor = {"id": str(uuid4()), "nombre": "Proveedor de Producto", **{k: v for k, v in proveedor_data_valida.items() if k != "nombre"},
+                 "terminos": {"precio": 100.0, "activo": True}}
 
     # Act
-    response = client.get(f"/v1/proveedores/{producto_id}/proveedores")
+    with patch("src.routes.proveedores.lecturas.proveedores_por_producto", return_value=[proveedor]) as consulta:
+        response = client.get(f"/v1/proveedores/{producto_id}/proveedores", params={"activo_relacion": "true", "limit": 5})
 
     # Assert
     assert response.status_code == 200
@@ -283,3 +313,105 @@ def test_listar_proveedores_por_producto(client, db_session_mock):
     assert len(data) == 1
     assert data[0]["nombre"] == "Proveedor de Producto"
     assert data[0]["terminos"]["precio"] == 100.0
+    assert consulta.call_args.args[1:] == (producto_id, True, None, 5, 0)
+
+def test_obtener_proveedor_envia_etag(client, db_session_mock):
+    # Arrange
+    proveedor_id = uuid4()
+    db_session_mock.get.return_value = Proveedor(
+        id=proveedor_id, actualizado_en=datetime(2025, 1, 2, 3, 4, 5), **proveedor_data_valida
+    )
+
+    # Act
+    response = client.get(f"/v1/proveedores/{proveedor_id}")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["last-modified"] == "Thu, 02 Jan 2025 03:04:05 GMT"
+
+def test_obtener_proveedor_no_modificado(client, db_session_mock):
+    # Arrange
+    proveedor_id = uuid4()
+    actualizado_en = datetime(2025, 1, 2, 3, 4, 5)
+    db_session_mock.get.return_value = Proveedor(id=proveedor_id, actualizado_en=actualizado_en, **proveedor_data_valida)
+    etag = client.get(f"/v1/proveedores/{proveedor_id}").headers["etag"]
+    db_session_mock.get.reset_mock()
+    db_session_mock.query.return_value.filter.return_value.scalar.return_value = actualizado_en
+
+    # Act
+    response = client.get(f"/v1/proveedores/{proveedor_id}", headers={"If-None-Match": etag})
+
+    # Assert
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    db_session_mock.get.assert_not_called()
+
+def test_obtener_proveedor_modificado_devuelve_cuerpo(client, db_session_mock):
+    # Arrange
+    proveedor_id = uuid4()
+    db_session_mock.query.return_value.filter.return_value.scalar.return_value = datetime(2025, 6, 1)
+    db_session_mock.get.return_value = Proveedor(
+        id=proveedor_id, actualizado_en=datetime(2025, 6, 1), **proveedor_data_valida
+    )
+
+    # Act
+    response = client.get(f"/v1/proveedores/{proveedor_id}", headers={"If-Modified-Since": "Thu, 02 Jan 2025 03:04:05 GMT"})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["id"] == str(proveedor_id)
+
+def test_listar_proveedores_no_modificado(client, db_session_mock):
+    # Arrange
+    versiones = [(uuid4(), datetime(2025, 1, 1)), (uuid4(), datetime(2025, 2, 1))]
+    db_session_mock.execute.return_value.all.return_value = versiones
+    etag = Validador.de_lista(versiones).etag
+
+    # Act
+    response = client.get("/v1/proveedores", headers={"If-None-Match": etag})
+
+    # Assert
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert "last-modified" not in response.headers
+
+def test_listar_proveedores_ignora_if_modified_since(client, db_session_mock):
+    # Arrange: la fila más reciente sigue en la página aunque otra haya salido de ella
+    db_session_mock.scalars.return_value = [Proveedor(
+        id=uuid4(), nombre="Proveedor", documento="doc", pais="CO", tipo_de_persona="NATURAL", tipo_documento="CC",
+        activo=True, creado_en=datetime(2025, 1, 1), actualizado_en=datetime(2025, 2, 1),
+    )]
+
+    # Act
+    response = client.get("/v1/proveedores", headers={"If-Modified-Since": "Sat, 01 Feb 2025 00:00:00 GMT"})
+
+    # Assert
+    assert response.status_code == 200
+    assert "last-modified" not in response.headers
+    db_session_mock.execute.assert_not_called()
+
+def test_sincronizar_catalogo(client, db_session_mock):
+    # Arrange
+    proveedor_id = uuid4()
+    resumen = {"insertados": 1, "actualizados": 0, "desactivados": 2, "sin_cambios": 5}
+
+    # Act
+    with patch("src.routes.proveedores.CatalogoService.sincronizar", return_value=resumen) as sincronizar:
+        response = client.put(f"/v1/proveedores/{proveedor_id}/productos", json=[{"producto_id": str(uuid4())}])
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == resumen
+    assert sincronizar.call_args.args[0] == proveedor_id
+
+def test_sincronizar_catalogo_con_sku_en_uso_devuelve_409(client, db_session_mock):
+    # Arrange
+    error = IntegrityError("UPDATE producto_proveedor", {}, Exception("uq_cat_prov_sku"))
+
+    # Act
+    with patch("src.routes.proveedores.CatalogoService.sincronizar", side_effect=error):
+        response = client.put(f"/v1/proveedores/{uuid4()}/productos", json=[{"producto_id": str(uuid4())}])
+
+    # Assert
+    assert response.status_code == 409
@@ -0,0 +1,115 @@
+import time
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+
+from src.config import settings
+from src.dependencies import get_primary_read_session, get_read_session, get_session
+from src.infrastructure.infrastructure import SelectorReplica
+
+
+def test_selector_descarta_replicas_atrasadas():
+    # Arrange
+    al_dia, atrasada = MagicMock(), MagicMock()
+    lags = {id(al_dia): 0.5, id(atrasada): 30.0}
+    selector = SelectorReplica([atrasada, al_dia], max_lag_s=5, intervalo_s=60, medir_lag=lambda e: lags[id(e)])
+
+    # Act & Assert
+    assert {selector.elegir() for _ in range(4)} == {al_dia}
+
+
+def test_selector_sin_replicas_disponibles_usa_primario():
+    # Arrange
+    def caida(_):
+        raise ConnectionError("sin conexión")
+    selector = SelectorReplica([MagicMock()], max_lag_s=5, intervalo_s=60, medir_lag=caida)
+
+    # Act & Assert
+    assert selector.elegir() is None
+    assert SelectorReplica([], max_lag_s=5, intervalo_s=60).elegir() is None
+
+
+def test_selector_cachea_la_medicion_de_lag():
+    # Arrange
+    medir = MagicMock(return_value=0.0)
+    selector = SelectorReplica([MagicMock(), MagicMock()], max_lag_s=5, intervalo_s=60, medir_lag=medir)
+
+    # Act
+    for _ in range(10):
+        selector.elegir()
+
+    # Assert
+    assert medir.call_count == 2
+
+
+def _app_con_sesiones(llamadas):
+    @contextmanager
+    def session_falsa(schema, read_only=False, usar_replica=True):
+        llamadas.append((schema, read_only) if usar_replica else (schema, read_only, "primario"))
+        yield MagicMock()
+
+    app = FastAPI()
+
+    @app.post("/escritura")
+    def escritura(db=Depends(get_session)):
+        return {}
+
+    @app.get("/lectura")
+    def lectura(db=Depends(get_read_session)):
+        return {}
+
+    @app.get("/lectura-primario")
+    def lectura_primario(db=Depends(get_primary_read_session)):
+        return {}
+
+    return app, patch("src.dependencies.session_for_schema", session_falsa)
+
+
+def test_lectura_va_a_replica_y_tras_escribir_al_primario():
+    # Arrange
+    llamadas = []
+    app, parche = _app_con_sesiones(llamadas)
+
+    # Act
+    with parche, TestClient(app) as client:
+        client.get("/lectura", headers={"X-Country": "MX"})
+        escritura = client.post("/escritura", headers={"X-Country": "MX"})
+        client.get("/lectura", headers={"X-Country": "MX"})
+
+    # Assert
+    assert llamadas == [("mx", True), ("mx", False), ("mx", False)]
+    assert settings.READ_AFTER_WRITE_COOKIE in escritura.cookies
+
+
+def test_header_read_after_write_fuerza_primario():
+    # Arrange
+    llamadas = []
+    app, parche = _app_con_sesiones(llamadas)
+    vigente = str(time.time() + 60)
+    vencido = str(time.time() - 60)
+
+    # Act
+    with parche, TestClient(app) as client:
+        client.get("/lectura", headers={settings.READ_AFTER_WRITE_HEADER: vigente})
+        client.get("/lectura", headers={settings.READ_AFTER_WRITE_HEADER: vencido})
+
+    # Assert
+    assert [ro for _, ro in llamadas] == [False, True]
+
+
+def test_lectura_del_primario_sin_transaccion_de_escritura_ni_cookie():
+    # Arrange
+    llamadas = []
+    app, parche = _app_con_sesiones(llamadas)
+
+    # Act
+    with parche, TestClient(app) as client:
+        r = client.get("/lectura-primario", headers={"X-Country": "MX"})
+        siguiente = client.get("/lectura", headers={"X-Country": "MX"})
+
+    # Assert
+    assert llamadas == [("mx", True, "primario"), ("mx", True)]
+    assert settings.READ_AFTER_WRITE_COOKIE not in r.cookies
+    assert settings.READ_AFTER_WRITE_HEADER not in r.headers
@@ -0,0 +1,141 @@
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import settings
+from src.infrastructure import infrastructure
+from src.infrastructure.infrastructure import opciones_pool, reserva_fondo
+from src.infrastructure.logs import configurar_logging, detener_logging
+
+
+def _cpus(tmp_path, v2=None, v1=None):
+    from src.servidor import cpus_disponibles
+    tmp_path.mkdir()
+    cuota, periodo = tmp_path / "cpu.cfs_quota_us", tmp_path / "cpu.cfs_period_us"
+    if v2 is not None:
+        (tmp_path / "cpu.max").write_text(v2)
+    if v1 is not None:
+        cuota.write_text(v1[0])
+        periodo.write_text(v1[1])
+    return cpus_disponibles(str(tmp_path / "cpu.max"), (str(cuota), str(periodo)))
+
+
+@pytest.fixture
+def afinidad(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+
+
+def test_cpus_desde_la_cuota_del_cgroup(tmp_path, afinidad):
+    # Act / Assert
+    assert _cpus(tmp_path / "v2", v2="150000 100000") == 2      # 1.5 CPUs -> 2 workers
+    assert _cpus(tmp_path / "sin_limite", v2="max 100000") == 8
+    assert _cpus(tmp_path / "v1", v1=("50000", "100000")) == 1
+    assert _cpus(tmp_path / "v1_sin_limite", v1=("-1", "100000")) == 8
+    assert _cpus(tmp_path / "sin_cgroup") == 8
+
+
+@pytest.mark.parametrize("configurados, esperados", [(0, 8), (3, 3)])
+def test_workers_por_cpu_salvo_que_se_fijen(monkeypatch, configurados, esperados):
+    # Arrange
+    from src import servidor
+    monkeypatch.setattr(settings, "WEB_WORKERS", configurados)
+    monkeypatch.setattr(servidor, "cpus_disponibles", lambda: 8)
+
+    # Act
+    workers = servidor.resolver_workers()
+
+    # Assert
+    assert workers == esperados
+
+
+@pytest.fixture
+def presupuesto(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_TOTAL", 10)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW_TOTAL", 10)
+    monkeypatch.setattr(settings, "TRABAJOS_HABILITADOS", True)
+    monkeypatch.setattr(settings, "TRABAJOS_WORKERS", 2)
+    monkeypatch.setattr(settings, "WEBHOOKS_HABILITADOS", True)
+
+
+def test_pool_de_la_instancia_repartido_entre_workers(presupuesto):
+    # Act / Assert: 4 conexiones reservadas (2 hilos de trabajos, su sondeo y el despachador)
+    assert reserva_fondo() == 4
+    assert opciones_pool(1) == {"pool_size": 6, "max_overflow": 10, "pool_timeout": settings.DB_POOL_TIMEOUT_S}
+    assert (opciones_pool(3)["pool_size"], opciones_pool(3)["max_overflow"]) == (2, 3)
+    assert (opciones_pool(32)["pool_size"], opciones_pool(32)["max_overflow"]) == (1, 0)
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3, 6])
+def test_conexiones_de_la_instancia_dentro_del_presupuesto(presupuesto, workers):
+    # Arrange: como gunicorn, el master marca a cada worker antes del fork
+    from src import servidor
+    server = SimpleNamespace(WORKERS={})
+    for pid in range(workers):
+        worker = SimpleNamespace(pid=pid)
+        servidor.pre_fork(server, worker)
+        server.WORKERS[pid] = worker
+
+    # Act
+    pool = opciones_pool(workers)
+    de_fondo = [w for w in server.WORKERS.values() if w.fondo]
+
+    # Assert
+    assert len(de_fondo) == 1
+    assert workers * pool["pool_size"] + len(de_fondo) * reserva_fondo() <= settings.DB_POOL_TOTAL
+
+
+def test_el_reemplazo_del_worker_de_fondo_hereda_trabajos_y_webhooks(monkeypatch):
+    # Arrange
+    from src import servidor
+    monkeypatch.setattr(settings, "WEB_FONDO", True)
+    server = SimpleNamespace(WORKERS={}, log=logging.getLogger("gunicorn"))
+    for pid in (1, 2):
+        worker = SimpleNamespace(pid=pid)
+        servidor.pre_fork(server, worker)
+        server.WORKERS[pid] = worker
+    del server.WORKERS[1]   # muere el de fondo
+    reemplazo = SimpleNamespace(pid=3)
+    servidor.pre_fork(server, reemplazo)
+    server.WORKERS[3] = reemplazo
+    servidor.on_reload(server)
+    recargado = SimpleNamespace(pid=4)
+    servidor.pre_fork(server, recargado)
+
+    # Act
+    servidor.post_fork(server, server.WORKERS[2])
+
+    # Assert
+    assert (server.WORKERS[2].fondo, reemplazo.fondo, recargado.fondo) == (False, False, True)
+    assert settings.WEB_FONDO is False
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")  # fork con hilos vivos (el escritor de logs)
+def test_worker_forkeado_tiene_pool_y_escritor_de_logs_propios(capfd):
+    # Arrange
+    configurar_logging(formato="texto")
+    pool_padre = infrastructure.engine.pool
+    lectura, escritura = os.pipe()
+
+    # Act
+    try:
+        pid = os.fork()
+        if pid == 0:  # worker
+            os.close(lectura)
+            logging.getLogger("worker").warning("desde el worker")
+            detener_logging()
+            os.write(escritura, b"nuevo" if infrastructure.engine.pool is not pool_padre else b"heredado")
+            os._exit(0)
+        os.close(escritura)
+        os.waitpid(pid, 0)
+        pool_hijo = os.read(lectura, 16)
+        os.close(lectura)
+    finally:
+        with capfd.disabled():  # el handler de stdout no debe quedar sobre la captura de este test
+            configurar_logging(nivel=settings.LOG_LEVEL, formato=settings.LOG_FORMATO)
+
+    # Assert
+    assert pool_hijo == b"nuevo"
+    assert infrastructure.engine.pool is pool_padre
+    assert "desde el worker" in capfd.readouterr().out
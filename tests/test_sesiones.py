@@ -0,0 +1,149 @@
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from src.app import app
+from src.config import settings
+from src.domain import models
+from src.domain.models import Proveedor
+from src.infrastructure import infrastructure
+from src.infrastructure.infrastructure import motor_de_schema, session_for_schema
+
+
+class _Idas:
+    """Idas y vueltas al servidor: sentencias, BEGIN y COMMIT/ROLLBACK fuera de AUTOCOMMIT."""
+
+    def __init__(self, engine):
+        self.total = 0
+        self.sql: list[str] = []
+        event.listen(engine, "after_cursor_execute", self._sentencia)
+        event.listen(engine, "commit", self._fin)
+        event.listen(engine, "rollback", self._fin)
+
+    def _sentencia(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+        self.sql.append(statement.split()[0].upper())
+
+    def _fin(self, conn):
+        if not _autocommit(conn):
+            self.total += 1
+            self.sql.append("FIN")
+
+    def reiniciar(self):
+        self.total = 0
+        self.sql = []
+
+
+def _autocommit(conn) -> bool:
+    return conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT"
+
+
+@pytest.fixture
+def motor(monkeypatch):
+    """
+    SQLite en memoria con 'co' adjunto, que emite BEGIN como psycopg2 (una ida al servidor por
+    transacción) en vez del BEGIN implícito de sqlite3; reemplaza al engine del primario.
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _conectar(dbapi_conn, _):
+        dbapi_conn.execute("ATTACH DATABASE ':memory:' AS co")
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        if not _autocommit(conn):
+            conn.exec_driver_sql("BEGIN")
+
+    with engine.begin() as conn:
+        models.Base.metadata.create_all(conn.execution_options(schema_translate_map={None: "co"}))
+    monkeypatch.setattr(infrastructure, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def proveedor_id(motor):
+    with session_for_schema("co") as db:
+        prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT", pais="CO")
+        db.add(prov)
+        db.flush()
+        return prov.id
+
+
+def test_motor_por_schema_se_construye_una_vez(motor):
+    # Act / Assert
+    assert motor_de_schema(motor, "co", True) is motor_de_schema(motor, "co", True)
+    assert motor_de_schema(motor, "co", True) is not motor_de_schema(motor, "ec", True)
+    assert motor_de_schema(motor, "co").pool is motor.pool
+
+
+def test_lectura_en_autocommit_no_abre_transaccion(motor, proveedor_id):
+    # Arrange
+    idas = _Idas(motor)
+
+    # Act
+    with TestClient(app) as client:
+        idas.reiniciar()
+        proveedor = client.get(f"/v1/proveedores/{proveedor_id}")
+        una = idas.total
+        idas.reiniciar()
+        ninguno = client.get(f"/v1/ordenes-compra/{uuid.uuid4()}")
+        dos = idas.sql
+
+    # Assert
+    assert proveedor.status_code == 200
+    assert una == 1
+    assert ninguno.status_code == 404
+    assert dos == ["SELECT", "SELECT"]  # OC viva y archivo, sin BEGIN ni COMMIT
+
+
+def test_lectura_en_transaccion_read_only(motor, proveedor_id, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(settings, "LECTURAS_AUTOCOMMIT", False)
+    idas = _Idas(motor)
+
+    # Act
+    with TestClient(app) as client:
+        idas.reiniciar()
+        r = client.get(f"/v1/proveedores/{proveedor_id}")
+
+    # Assert
+    assert r.status_code == 200
+    assert idas.sql == ["BEGIN", "SELECT", "FIN"]
+    assert motor_de_schema(motor, "co", True).get_execution_options()["postgresql_readonly"] is True
+
+
+def test_escritura_abre_una_transaccion(motor):
+    # Arrange
+    idas = _Idas(motor)
+
+    # Act
+    with TestClient(app) as client:
+        idas.reiniciar()
+        r = client.post("/v1/tasas-cambio", json={"moneda": "PEN", "tasa": "0.27"})
+
+    # Assert
+    assert r.status_code == 201
+    assert idas.sql == ["BEGIN", "INSERT", "FIN"]
+
+
+def test_create_schema_una_vez_por_proceso(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(infrastructure, "_schemas_creados", set())
+    conn = MagicMock()
+    conn.dialect.name = "postgresql"
+
+    # Act
+    clave = infrastructure._crear_schema(conn, "pe")
+    infrastructure._schemas_creados.add(clave)  # lo que hace al_confirmar tras el COMMIT
+    otra = infrastructure._crear_schema(conn, "pe")
+
+    # Assert
+    assert conn.execute.call_count == 1
+    assert otra is None
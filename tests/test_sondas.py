@@ -0,0 +1,98 @@
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.infrastructure.esquemas import InicializacionEsquemas
+from src.infrastructure.sondas import Sondas, sondas
+from src.middleware.latencia import RegistroLatencias
+
+
+def _engine(checkedout=0, size=5, max_overflow=2, schemas=("co", "ec")):
+    engine = MagicMock()
+    pool = engine.pool
+    pool.status.return_value = "Pool"
+    pool.size.return_value = size
+    pool.checkedin.return_value = size - min(checkedout, size)
+    pool.checkedout.return_value = checkedout
+    pool.overflow.return_value = max(0, checkedout - size)
+    pool._max_overflow = max_overflow
+    conn = engine.connect.return_value.__enter__.return_value
+    conn.execute.side_effect = [None, [(s,) for s in schemas]]
+    return engine
+
+
+def _sondas(engine, ttl_s=60, ping_redis=lambda: 0.5):
+    esquemas = InicializacionEsquemas(["co", "ec", "mx"], reintento_s=1)
+    esquemas.pendientes = set()
+    return Sondas(engine, ["co", "ec", "mx"], ttl_s, esquemas=esquemas,
+                  registro=RegistroLatencias(), ping_redis=ping_redis)
+
+
+def test_reporte_dependencias_y_cache():
+    # Arrange
+    engine = _engine()
+    s = _sondas(engine)
+
+    # Act
+    primero = s.reporte()
+    segundo = s.reporte()
+
+    # Assert
+    assert primero["ready"] is True
+    assert primero["db"]["ok"] is True and primero["db"]["pool"]["checkedout"] == 0
+    assert primero["redis"] == {"ok": True, "latencia_ms": 0.5}
+    assert primero["schemas"] == {"co": True, "ec": True, "mx": False}
+    assert segundo["medido_en"] == primero["medido_en"]
+    assert engine.connect.call_count == 1
+
+
+def test_pool_agotado_no_pide_conexion():
+    # Arrange
+    engine = _engine(checkedout=7)
+
+    # Act
+    reporte = _sondas(engine).reporte()
+
+    # Assert
+    assert reporte["ready"] is False
+    assert reporte["db"]["pool"]["agotado"] is True
+    engine.connect.assert_not_called()
+
+
+def test_bd_caida_y_redis_caido():
+    # Arrange
+    engine = _engine()
+    engine.connect.side_effect = OSError("connection refused\ndetalle")
+
+    # Act
+    reporte = _sondas(engine, ping_redis=lambda: None).reporte()
+
+    # Assert
+    assert reporte["ready"] is False
+    assert reporte["db"]["error"] == "connection refused"
+    assert reporte["redis"]["ok"] is False
+
+
+def test_percentil_latencias():
+    # Arrange
+    registro = RegistroLatencias()
+    for ms in range(1, 101):
+        registro.registrar(ms / 1000)
+
+    # Act / Assert
+    assert registro.percentil(0.99) == 0.099
+    assert RegistroLatencias().percentil(0.99) is None
+
+
+def test_ready_503_si_bd_caida(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(sondas, "_dependencias", lambda: {"db": {"ok": False, "error": "pool agotado"}})
+
+    # Act
+    r = TestClient(app).get("/ready")
+
+    # Assert
+    assert r.status_code == 503
+    assert r.json()["status"] == "not_ready"
+    assert r.json()["db"]["error"] == "pool agotado"
@@ -0,0 +1,147 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.dependencies import get_session
+from src.domain.models import OrdenCompra, ProductoProveedor, Proveedor
+from src.services.orden_compra import OrdenCompraService
+from src.services.tasas_cambio import TasaCambioService, tasas_cambio
+from src.services.trabajos import NormalizarTotales
+
+
+@pytest.fixture
+def tasas(sqlite_session):
+    # el cache es global por schema: se descarta lo que hayan dejado otros tests en 'co'
+    tasas_cambio.invalidar("co")
+    svc = TasaCambioService(sqlite_session)
+    svc.registrar("COP", Decimal("0.00025"), datetime(2025, 1, 1))
+    svc.registrar("COP", Decimal("0.00024"), datetime(2025, 6, 1))
+    svc.registrar("MXN", Decimal("0.055"), datetime(2025, 1, 1))
+    return svc
+
+
+@pytest.fixture
+def proveedor_id(sqlite_session):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT", pais="CO")
+    sqlite_session.add(prov)
+    sqlite_session.commit()
+    return prov.id
+
+
+def test_tasa_vigente_por_fecha(sqlite_session, tasas):
+    # Act / Assert
+    assert tasas_cambio.tasa(sqlite_session, "COP", datetime(2024, 12, 31)) is None
+    assert tasas_cambio.tasa(sqlite_session, "COP", datetime(2025, 3, 1)) == Decimal("0.00025")
+    assert tasas_cambio.tasa(sqlite_session, "cop", datetime(2025, 6, 1)) == Decimal("0.00024")
+    assert tasas_cambio.tasa(sqlite_session, "USD", datetime(2000, 1, 1)) == Decimal("1")
+    assert tasas_cambio.tasa(sqlite_session, "EUR", datetime(2025, 3, 1)) is None
+    assert tasas_cambio.tasa(sqlite_session, None, datetime(2025, 3, 1)) is None
+
+
+def test_tasas_se_sirven_desde_memoria_hasta_registrar_una_nueva(sqlite_session, tasas):
+    # Arrange
+    tasas_cambio.tasa(sqlite_session, "MXN", datetime(2025, 3, 1))
+
+    # Act
+    with patch.object(sqlite_session, "execute", wraps=sqlite_session.execute) as execute:
+        for _ in range(50):
+            tasas_cambio.tasa(sqlite_session, "MXN", datetime(2025, 3, 1))
+    consultas_en_cache = execute.call_count
+    tasas.registrar("MXN", Decimal("0.06"), datetime(2025, 2, 1))
+    for fn in sqlite_session.info.pop("al_confirmar", ()):  # lo que haría session_for_schema al confirmar
+        fn()
+
+    # Assert
+    assert consultas_en_cache == 0
+    assert tasas_cambio.tasa(sqlite_session, "MXN", datetime(2025, 3, 1)) == Decimal("0.06")
+
+
+def test_registrar_moneda_base_es_invalido(sqlite_session, tasas):
+    # Act / Assert
+    with pytest.raises(ValueError):
+        tasas.registrar("usd", Decimal("1"))
+
+
+def test_crear_oc_guarda_total_en_moneda_base(sqlite_session, tasas, proveedor_id):
+    # Arrange
+    producto_id = uuid.uuid4()
+    sqlite_session.add(ProductoProveedor(proveedor_id=proveedor_id, producto_id=producto_id, precio=1000, moneda="COP"))
+    sqlite_session.commit()
+
+    # Act
+    with patch("src.services.orden_compra.datetime") as reloj:
+        reloj.utcnow.return_value = datetime(2025, 7, 1)
+        oc = OrdenCompraService(sqlite_session).crear(proveedor_id, [{"producto_id": producto_id, "cantidad": 4}])
+
+    # Assert
+    assert oc.moneda == "COP"
+    assert oc.tasa_cambio == Decimal("0.00024")
+    assert oc.total_base == Decimal("0.9600")
+
+
+def _oc(proveedor_id, estado, total, moneda, total_base=None, creado_en=datetime(2025, 3, 1)):
+    return OrdenCompra(codigo=f"OC-{uuid.uuid4().hex[:8]}", proveedor_id=proveedor_id, estado=estado, total=total,
+                       moneda=moneda, total_base=total_base, creado_en=creado_en)
+
+
+def test_resumen_agrega_en_moneda_base(sqlite_session, proveedor_id):
+    # Arrange
+    sqlite_session.add_all([
+        _oc(proveedor_id, "ABIERTA", 4000, "COP", Decimal("1.0")),
+        _oc(proveedor_id, "ABIERTA", 100, "MXN", Decimal("5.5")),
+        _oc(proveedor_id, "ABIERTA", 50, "EUR"),
+        _oc(proveedor_id, "COMPLETA", 10, "USD", Decimal("10")),
+        _oc(proveedor_id, "COMPLETA", 10, "USD", Decimal("10"), creado_en=datetime(2024, 1, 1)),
+    ])
+    sqlite_session.commit()
+
+    # Act
+    resumen = OrdenCompraService(sqlite_session).resumen(None, datetime(2025, 1, 1), None)
+
+    # Assert
+    assert resumen == [
+        {"estado": "ABIERTA", "ordenes": 3, "total_base": Decimal("6.5"), "sin_tasa": 1},
+        {"estado": "COMPLETA", "ordenes": 1, "total_base": Decimal("10"), "sin_tasa": 0},
+    ]
+
+
+def test_normalizar_totales_completa_las_ocs_sin_tasa(sqlite_session, tasas, proveedor_id):
+    # Arrange
+    sin_tasa = _oc(proveedor_id, "COMPLETA", 4000, "COP")
+    sin_tasa_vigente = _oc(proveedor_id, "ABIERTA", 4000, "COP", creado_en=datetime(2024, 1, 1))
+    sqlite_session.add_all([sin_tasa, sin_tasa_vigente])
+    sqlite_session.commit()
+    tipo = NormalizarTotales()
+
+    # Act
+    cursor, procesados = tipo.lote(sqlite_session, {}, None, 10)
+
+    # Assert
+    assert (cursor, procesados) == (None, 2)
+    assert (sin_tasa.tasa_cambio, sin_tasa.total_base) == (Decimal("0.00025"), Decimal("1.0000"))
+    assert sin_tasa_vigente.total_base is None
+
+
+def test_endpoint_registrar_tasa(sqlite_session):
+    # Arrange
+    tasas_cambio.invalidar("co")
+    app.dependency_overrides[get_session] = lambda: sqlite_session
+
+    # Act
+    try:
+        with TestClient(app) as client:
+            ok = client.post("/v1/tasas-cambio", json={"moneda": "pen", "tasa": "0.27", "vigente_desde": "2025-01-01T00:00:00"})
+            base = client.post("/v1/tasas-cambio", json={"moneda": "USD", "tasa": "1"})
+    finally:
+        app.dependency_overrides.clear()
+
+    # Assert
+    assert ok.status_code == 201
+    assert ok.json()["moneda"] == "PEN"
+    assert base.status_code == 400
+    assert tasas_cambio.tasa(sqlite_session, "PEN", datetime(2025, 2, 1)) == Decimal("0.27")
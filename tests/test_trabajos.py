@@ -0,0 +1,195 @@
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from src.app import app
+from src.dependencies import get_primary_read_session, get_session
+from src.domain.models import ItemOrdenCompra, OrdenCompra, ProductoProveedor, Proveedor, Trabajo
+from src.services.trabajos import TIPOS_TRABAJO, EjecutorTrabajos
+
+
+@pytest.fixture
+def ordenes(sqlite_session):
+    prov = Proveedor(nombre="Proveedor", tipo_de_persona="JURIDICA", documento="900", tipo_documento="NIT", pais="CO")
+    sqlite_session.add(prov)
+    sqlite_session.flush()
+    producto_id = uuid.uuid4()
+    sqlite_session.add(ProductoProveedor(proveedor_id=prov.id, producto_id=producto_id, precio=Decimal("12"), moneda="COP"))
+    ocs = []
+    for i in range(5):
+        oc = OrdenCompra(codigo=f"OC-{i}", proveedor_id=prov.id, moneda="COP", estado="ABIERTA",
+                         subtotal=Decimal("100"), impuesto_total=Decimal("0"), total=Decimal("100"))
+        oc.items = [ItemOrdenCompra(producto_id=producto_id, cantidad=10, precio_unitario=Decimal("10"))]
+        sqlite_session.add(oc)
+        ocs.append(oc)
+    sqlite_session.commit()
+    return sorted(ocs, key=lambda oc: oc.id)
+
+
+@pytest.fixture
+def ejecutor(sqlite_session):
+    return EjecutorTrabajos(TIPOS_TRABAJO, max_workers=1, lote=2, lease_s=60, sesion=lambda schema: nullcontext(sqlite_session))
+
+
+def _trabajo(session, tipo, parametros, **campos):
+    trabajo = Trabajo(tipo=tipo, parametros=parametros, estado="PENDIENTE", procesados=0, **campos)
+    session.add(trabajo)
+    session.commit()
+    return trabajo.id
+
+
+def test_recalcular_totales_por_lotes(sqlite_session, ordenes, ejecutor):
+    # Arrange
+    trabajo_id = _trabajo(sqlite_session, "recalcular_totales", {"impuesto_pct": 19})
+
+    # Act
+    ejecutor.ejecutar("co", trabajo_id)
+
+    # Assert
+    trabajo = sqlite_session.get(Trabajo, trabajo_id)
+    assert (trabajo.estado, trabajo.procesados, trabajo.total) == ("COMPLETADO", 5, 5)
+    sqlite_session.expire_all()
+    assert {oc.total for oc in sqlite_session.query(OrdenCompra)} == {Decimal("119")}
+
+
+def test_reanuda_desde_el_checkpoint(sqlite_session, ordenes, ejecutor):
+    # Arrange: trabajo abandonado tras procesar las dos primeras OCs
+    trabajo_id = _trabajo(sqlite_session, "recalcular_totales", {"impuesto_pct": 19}, total=5)
+    trabajo = sqlite_session.get(Trabajo, trabajo_id)
+    trabajo.estado, trabajo.cursor, trabajo.procesados = "EN_CURSO", str(ordenes[1].id), 2
+    trabajo.tomado_por, trabajo.latido_en = "otra-instancia", datetime.utcnow() - timedelta(minutes=10)
+    sqlite_session.commit()
+
+    # Act
+    pendientes = ejecutor._pendientes("co")
+    for pendiente in pendientes:
+        ejecutor.ejecutar("co", pendiente)
+
+    # Assert
+    sqlite_session.expire_all()
+    trabajo = sqlite_session.get(Trabajo, trabajo_id)
+    assert pendientes == [trabajo_id]
+    assert (trabajo.estado, trabajo.procesados, trabajo.tomado_por) == ("COMPLETADO", 5, ejecutor.instancia)
+    totales = [sqlite_session.get(OrdenCompra, oc.id).total for oc in ordenes]
+    assert totales == [Decimal("100")] * 2 + [Decimal("119")] * 3
+
+
+def test_cancelado_no_se_ejecuta_y_no_se_recancela(sqlite_session, ordenes, ejecutor):
+    # Arrange
+    trabajo_id = _trabajo(sqlite_session, "recalcular_totales", {})
+    ejecutor.cancelar(sqlite_session, trabajo_id)
+
+    # Act
+    ejecutor.ejecutar("co", trabajo_id)
+
+    # Assert
+    assert sqlite_session.get(Trabajo, trabajo_id).procesados == 0
+    with pytest.raises(ValueError):
+        ejecutor.cancelar(sqlite_session, trabajo_id)
+
+
+def test_solo_el_worker_que_ejecuta_trabajos_los_encola_al_crearlos(sqlite_session, ejecutor, monkeypatch):
+    # Arrange
+    enviados = []
+    monkeypatch.setattr(ejecutor, "enviar", lambda schema, trabajo_id: enviados.append(trabajo_id))
+    monkeypatch.setattr(ejecutor, "_sondear", lambda *args: None)
+
+    # Act
+    otro_worker = ejecutor.crear(sqlite_session, "recalcular_totales", {})
+    ejecutor.iniciar(["co"])
+    de_fondo = ejecutor.crear(sqlite_session, "recalcular_totales", {})
+    for fn in sqlite_session.info.pop("al_confirmar", ()):  # lo que haría session_for_schema al confirmar
+        fn()
+    ejecutor.detener()
+
+    # Assert: el primero queda PENDIENTE hasta que lo recoja el sondeo del worker de fondo
+    assert enviados == [de_fondo.id]
+    assert ejecutor._pendientes("co") == [otro_worker.id, de_fondo.id]
+
+
+def test_repreciar_abiertas_y_fallo(sqlite_session, ordenes, ejecutor):
+    # Arrange
+    trabajo_id = _trabajo(sqlite_session, "repreciar_abiertas", {})
+    fallido_id = _trabajo(sqlite_session, "recalcular_totales", {})
+
+    # Act
+    ejecutor.ejecutar("co", trabajo_id)
+    with patch.object(TIPOS_TRABAJO["recalcular_totales"], "lote", side_effect=RuntimeError("sin conexión")):
+        ejecutor.ejecutar("co", fallido_id)
+
+    # Assert
+    sqlite_session.expire_all()
+    assert {oc.total for oc in sqlite_session.query(OrdenCompra)} == {Decimal("120")}
+    fallido = sqlite_session.get(Trabajo, fallido_id)
+    assert (fallido.estado, fallido.error) == ("FALLIDO", "sin conexión")
+
+
+def test_repreciar_ignora_productos_desactivados(sqlite_session, ordenes, ejecutor):
+    # Arrange
+    sqlite_session.query(ProductoProveedor).update({"activo": False, "sku_proveedor": None})
+    sqlite_session.commit()
+    trabajo_id = _trabajo(sqlite_session, "repreciar_abiertas", {})
+
+    # Act
+    ejecutor.ejecutar("co", trabajo_id)
+
+    # Assert
+    sqlite_session.expire_all()
+    assert {it.precio_unitario for it in sqlite_session.query(ItemOrdenCompra)} == {Decimal("10")}
+
+
+def test_lote_bloquea_las_ordenes_y_vuelve_a_filtrar(sqlite_session, ordenes):
+    # Arrange: la primera OC pasa a ENVIADA después de leer la página, justo antes del bloqueo
+    tipo = TIPOS_TRABAJO["repreciar_abiertas"]
+    enviada = ordenes[0]
+    paginas = []
+
+    def enviar(conn, cursor, sql, params, context, executemany):
+        if not paginas and sql.startswith("SELECT co.orden_compra.id") and "id IN (" in sql:
+            paginas.append(sql)
+            cursor.connection.execute("UPDATE co.orden_compra SET estado = 'ENVIADA' WHERE id = ?", (enviada.id.hex,))
+
+    event.listen(sqlite_session.get_bind(), "before_cursor_execute", enviar)
+
+    # Act
+    try:
+        cursor, procesadas = tipo.lote(sqlite_session, {}, None, 2)
+    finally:
+        event.remove(sqlite_session.get_bind(), "before_cursor_execute", enviar)
+    sqlite_session.commit()
+
+    # Assert
+    assert (cursor, procesadas) == (str(ordenes[1].id), 1)
+    sqlite_session.expire_all()
+    assert [it.precio_unitario for it in sqlite_session.get(OrdenCompra, enviada.id).items] == [Decimal("10")]
+    assert [it.precio_unitario for it in sqlite_session.get(OrdenCompra, ordenes[1].id).items] == [Decimal("12")]
+    sql = str(tipo._bloqueadas(sqlite_session, {}, [enviada.id]).statement.compile(dialect=postgresql.dialect()))
+    assert "orden_compra.estado =" in sql and sql.endswith("FOR UPDATE OF orden_compra")
+
+
+def test_endpoint_crear_y_validar(sqlite_session):
+    # Arrange
+    app.dependency_overrides[get_session] = lambda: sqlite_session
+    app.dependency_overrides[get_primary_read_session] = lambda: sqlite_session
+    client = TestClient(app)
+
+    # Act
+    try:
+        creado = client.post("/v1/trabajos", json={"tipo": "recalcular_totales", "parametros": {"impuesto_pct": 16}})
+        desconocido = client.post("/v1/trabajos", json={"tipo": "borrar_todo"})
+        invalido = client.post("/v1/trabajos", json={"tipo": "recalcular_totales", "parametros": {"impuesto_pct": 160}})
+        consulta = client.get(f"/v1/trabajos/{creado.json()['id']}")
+    finally:
+        app.dependency_overrides.clear()
+
+    # Assert
+    assert creado.status_code == 202 and creado.json()["estado"] == "PENDIENTE"
+    assert desconocido.status_code == 400 and invalido.status_code == 400
+    assert consulta.status_code == 200 and consulta.json()["progreso"] is None